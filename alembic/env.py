@@ -4,12 +4,17 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from app.config import settings
 from app.models import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# 앱과 같은 DATABASE_URL 을 사용 (ini 의 sqlalchemy.url 은 로컬 기본값)
+if settings.DATABASE_URL:
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -65,8 +70,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # 리비전마다 커밋해야 CONCURRENTLY 인덱스 생성(autocommit_block)이 앞 리비전의 DDL 을 볼 수 있음
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,62 @@
+"""initial users and diaries schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2025-10-20 00:00:00.000000
+
+기존에 create_all 로 만들어진 DB 에서도 그대로 upgrade 할 수 있도록
+테이블이 이미 있으면 건너뜁니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('firebase_uid', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('display_name', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_firebase_uid', 'users', ['firebase_uid'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if not has_table('diaries'):
+        op.create_table(
+            'diaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('mood', sa.String(), nullable=False),
+            sa.Column('photo_url', sa.String(), nullable=True),
+            sa.Column('diary_date', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('llm_feedback', sa.Text(), nullable=True),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_diaries_id', 'diaries', ['id'])
+        op.create_index('ix_diaries_diary_date', 'diaries', ['diary_date'])
+        op.create_index('idx_owner_date', 'diaries', ['owner_id', 'diary_date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('diaries')
+    op.drop_table('users')
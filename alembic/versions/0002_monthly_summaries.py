@@ -0,0 +1,61 @@
+"""weekly and monthly summary tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('weekly_summaries'):
+        op.create_table(
+            'weekly_summaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('period_end', sa.Date(), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_weekly_summaries_id', 'weekly_summaries', ['id'])
+        op.create_index('idx_weekly_summary_owner_period', 'weekly_summaries', ['owner_id', 'period_start'], unique=True)
+
+    if not has_table('monthly_summaries'):
+        op.create_table(
+            'monthly_summaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Integer(), nullable=False),
+            sa.Column('source_hash', sa.String(length=64), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=False),
+            sa.Column('diary_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_monthly_summaries_id', 'monthly_summaries', ['id'])
+        op.create_index('idx_monthly_summary_owner_month', 'monthly_summaries', ['owner_id', 'year', 'month'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('monthly_summaries')
+    op.drop_table('weekly_summaries')
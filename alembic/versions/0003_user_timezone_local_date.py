@@ -0,0 +1,47 @@
+"""user timezone and diary local_date
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-20 00:20:00.000000
+
+기존 일기의 local_date 는 owner 시간대로 diary_date 를 변환해 채웁니다.
+(owner_id, local_date) 유니크 인덱스는 테이블을 잠그지 않도록 0004 에서 CONCURRENTLY 로 만듭니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('users', 'timezone'):
+        op.add_column(
+            'users',
+            sa.Column('timezone', sa.String(), server_default='Asia/Seoul', nullable=False),
+        )
+
+    if not has_column('diaries', 'local_date'):
+        op.add_column('diaries', sa.Column('local_date', sa.Date(), nullable=True))
+        op.execute(
+            """
+            UPDATE diaries AS d
+            SET local_date = (d.diary_date AT TIME ZONE u.timezone)::date
+            FROM users AS u
+            WHERE u.id = d.owner_id AND d.local_date IS NULL
+            """
+        )
+        op.alter_column('diaries', 'local_date', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('diaries', 'local_date')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,28 @@
+"""performance indexes built concurrently
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-20 00:30:00.000000
+
+CREATE INDEX CONCURRENTLY 로 만들어 배포 중에도 diaries 쓰기를 막지 않습니다.
+같은 날짜(local_date)에 중복된 기존 일기가 있으면 유니크 인덱스 생성이 실패하므로 먼저 정리해야 합니다.
+"""
+from typing import Sequence, Union
+
+from app.utils.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 하루 1개 규칙 / 날짜 조회 / 달력 조회
+    create_index_concurrently('idx_owner_local_date', 'diaries', ['owner_id', 'local_date'], unique=True)
+
+
+def downgrade() -> None:
+    drop_index_concurrently('idx_owner_local_date')
@@ -0,0 +1,136 @@
+"""range-partition diaries by local_date
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-20 01:00:00.000000
+
+기존 단일 diaries 테이블을 local_date 기준 RANGE 파티션 테이블로 옮깁니다.
+
+1. diaries 에 SHARE 잠금 (복사 중 쓰기는 대기, 읽기는 계속 가능)
+2. diaries_partitioned 생성 + 기존 데이터 범위 ~ DIARY_PARTITION_AHEAD 기간 뒤까지의 파티션과 DEFAULT 파티션 생성
+3. 데이터 복사 후 인덱스 생성
+4. 이름 교체: diaries -> diaries_unpartitioned, diaries_partitioned -> diaries
+   (대기 중이던 쓰기는 잠금이 풀리면 새 diaries 로 들어갑니다)
+
+diaries_unpartitioned 는 롤백 대비로 남겨 두며, 확인 후 직접 DROP 합니다.
+복사 시간만큼 쓰기가 막히므로 데이터가 큰 경우 트래픽이 적은 시간에 실행하세요.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+from app.utils.migrations import has_table
+from app.utils.partitions import (
+    create_default_partition_sql,
+    create_partition_sql,
+    next_period,
+    partition_ranges,
+    period_start,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = "id, content, mood, photo_url, diary_date, local_date, created_at, updated_at, llm_feedback, owner_id"
+# (이름, 컬럼, unique). 파티션 테이블의 유니크 인덱스는 파티션 키(local_date)를 포함해야 합니다.
+_PARTITIONED_INDEXES = [
+    ('ix_diaries_id', 'id', False),
+    ('ix_diaries_diary_date', 'diary_date', False),
+    ('idx_owner_date', 'owner_id, diary_date', False),
+    ('idx_owner_local_date', 'owner_id, local_date', True),
+]
+_PLAIN_INDEXES = [
+    ('ix_diaries_id', 'id', False),
+    ('ix_diaries_diary_date', 'diary_date', False),
+    ('idx_owner_date', 'owner_id, diary_date', True),
+    ('idx_owner_local_date', 'owner_id, local_date', True),
+]
+
+
+def _is_partitioned(table: str) -> bool:
+    row = op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table}
+    ).first()
+    return row is not None and row[0] == 'p'
+
+
+def _create_table_sql(name: str, partitioned: bool) -> str:
+    primary_key = "id, local_date" if partitioned else "id"
+    partition_by = " PARTITION BY RANGE (local_date)" if partitioned else ""
+    return f"""
+        CREATE TABLE {name} (
+            id integer NOT NULL DEFAULT nextval('diaries_id_seq'),
+            content text NOT NULL,
+            mood varchar NOT NULL,
+            photo_url varchar,
+            diary_date timestamptz NOT NULL,
+            local_date date NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            llm_feedback text,
+            owner_id integer NOT NULL REFERENCES users (id),
+            CONSTRAINT {name}_pkey PRIMARY KEY ({primary_key})
+        ){partition_by}
+    """
+
+
+def _copy_and_swap(old_name: str, new_name: str, indexes) -> None:
+    """new_name 테이블에 데이터를 복사하고 인덱스를 만든 뒤 diaries 와 이름을 맞바꿉니다."""
+    op.execute(f"INSERT INTO {new_name} ({_COLUMNS}) SELECT {_COLUMNS} FROM diaries")
+    for index_name, columns, unique in indexes:
+        unique_sql = "UNIQUE " if unique else ""
+        op.execute(f"CREATE {unique_sql}INDEX {index_name}_new ON {new_name} ({columns})")
+
+    # 인덱스 이름은 스키마 전역이므로 기존 것부터 비켜 줍니다. (예: idx_owner_date -> idx_owner_date_unpartitioned)
+    suffix = old_name[len('diaries_'):]
+    for index_name in [name for name, _, _ in indexes] + ['diaries_pkey']:
+        op.execute(f"ALTER INDEX IF EXISTS {index_name} RENAME TO {index_name}_{suffix}")
+    op.execute(f"ALTER TABLE diaries RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {new_name} RENAME TO diaries")
+    op.execute(f"ALTER INDEX {new_name}_pkey RENAME TO diaries_pkey")
+    for index_name, _, _ in indexes:
+        op.execute(f"ALTER INDEX {index_name}_new RENAME TO {index_name}")
+    # 이전 테이블을 지워도 id 시퀀스가 남도록 소유권을 옮김
+    op.execute("ALTER SEQUENCE diaries_id_seq OWNED BY diaries.id")
+    op.execute("ANALYZE diaries")
+
+
+def upgrade() -> None:
+    if _is_partitioned('diaries'):
+        return
+    interval = settings.DIARY_PARTITION_INTERVAL
+    op.execute("LOCK TABLE diaries IN SHARE MODE")
+    op.execute(_create_table_sql('diaries_partitioned', partitioned=True))
+
+    first_day, last_day = op.get_bind().execute(sa.text("SELECT min(local_date), max(local_date) FROM diaries")).first()
+    today = date.today()
+    last_ahead = period_start(today, interval)
+    for _ in range(settings.DIARY_PARTITION_AHEAD):
+        last_ahead = next_period(last_ahead, interval)
+    first_day = min(first_day or today, today)
+    last_day = max(last_day or today, last_ahead)
+    for name, start, end in partition_ranges(first_day, last_day, interval):
+        op.execute(create_partition_sql(name, start, end, parent='diaries_partitioned'))
+    op.execute(create_default_partition_sql(parent='diaries_partitioned'))
+
+    _copy_and_swap('diaries_unpartitioned', 'diaries_partitioned', _PARTITIONED_INDEXES)
+
+
+def downgrade() -> None:
+    if not _is_partitioned('diaries'):
+        return
+    # 롤백용으로 남겨 둔 이전 테이블은 이미 낡았으므로 현재 데이터로 다시 만듭니다.
+    if has_table('diaries_unpartitioned'):
+        op.execute("DROP TABLE diaries_unpartitioned")
+    op.execute("LOCK TABLE diaries IN SHARE MODE")
+    op.execute(_create_table_sql('diaries_plain', partitioned=False))
+    _copy_and_swap('diaries_partitioned', 'diaries_plain', _PLAIN_INDEXES)
+    # 파티션(DEFAULT 포함)은 부모와 함께 삭제됩니다.
+    op.execute("DROP TABLE diaries_partitioned")
@@ -0,0 +1,49 @@
+"""idempotency keys
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-20 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('idempotency_keys'):
+        op.create_table(
+            'idempotency_keys',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('scope', sa.String(length=32), nullable=False),
+            sa.Column('key', sa.String(length=255), nullable=False),
+            sa.Column('request_hash', sa.String(length=64), nullable=False),
+            sa.Column('status', sa.String(length=16), nullable=False),
+            sa.Column('response_status', sa.Integer(), nullable=True),
+            sa.Column('response_body', sa.Text(), nullable=True),
+            sa.Column('resource_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_idempotency_keys_id', 'idempotency_keys', ['id'])
+        op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+        op.create_index(
+            'idx_idempotency_owner_scope_key', 'idempotency_keys', ['owner_id', 'scope', 'key'], unique=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,42 @@
+"""diary tombstones and change feed index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-10-20 03:00:00.000000
+
+일기 삭제를 soft delete(deleted_at tombstone)로 바꾸고, 변경 피드(GET /diaries/changes)용
+(owner_id, updated_at, id) 인덱스와 tombstone 정리용 부분 인덱스를 만듭니다.
+컬럼 추가는 기본값이 없어 메타데이터만 바뀌고, 인덱스는 파티션별로 CONCURRENTLY 생성 후 부모에 ATTACH 합니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import create_partitioned_index_concurrently, has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('diaries', 'deleted_at'):
+        op.add_column('diaries', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    create_partitioned_index_concurrently('idx_owner_updated', 'diaries', ['owner_id', 'updated_at', 'id'])
+    # 보존 기간이 지난 tombstone 정리용 (삭제된 행만 담는 작은 인덱스)
+    create_partitioned_index_concurrently(
+        'idx_diaries_deleted_at', 'diaries', ['deleted_at'], where='deleted_at IS NOT NULL'
+    )
+
+
+def downgrade() -> None:
+    # 부모 인덱스를 지우면 파티션 인덱스도 함께 지워집니다 (파티션 인덱스는 CONCURRENTLY 로 지울 수 없음)
+    op.execute("DROP INDEX IF EXISTS idx_diaries_deleted_at")
+    op.execute("DROP INDEX IF EXISTS idx_owner_updated")
+    # 남아 있던 tombstone 은 실제로 삭제
+    op.execute("DELETE FROM diaries WHERE deleted_at IS NOT NULL")
+    op.drop_column('diaries', 'deleted_at')
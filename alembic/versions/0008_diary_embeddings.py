@@ -0,0 +1,42 @@
+"""diary embeddings
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-10-20 04:00:00.000000
+
+비슷한 일기 검색용 임베딩 테이블. 기존 일기는 python -m app.utils.embeddings backfill 로 채웁니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('diary_embeddings'):
+        op.create_table(
+            'diary_embeddings',
+            sa.Column('diary_id', sa.Integer(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('model', sa.String(length=128), nullable=False),
+            sa.Column('dimensions', sa.Integer(), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('vector', sa.LargeBinary(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('diary_id'),
+        )
+        op.create_index('idx_diary_embedding_owner_model', 'diary_embeddings', ['owner_id', 'model'])
+
+
+def downgrade() -> None:
+    op.drop_table('diary_embeddings')
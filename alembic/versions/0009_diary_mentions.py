@@ -0,0 +1,45 @@
+"""diary ticker mentions
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-10-20 05:00:00.000000
+
+일기 본문의 종목 언급 인덱스. 기존 일기는 python -m app.utils.ticker_matcher backfill 로 채웁니다.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('diary_mentions'):
+        op.create_table(
+            'diary_mentions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('diary_id', sa.Integer(), nullable=False),
+            sa.Column('local_date', sa.Date(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('symbol', sa.String(length=16), nullable=False),
+            sa.Column('mention_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_diary_mentions_id', 'diary_mentions', ['id'])
+        op.create_index('idx_diary_mention_diary_symbol', 'diary_mentions', ['diary_id', 'symbol'], unique=True)
+        op.create_index(
+            'idx_diary_mention_owner_symbol_date', 'diary_mentions', ['owner_id', 'symbol', 'local_date']
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('diary_mentions')
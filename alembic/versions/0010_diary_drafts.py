@@ -0,0 +1,42 @@
+"""diary drafts
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-10-20 06:00:00.000000
+
+자동 저장 초안 테이블 (사용자/날짜당 하나, app/utils/drafts.py 가 모아서 upsert).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('diary_drafts'):
+        op.create_table(
+            'diary_drafts',
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('local_date', sa.Date(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('mood', sa.String(), nullable=True),
+            sa.Column('photo_url', sa.String(), nullable=True),
+            sa.Column('diary_date', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('saved_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('owner_id', 'local_date'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('diary_drafts')
@@ -1,40 +1,227 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Request
-from fastapi.responses import StreamingResponse
+import calendar
+from functools import partial
+
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Body, Request, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import ValidationError
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timezone
 from app import crud, models, schemas
 from app.deps import get_current_user, get_db
 from app.utils.s3_utils import s3_utils
 from app.config import settings
-from app.utils.openai_client import create_diary_feedback_stream
+from app.utils.monthly_summary import get_or_create_monthly_summary
+from app.utils.admission import AdmissionRejected
+from app.utils.drafts import draft_buffer
+from app.utils.feedback_streams import Subscription, attach_generation, replay_completed
+from app.utils import diary_sync, embeddings, idempotency, tracing
+from app.utils.metrics import sse_active_streams
+from app.utils.sse import iter_sse_frames
+from app.utils.ticker_matcher import get_matcher
+from app.utils.timezones import to_local_date
 
 
 router = APIRouter()
 
+FIELDS_DESCRIPTION = "반환할 필드 (콤마 구분, 예: id,local_date,mood). 생략하면 전체 필드와 owner 를 반환"
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """fields 쿼리 파라미터를 검증해 필드 목록으로 변환합니다. id 는 항상 포함됩니다."""
+    if fields is None:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in schemas.DIARY_SPARSE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"알 수 없는 필드입니다: {', '.join(unknown)} (가능: {', '.join(schemas.DIARY_SPARSE_FIELDS)})"
+        )
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+
+def _sparse_content(diaries, fields: List[str]):
+    schema = schemas.sparse_diary_schema(tuple(fields))
+    return [schema.model_validate(diary).model_dump(mode="json") for diary in diaries]
+
+
+IDEMPOTENCY_KEY_DESCRIPTION = "재시도 시 같은 값을 보내면 작업을 다시 하지 않고 처음 결과를 돌려받습니다."
+
+
+def _begin_idempotent(db: Session, owner_id: int, scope: str, key: str, payload):
+    try:
+        return idempotency.begin(db, owner_id=owner_id, scope=scope, key=key, payload=payload)
+    except idempotency.IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
 
 @router.post("/", response_model=schemas.Diary)
 def create_diary(
     diary: schemas.DiaryCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER, description=IDEMPOTENCY_KEY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
     새 일기를 생성합니다.
     diary_date는 사용자가 의도한 작성 시간(UTC)으로 전달되어야 합니다.
-    하루에 하나씩만 작성할 수 있습니다.
+    사용자 시간대 기준으로 하루에 하나씩만 작성할 수 있습니다.
+    Idempotency-Key 를 보내면 같은 키의 재요청에는 처음 만든 일기 응답을 그대로 돌려줍니다.
     """
     print(f"일기 생성 요청: 사용자={current_user.id}, 날짜={diary.diary_date}")
+    record = None
+    if idempotency_key is not None:
+        record, created = _begin_idempotent(
+            db, current_user.id, idempotency.SCOPE_DIARY_CREATE, idempotency_key, diary.model_dump(mode="json")
+        )
+        if not created:
+            if record.status != "completed":
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="같은 요청이 처리 중입니다.")
+            print(f"일기 생성 재요청: 저장된 응답 반환 (ID={record.resource_id})")
+            return JSONResponse(
+                status_code=record.response_status,
+                content=idempotency.stored_body(record),
+                headers={idempotency.REPLAYED_HEADER: "true"}
+            )
+
     try:
-        result = crud.create_diary(db=db, diary=diary, owner_id=current_user.id)
-        print(f"일기 생성 완료: ID={result.id}")
-        return result
+        # 키가 있으면 일기와 저장할 응답을 한 트랜잭션으로 커밋
+        result = crud.create_diary(
+            db=db, diary=diary, owner_id=current_user.id, timezone_name=current_user.timezone,
+            commit=record is None
+        )
     except ValueError as e:
         print(f"일기 생성 실패: {e}")
+        if record is not None:
+            db.rollback()
+            idempotency.discard(db, record)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    # 비슷한 일기 검색용 임베딩은 응답 후 계산, 같은 날짜의 자동 저장 초안은 더 필요 없으므로 지움
+    background_tasks.add_task(embeddings.index_diary, result.id, current_user.id)
+    background_tasks.add_task(draft_buffer.discard, current_user.id, result.local_date)
+    if record is not None:
+        response = schemas.Diary.model_validate(result).model_dump(mode="json")
+        idempotency.complete(db, record, status_code=status.HTTP_200_OK, body=response, resource_id=result.id)
+        print(f"일기 생성 완료: ID={result.id}")
+        return response
+    print(f"일기 생성 완료: ID={result.id}")
+    return result
+
+
+def _validate_batch_data(schema, data):
+    try:
+        return schema.model_validate(data or {})
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=jsonable_encoder(e.errors()))
+
+
+def _run_batch_operation(
+    db: Session, operation: schemas.BatchOperation, current_user: models.User
+) -> Tuple[int, Optional[models.Diary]]:
+    """배치 작업 하나를 실행합니다. 실패는 HTTPException 으로 알리고, 커밋은 호출 측에서 합니다."""
+    if operation.op == "create":
+        diary_create = _validate_batch_data(schemas.DiaryCreate, operation.data)
+        try:
+            diary = crud.create_diary(
+                db=db, diary=diary_create, owner_id=current_user.id,
+                timezone_name=current_user.timezone, commit=False
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return status.HTTP_201_CREATED, diary
+
+    if operation.diary_id is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="diary_id 가 필요합니다.")
+
+    if operation.op == "get":
+        diary = crud.get_diary(db=db, diary_id=operation.diary_id, owner_id=current_user.id)
+    elif operation.op == "update":
+        diary_update = _validate_batch_data(schemas.DiaryUpdate, operation.data)
+        diary = crud.update_diary(
+            db=db, diary_id=operation.diary_id, diary_update=diary_update,
+            owner_id=current_user.id, commit=False
+        )
+    else:
+        if crud.delete_diary(db=db, diary_id=operation.diary_id, owner_id=current_user.id, commit=False):
+            return status.HTTP_200_OK, None
+        diary = None
+    if diary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="일기를 찾을 수 없습니다.")
+    return status.HTTP_200_OK, diary
+
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+def run_batch(
+    batch: schemas.BatchRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    여러 일기 작업(create / update / delete / get)을 순서대로 하나의 트랜잭션에서 실행합니다.
+    오프라인 편집을 한 번의 요청(인증 1회, 커밋 1회)으로 반영할 때 사용합니다.
+
+    - atomic=true: 하나라도 실패하면 전체를 롤백하고 400 으로 작업별 결과를 반환합니다.
+    - atomic=false: 작업마다 savepoint 를 두어 실패한 작업만 되돌리고 나머지는 커밋합니다.
+    """
+    results: List[schemas.BatchOperationResult] = []
+    failed = False
+    for index, operation in enumerate(batch.operations):
+        if failed and batch.atomic:
+            results.append(schemas.BatchOperationResult(
+                index=index, op=operation.op, status=status.HTTP_424_FAILED_DEPENDENCY,
+                detail="앞선 작업이 실패해 실행하지 않았습니다."
+            ))
+            continue
+        try:
+            if batch.atomic:
+                status_code, diary = _run_batch_operation(db, operation, current_user)
+            else:
+                with db.begin_nested():
+                    status_code, diary = _run_batch_operation(db, operation, current_user)
+        except HTTPException as e:
+            failed = True
+            results.append(schemas.BatchOperationResult(
+                index=index, op=operation.op, status=e.status_code, detail=e.detail
+            ))
+            continue
+        results.append(schemas.BatchOperationResult(
+            index=index, op=operation.op, status=status_code,
+            diary=schemas.Diary.model_validate(diary) if diary is not None else None
+        ))
+
+    committed = not (batch.atomic and failed)
+    print(f"일기 배치 요청: 사용자={current_user.id}, 작업 {len(batch.operations)}개, "
+          f"atomic={batch.atomic}, 커밋={'예' if committed else '아니오(롤백)'}")
+    if committed:
+        db.commit()
+        for operation, result in zip(batch.operations, results):
+            if result.status >= 400 or operation.op == "get":
+                continue
+            if operation.op == "delete":
+                embeddings.forget_diary(operation.diary_id, current_user.id)
+            else:
+                background_tasks.add_task(embeddings.index_diary, result.diary.id, current_user.id)
+            if operation.op == "create":
+                # POST /diaries/ 와 같이 그 날짜의 자동 저장 초안은 지움 (나중에 확정하면 새 일기를 덮어씀)
+                background_tasks.add_task(draft_buffer.discard, current_user.id, result.diary.local_date)
+        return schemas.BatchResponse(atomic=batch.atomic, committed=True, results=results)
+
+    db.rollback()
+    for result in results:
+        if result.status < 400:
+            result.diary = None
+            result.detail = "롤백되었습니다."
+    response = schemas.BatchResponse(atomic=batch.atomic, committed=False, results=results)
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=response.model_dump(mode="json"))
 
 
 @router.get("/", response_model=List[schemas.Diary])
@@ -43,6 +230,7 @@ def get_diaries(
     limit: int = Query(100, ge=1, le=1000),
     start_date: Optional[datetime] = Query(None, description="시작 날짜 (UTC)"),
     end_date: Optional[datetime] = Query(None, description="종료 날짜 (UTC)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -50,36 +238,233 @@ def get_diaries(
     로그인된 사용자의 모든 일기를 조회합니다.
     날짜 범위로 필터링할 수 있습니다.
     모든 날짜는 UTC 기준으로 처리됩니다.
+    fields 를 주면 해당 컬럼만 조회/반환합니다 (content, llm_feedback 같은 큰 컬럼을 건너뛸 때).
     """
+    field_list = _parse_fields(fields)
     diaries = crud.get_diaries(
         db=db, 
         owner_id=current_user.id, 
         skip=skip, 
         limit=limit,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        fields=field_list
     )
+    if field_list:
+        return JSONResponse(content=_sparse_content(diaries, field_list))
     return diaries
 
 
+@router.get("/changes", response_model=schemas.DiaryChanges)
+def get_diary_changes(
+    since: Optional[str] = Query(None, description="이전 응답의 next_token (없으면 전체 동기화)"),
+    limit: int = Query(200, ge=1, le=schemas.DIARY_CHANGES_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    since 이후 생성/수정된 일기와 삭제된 일기 id 를 반환합니다 (클라이언트 캐시 증분 동기화).
+    has_more 가 true 면 next_token 으로 바로 이어서 요청하고, 410 이면 since 없이 처음부터 동기화합니다.
+    """
+    try:
+        return diary_sync.get_changes(db, owner_id=current_user.id, since=since, limit=limit)
+    except (diary_sync.SyncTokenInvalid, diary_sync.SyncTokenExpired) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.get("/drafts", response_model=schemas.DiaryDraft)
+def get_draft(
+    local_date: Optional[date] = Query(None, description="초안 날짜 (사용자 시간대 기준, 없으면 오늘)"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    자동 저장된 초안을 반환합니다 (아직 DB 에 저장되지 않은 최신 변경 포함).
+    """
+    if local_date is None:
+        local_date = to_local_date(datetime.now(timezone.utc), current_user.timezone)
+    draft = draft_buffer.get(db, owner_id=current_user.id, local_date=local_date)
+    if draft is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="저장된 초안이 없습니다."
+        )
+    return draft
+
+
+@router.patch("/drafts", response_model=schemas.DiaryDraft)
+def save_draft(
+    draft_update: schemas.DiaryDraftUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    초안을 자동 저장합니다. 보낸 필드만 바뀌며, 같은 날짜의 초안은 최신 것만 남습니다.
+    그 날짜에 일기가 있으면 첫 초안은 일기 내용에서 시작합니다.
+    DB 에는 바로 쓰지 않고 모아서 주기적으로 저장하므로 자주 불러도 됩니다.
+    """
+    diary_date = draft_update.diary_date or datetime.now(timezone.utc)
+    local_date = to_local_date(diary_date, current_user.timezone)
+    changes = draft_update.model_dump(exclude_unset=True)
+    changes["diary_date"] = diary_date
+    return draft_buffer.patch(db, owner_id=current_user.id, local_date=local_date, changes=changes)
+
+
+@router.post("/drafts/finalize", response_model=schemas.Diary)
+def finalize_draft(
+    body: schemas.DiaryDraftFinalize,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    초안을 일기로 확정합니다. 그 날짜에 일기가 있으면 초안 내용으로 수정하고, 없으면 새로 만든 뒤 초안을 지웁니다.
+    일기가 있는 날짜의 초안은 그 일기 내용에서 시작하므로 초안에서 바꾸지 않은 필드는 그대로 남습니다.
+    """
+    # 다른 워커가 더 새로운 초안을 저장했을 수 있으므로 DB 를 다시 읽어 saved_at 이 새로운 쪽을 확정
+    draft = draft_buffer.get(db, owner_id=current_user.id, local_date=body.local_date, fresh=True)
+    if draft is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="저장된 초안이 없습니다."
+        )
+    if not draft.mood:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="감정을 선택한 뒤 확정할 수 있습니다."
+        )
+
+    existing = crud.get_diary_by_date(db, owner_id=current_user.id, date=body.local_date)
+    if existing is not None:
+        diary = crud.update_diary(
+            db=db,
+            diary_id=existing.id,
+            diary_update=schemas.DiaryUpdate(content=draft.content, mood=draft.mood, photo_url=draft.photo_url),
+            owner_id=current_user.id
+        )
+    else:
+        try:
+            diary = crud.create_diary(
+                db=db,
+                diary=schemas.DiaryCreate(
+                    content=draft.content, mood=draft.mood, diary_date=draft.diary_date, photo_url=draft.photo_url
+                ),
+                owner_id=current_user.id,
+                timezone_name=current_user.timezone
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    draft_buffer.discard(current_user.id, body.local_date)
+    background_tasks.add_task(embeddings.index_diary, diary.id, current_user.id)
+    print(f"초안 확정 완료: 사용자={current_user.id}, 날짜={body.local_date}, ID={diary.id}")
+    return diary
+
+
+@router.get("/mentions", response_model=List[schemas.TickerMentionCount])
+def get_mention_counts(
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    일기에서 언급한 종목별 언급 일기 수/횟수를 많이 언급한 순으로 반환합니다.
+    """
+    matcher = get_matcher()
+    rows = crud.get_mention_counts(db, owner_id=current_user.id, limit=limit)
+    counts = []
+    for row in rows:
+        ticker = matcher.tickers.get(row.symbol)
+        counts.append(schemas.TickerMentionCount(
+            symbol=row.symbol,
+            # 사전에서 빠진 종목은 backfill 전까지 symbol 만 보여줌
+            name=ticker.name if ticker else row.symbol,
+            market=ticker.market if ticker else "",
+            diary_count=row.diary_count,
+            mention_count=row.mention_count,
+            last_mentioned=row.last_mentioned,
+        ))
+    return counts
+
+
+@router.get("/mentions/{symbol}", response_model=List[schemas.Diary])
+def get_diaries_mentioning(
+    symbol: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    종목을 언급한 일기를 최신순으로 반환합니다.
+    symbol 에는 티커(AAPL, 005930)나 회사명/별칭(삼성전자, 엔비디아)을 쓸 수 있습니다.
+    """
+    ticker = get_matcher().resolve(symbol)
+    if ticker is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="종목 사전에 없는 종목입니다."
+        )
+    return crud.get_diaries_mentioning(
+        db, owner_id=current_user.id, symbol=ticker.symbol, skip=skip, limit=limit
+    )
+
+
+@router.get("/calendar", response_model=List[schemas.CalendarDay])
+def get_calendar(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    달력 표시용으로 해당 월(사용자 시간대 기준)의 날짜별 일기 id와 감정을 반환합니다.
+    """
+    start_date = date(year, month, 1)
+    end_date = date(year, month, calendar.monthrange(year, month)[1])
+    rows = crud.get_calendar_days(db, owner_id=current_user.id, start_date=start_date, end_date=end_date)
+    return [schemas.CalendarDay(local_date=row.local_date, diary_id=row.id, mood=row.mood) for row in rows]
+
 
+@router.get("/summary/monthly", response_model=schemas.MonthlySummary)
+def get_monthly_summary(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    해당 월의 일기를 회고하는 월간 요약을 반환합니다.
+    주(7일 구간)별 부분 요약을 캐시하므로, 일기가 바뀐 구간만 다시 요약합니다.
+    """
+    summary = get_or_create_monthly_summary(db, owner_id=current_user.id, year=year, month=month)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="해당 월에 작성된 일기가 없습니다."
+        )
+    return summary
 
 
 @router.get("/{diary_id}", response_model=schemas.Diary)
 def get_diary(
     diary_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
     특정 일기를 조회합니다.
+    fields 를 주면 해당 컬럼만 조회/반환합니다.
     """
-    diary = crud.get_diary(db=db, diary_id=diary_id, owner_id=current_user.id)
+    field_list = _parse_fields(fields)
+    diary = crud.get_diary(db=db, diary_id=diary_id, owner_id=current_user.id, fields=field_list)
     if diary is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일기를 찾을 수 없습니다."
         )
+    if field_list:
+        return JSONResponse(content=_sparse_content([diary], field_list)[0])
     return diary
 
 
@@ -88,6 +473,7 @@ def get_diary(
 def update_diary(
     diary_id: int,
     diary_update: schemas.DiaryUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -105,6 +491,7 @@ def update_diary(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일기를 찾을 수 없습니다."
         )
+    background_tasks.add_task(embeddings.index_diary, diary.id, current_user.id)
     return diary
 
 
@@ -123,19 +510,60 @@ def delete_diary(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="일기를 찾을 수 없습니다."
         )
+    embeddings.forget_diary(diary_id, current_user.id)
     return {"message": "일기가 성공적으로 삭제되었습니다."}
 
 
+@router.get("/{diary_id}/similar", response_model=List[schemas.SimilarDiary])
+def get_similar_diaries(
+    diary_id: int,
+    k: int = Query(5, ge=1, le=schemas.SIMILAR_DIARIES_MAX_K),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    이 일기와 내용/감정이 비슷한 과거 일기를 유사도 순으로 최대 k 개 반환합니다.
+    """
+    diary = crud.get_diary(db=db, diary_id=diary_id, owner_id=current_user.id)
+    if diary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="일기를 찾을 수 없습니다."
+        )
+    try:
+        matches = embeddings.find_similar(db, diary, k)
+    except embeddings.EmbeddingUnavailable as e:
+        print(f"비슷한 일기 검색 실패: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="비슷한 일기를 지금 찾을 수 없습니다. 잠시 후 다시 시도해주세요."
+        )
+    # 다른 워커에서 지운 일기가 인덱스에 남아 있을 수 있으므로 조회되는 것만 반환
+    diaries = crud.get_diaries_by_ids(db, owner_id=current_user.id, diary_ids=[match_id for match_id, _ in matches])
+    return [
+        schemas.SimilarDiary(similarity=round(score, 4), diary=schemas.DiaryInDB.model_validate(diaries[match_id]))
+        for match_id, score in matches
+        if match_id in diaries
+    ]
+
+
 @router.get("/{diary_id}/ai-feedback")
 def get_ai_feedback(
     diary_id: int,
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER, description=IDEMPOTENCY_KEY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
     특정 일기 내용으로 AI 피드백을 요청하고 SSE로 스트리밍 전송합니다.
     스트림 완료 후 최종 피드백을 DB에 저장합니다.
+
+    같은 일기에 진행 중인 생성이 있으면 새로 생성하지 않고 그 생성에 붙습니다.
+    각 청크에는 SSE id 가 붙으며, 재연결 시 Last-Event-ID 이후부터 이어서 전송합니다.
+    클라이언트 연결이 끊기면 구독을 해제하고, 남은 구독자가 없으면 업스트림 생성을 취소합니다.
+    새 생성은 사용자별 입장 제어(토큰 버킷 + 공정 대기열)를 거치며, 한도를 넘으면 429 와 Retry-After 를 반환합니다.
+    Idempotency-Key 를 보내면 같은 키의 재요청은 새로 생성하지 않고, 끝난 결과를 재생하거나 진행 중인 생성에 붙습니다.
     """
     diary = crud.get_diary(db=db, diary_id=diary_id, owner_id=current_user.id)
     if diary is None:
@@ -144,42 +572,81 @@ def get_ai_feedback(
             detail="일기를 찾을 수 없습니다."
         )
 
-    def sse_event_generator():
-        final_text_parts: List[str] = []
+    last_event_id = request.headers.get("last-event-id")
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    record, key_created = None, False
+    if idempotency_key is not None:
+        record, key_created = _begin_idempotent(
+            db, current_user.id, idempotency.SCOPE_AI_FEEDBACK, idempotency_key, {"diary_id": diary.id}
+        )
+
+    position = None
+    if record is not None and not key_created and record.status == "completed":
+        generation, position = replay_completed(diary.id, idempotency.stored_body(record)["feedback"], resume_from)
+        started = False
+    else:
         try:
-            # 초기 플러시용 이벤트 (브라우저/프록시 버퍼 방지)
-            with create_diary_feedback_stream(
+            generation, started = attach_generation(
+                diary_id=diary.id,
                 content=diary.content,
                 mood=diary.mood,
                 photo_url=diary.photo_url,
-                username=current_user.display_name or "My son"
-            ) as stream:
-                for event in stream:
-                    if event.type == "response.output_text.delta":
-                        chunk = event.delta
-                        if chunk:
-                            final_text_parts.append(chunk)
-                            # SSE 스펙상 각 줄은 반드시 'data:' 접두사를 가져야 함
-                            # 청크 내부 개행을 모두 보존하도록 각 줄에 접두사를 붙여 전송
-                            formatted = str(chunk).replace("\r\n", "\n").replace("\n", "\ndata: ")
-                            yield f"data: {formatted}\n\n"
-                    elif event.type == "response.error":
-                        # 에러 발생 시 프론트로 에러 이벤트 전송
-                        yield f"event: error\ndata: {event.error.get('message', 'OpenAI error')}\n\n"
-                # 스트림 종료 시
-                stream.close()
-
-            final_text = "".join(final_text_parts).strip()
-            if final_text:
-                # DB 업데이트 및 커밋
-                diary.llm_feedback = final_text
-                db.add(diary)
-                db.commit()
-            # 종료 신호
-            yield "event: done\ndata: [DONE]\n\n"
-        except Exception as e:
-            # 서버 내부 에러
-            yield f"event: error\ndata: {str(e)}\n\n"
+                username=current_user.display_name or "My son",
+                user_id=current_user.id,
+                # 처리 중인 키의 재요청은 방금 끝난 생성도 다시 만들지 않고 재생
+                resuming=resume_from > 0 or (record is not None and not key_created),
+            )
+        except AdmissionRejected as e:
+            print(f"⏳ AI 피드백 입장 거절: 사용자={current_user.id}, {e.reason} (Retry-After={e.retry_after_header}s)")
+            if key_created:
+                idempotency.discard(db, record)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=e.reason,
+                headers={"Retry-After": e.retry_after_header}
+            )
+        # 이 요청이 키를 등록했거나(처음 요청) 다른 워커에서 멈춘 키를 이어받아 새로 생성한 경우 결과를 키에 기록
+        if record is not None and (key_created or started):
+            generation.add_done_callback(partial(idempotency.finish_feedback_key, record.id))
+    subscription = Subscription(generation)
+
+    # 새로 시작된 생성이면 이전 이벤트 id 는 의미가 없으므로 처음부터 전송
+    if position is None:
+        position = 0 if started else min(resume_from, len(generation.chunks))
+    print(f"🤖 AI 피드백 스트림: diary={diary.id}, 새 생성={started}, 재개 위치={position}")
+    frames = iter_sse_frames(
+        generation,
+        position,
+        window_seconds=settings.SSE_COALESCE_WINDOW_MS / 1000,
+        max_bytes=settings.SSE_COALESCE_MAX_BYTES,
+        heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+    )
+
+    # 스트림은 응답 헤더가 나간 뒤에 흐르므로 요청 span 을 부모로 넘겨 같은 trace 에 기록
+    trace_parent = tracing.current_span()
+
+    async def sse_event_generator():
+        # 프레임 대기는 스레드에서 하되, 연결이 끊기면(is_disconnected 또는 send 실패로 인한 취소)
+        # 대기 중인 스레드를 기다리지 않고 바로 구독을 해제합니다.
+        with tracing.child_span(trace_parent, "sse.stream", diary_id=diary_id, new_generation=started) as stream_span:
+            frame_count = 0
+            sse_active_streams.inc()
+            try:
+                while True:
+                    if await request.is_disconnected():
+                        print(f"🔌 SSE 클라이언트 연결 끊김: diary={diary_id}")
+                        stream_span.set_attribute("disconnected", True)
+                        break
+                    frame = await anyio.to_thread.run_sync(next, frames, None, cancellable=True)
+                    if frame is None:
+                        break
+                    frame_count += 1
+                    yield frame
+            finally:
+                stream_span.set_attribute("frames", frame_count)
+                sse_active_streams.dec()
+                subscription.release()
 
     # 요청 Origin에 맞춰 CORS 허용 헤더 부여 (SSE에서 명시적 설정)
     origin = request.headers.get("origin")
@@ -198,7 +665,13 @@ def get_ai_feedback(
         "Access-Control-Allow-Credentials": "true",
     }
 
-    return StreamingResponse(sse_event_generator(), media_type="text/event-stream", headers=headers)
+    # 본문 전송 전에 연결이 끊기면 제너레이터가 시작되지 않으므로 background 에서도 구독을 해제 (한 번만 적용됨)
+    return StreamingResponse(
+        sse_event_generator(),
+        media_type="text/event-stream",
+        headers=headers,
+        background=BackgroundTask(subscription.release),
+    )
 
 
 @router.post("/images/presigned-url")
@@ -14,3 +14,16 @@ def read_users_me(current_user: models.User = Depends(get_current_user)):
     현재 로그인된 사용자의 정보를 반환합니다.
     """
     return current_user
+
+
+@router.patch("/me/timezone", response_model=schemas.User)
+def update_my_timezone(
+    payload: schemas.UserTimezoneUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    사용자 시간대를 변경합니다.
+    이후 작성하는 일기의 날짜(local_date)가 이 시간대 기준으로 계산됩니다.
+    """
+    return crud.update_user_timezone(db, user=current_user, timezone_name=payload.timezone)
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.config import settings
 from app.database import get_db
+from app.utils import tracing
 
 # JWT 토큰 생성 및 검증을 위한 클래스 (Firebase 토큰과 구분하기 위해 유지)
 class AuthManager:
@@ -59,7 +60,8 @@ def verify_firebase_token(token: str) -> dict:
     Firebase ID 토큰을 검증하고 사용자 정보를 반환합니다.
     """
     try:
-        decoded_token = firebase_auth.verify_id_token(token)
+        with tracing.span("firebase.verify_id_token"):
+            decoded_token = firebase_auth.verify_id_token(token)
         return decoded_token
     except Exception as e:
         raise HTTPException(
@@ -111,7 +113,9 @@ def get_current_user(
             )
         
         # Firebase UID로 사용자 조회, 없으면 자동 생성
-        user = crud.get_user_by_firebase_uid(db, firebase_uid)
+        with tracing.span("auth.user_lookup"):
+            user = crud.get_user_by_firebase_uid(db, firebase_uid)
+        tracing.set_attribute("user_id", user.id if user else None)
         if user is None:
             email = firebase_payload.get("email")
             display_name = firebase_payload.get("name") or firebase_payload.get("displayName")
@@ -44,6 +44,13 @@ class Settings:
 
 
 
+    # 사용자 시간대 기본값 (일기 local_date 계산 기준)
+    DEFAULT_TIMEZONE: str = os.getenv("DEFAULT_TIMEZONE", "Asia/Seoul")
+
+    # diaries 범위 파티션 (local_date 기준, "year" | "quarter") 과 미리 만들어 둘 미래 파티션 수
+    DIARY_PARTITION_INTERVAL: str = os.getenv("DIARY_PARTITION_INTERVAL", "year")
+    DIARY_PARTITION_AHEAD: int = int(os.getenv("DIARY_PARTITION_AHEAD", "2"))
+
     # Cookie settings
     COOKIE_DOMAIN: str | None = os.getenv("COOKIE_DOMAIN") or None
     COOKIE_SECURE: bool = True
@@ -62,6 +69,77 @@ class Settings:
 
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+    # OpenAI 호환 API 주소 (비우면 기본 주소). 부하 테스트 때 benchmarks/fake_openai_server.py 를 가리킴
+    OPENAI_BASE_URL: str | None = os.getenv("OPENAI_BASE_URL") or None
+    # 피드백 모델 선택 테이블: "최대 입력 토큰:모델" 을 콤마로 나열 (입력이 모두 초과하면 마지막 모델)
+    FEEDBACK_MODEL_TABLE: str = os.getenv("FEEDBACK_MODEL_TABLE", "8000:gpt-5-nano-2025-08-07")
+    # 끝난 피드백 생성 버퍼를 재연결(Last-Event-ID) 용으로 보존하는 시간(초)
+    FEEDBACK_STREAM_RETENTION_SECONDS: float = float(os.getenv("FEEDBACK_STREAM_RETENTION_SECONDS", "60"))
+    # 피드백 구독자가 모두 끊긴 뒤 재연결을 기다렸다가 업스트림을 취소하기까지의 유예(초, 0이면 즉시)
+    FEEDBACK_DISCONNECT_GRACE_SECONDS: float = float(os.getenv("FEEDBACK_DISCONNECT_GRACE_SECONDS", "3"))
+    # 연결이 끊겨 중단된 생성의 부분 텍스트를 llm_feedback 에 저장할지 여부
+    FEEDBACK_SAVE_PARTIAL_ON_DISCONNECT: bool = os.getenv("FEEDBACK_SAVE_PARTIAL_ON_DISCONNECT", "false").lower() in ("1", "true", "yes")
+    # SSE delta 병합: 첫 delta 이후 이 시간(ms)이 지나거나 max bytes 를 넘으면 한 프레임으로 전송 (0이면 병합 안 함)
+    SSE_COALESCE_WINDOW_MS: float = float(os.getenv("SSE_COALESCE_WINDOW_MS", "50"))
+    SSE_COALESCE_MAX_BYTES: int = int(os.getenv("SSE_COALESCE_MAX_BYTES", "1024"))
+    # 업스트림이 멈춘 동안 프록시가 연결을 끊지 않도록 보내는 주석 하트비트 간격(초, 0이면 비활성)
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    # 일기 본문에 허용하는 최대 토큰 (넘치면 공백 정리 후 가운데를 잘라냄)
+    FEEDBACK_MAX_CONTENT_TOKENS: int = int(os.getenv("FEEDBACK_MAX_CONTENT_TOKENS", "4000"))
+    # 입장 제어: 워커당 동시 업스트림 생성 수, 사용자별 토큰 버킷(분당 충전량/최대 적립), 사용자별 대기열 길이
+    FEEDBACK_MAX_CONCURRENCY: int = int(os.getenv("FEEDBACK_MAX_CONCURRENCY", "8"))
+    FEEDBACK_USER_RATE_PER_MINUTE: float = float(os.getenv("FEEDBACK_USER_RATE_PER_MINUTE", "6"))
+    FEEDBACK_USER_BURST: int = int(os.getenv("FEEDBACK_USER_BURST", "3"))
+    FEEDBACK_USER_QUEUE_LIMIT: int = int(os.getenv("FEEDBACK_USER_QUEUE_LIMIT", "2"))
+    # 대기열에서 자리를 기다리는 최대 시간(초). 넘으면 생성 실패로 끝냄
+    FEEDBACK_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("FEEDBACK_QUEUE_TIMEOUT_SECONDS", "60"))
+    # 공정 분배 가중치: "사용자id:가중치" 를 콤마로 나열 (기본 1)
+    FEEDBACK_USER_WEIGHTS: str = os.getenv("FEEDBACK_USER_WEIGHTS", "")
+
+    # 비슷한 일기 검색: 임베딩 제공자 ("openai" | "hashing": 외부 호출 없는 결정적 로컬 임베딩, 개발/테스트용), 모델, 차원,
+    # 메모리에 올려 둘 사용자 인덱스 수, 다른 워커의 변경을 반영하도록 사용자 인덱스를 다시 읽는 주기(초)
+    EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_DIMENSIONS: int = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+    EMBEDDING_INDEX_MAX_USERS: int = int(os.getenv("EMBEDDING_INDEX_MAX_USERS", "1000"))
+    EMBEDDING_INDEX_TTL_SECONDS: float = float(os.getenv("EMBEDDING_INDEX_TTL_SECONDS", "300"))
+
+    # 종목 언급 추출에 쓰는 종목 사전 (CSV: symbol,market,name,aliases — 별칭은 | 로 구분)
+    TICKER_DICTIONARY_PATH: str = os.getenv(
+        "TICKER_DICTIONARY_PATH", os.path.join(os.path.dirname(__file__), "data", "tickers.csv")
+    )
+
+    # 초안 자동 저장(PATCH /diaries/drafts): 버퍼의 변경을 DB 에 모아 저장하는 주기(초), 한 문장에 upsert 할 최대 행 수,
+    # 저장된 초안을 메모리에 남겨 둘 시간(초), 저장 대기 중인 초안이 이만큼 쌓이면 주기를 기다리지 않고 저장
+    DRAFT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("DRAFT_FLUSH_INTERVAL_SECONDS", "5"))
+    DRAFT_FLUSH_BATCH_SIZE: int = int(os.getenv("DRAFT_FLUSH_BATCH_SIZE", "500"))
+    DRAFT_BUFFER_IDLE_SECONDS: float = float(os.getenv("DRAFT_BUFFER_IDLE_SECONDS", "300"))
+    DRAFT_FLUSH_MAX_PENDING: int = int(os.getenv("DRAFT_FLUSH_MAX_PENDING", "1000"))
+
+    # Idempotency-Key: 저장된 응답 보존 시간(초), 처리 중 상태가 이보다 오래되면 중단된 것으로 보고 다시 처리,
+    # 만료된 키 정리(python -m app.utils.idempotency purge) 한 번에 지우는 행 수
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS: int = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS", "300"))
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = int(os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "1000"))
+
+    # 변경 피드(/diaries/changes): 아직 커밋되지 않은 트랜잭션의 updated_at 을 놓치지 않도록 최근 몇 초는 다음 동기화로 미룸,
+    # 삭제 tombstone 보존 일수 (이보다 오래된 since 토큰은 410 으로 전체 동기화 요구),
+    # tombstone 정리(python -m app.utils.diary_sync purge) 한 번에 지우는 행 수
+    DIARY_SYNC_SAFETY_LAG_SECONDS: float = float(os.getenv("DIARY_SYNC_SAFETY_LAG_SECONDS", "5"))
+    DIARY_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("DIARY_TOMBSTONE_RETENTION_DAYS", "30"))
+    DIARY_TOMBSTONE_PURGE_BATCH_SIZE: int = int(os.getenv("DIARY_TOMBSTONE_PURGE_BATCH_SIZE", "1000"))
+
+    # Debug / 계측
+    # DEBUG=true 이면 응답에 Server-Timing, X-DB-Queries 헤더를 추가
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    # 이 시간(ms)보다 오래 걸린 쿼리는 파라미터를 가린 채 로그로 남김 (0이면 비활성)
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    # 트레이싱: "none" | "console" | "file" (file 은 TRACING_FILE_PATH 에 JSON Lines), 루트 span 샘플링 비율
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")
+    TRACING_FILE_PATH: str = os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+    TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    # /metrics 접근 토큰 (설정하면 Authorization: Bearer <토큰> 필요, 비우면 공개)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
 
 
 settings = Settings()
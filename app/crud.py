@@ -1,23 +1,43 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
-from datetime import datetime, timezone, date
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone, date, timedelta
 from app import models, schemas
+from app.utils import tracing
+from app.utils.ticker_matcher import get_matcher
+from app.utils.timezones import to_local_date
+
+# diary_date 범위를 local_date 범위로 넓힐 여유 (시간대 오프셋 차이는 최대 26시간)
+LOCAL_DATE_SLACK = timedelta(days=2)
 
 
 # User CRUD operations
+@tracing.traced("crud.get_user")
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
+@tracing.traced("crud.get_user_by_firebase_uid")
 def get_user_by_firebase_uid(db: Session, firebase_uid: str):
     return db.query(models.User).filter(models.User.firebase_uid == firebase_uid).first()
 
 
+@tracing.traced("crud.get_user_by_email")
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+@tracing.traced("crud.update_user_timezone")
+def update_user_timezone(db: Session, user: models.User, timezone_name: str):
+    user.timezone = timezone_name
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@tracing.traced("crud.create_user")
 def create_user(db: Session, user: schemas.UserCreate):
     db_user = models.User(
         firebase_uid=user.firebase_uid,
@@ -29,6 +49,7 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+@tracing.traced("crud.get_or_create_user")
 def get_or_create_user(db: Session, firebase_user: dict):
     """
     Firebase UID로 사용자를 조회하고, 없으면 새로 생성합니다.
@@ -46,95 +67,149 @@ def get_or_create_user(db: Session, firebase_user: dict):
 
 
 # Diary CRUD operations
-def get_diary(db: Session, diary_id: int, owner_id: int):
-    return db.query(models.Diary).filter(
-        and_(models.Diary.id == diary_id, models.Diary.owner_id == owner_id)
-    ).first()
+def _load_fields(query, fields: Optional[List[str]]):
+    """fields 가 주어지면 해당 컬럼만 SELECT (나머지 컬럼 접근 시 추가 쿼리 대신 에러)"""
+    if not fields:
+        return query
+    return query.options(load_only(*(getattr(models.Diary, name) for name in fields), raiseload=True))
+
+
+@tracing.traced("crud.get_diary")
+def get_diary(db: Session, diary_id: int, owner_id: int, fields: Optional[List[str]] = None):
+    query = db.query(models.Diary).filter(
+        and_(models.Diary.id == diary_id, models.Diary.owner_id == owner_id, models.Diary.deleted_at.is_(None))
+    )
+    return _load_fields(query, fields).first()
 
 
+@tracing.traced("crud.get_diaries")
 def get_diaries(
     db: Session, 
     owner_id: int, 
     skip: int = 0, 
     limit: int = 100,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    fields: Optional[List[str]] = None
 ):
-    query = db.query(models.Diary).filter(models.Diary.owner_id == owner_id)
+    query = _load_fields(db.query(models.Diary), fields).filter(
+        models.Diary.owner_id == owner_id, models.Diary.deleted_at.is_(None)
+    )
     
+    # diaries 는 local_date 기준 파티션이므로 diary_date 범위를 local_date 경계로도 걸어 파티션 프루닝을 유도합니다.
     if start_date:
         print(f"시작 날짜 필터: >= {start_date}")
         query = query.filter(models.Diary.diary_date >= start_date)
+        query = query.filter(models.Diary.local_date >= (start_date - LOCAL_DATE_SLACK).date())
     if end_date:
         print(f"종료 날짜 필터: <= {end_date}")
         query = query.filter(models.Diary.diary_date <= end_date)
+        query = query.filter(models.Diary.local_date <= (end_date + LOCAL_DATE_SLACK).date())
     
     results = query.order_by(models.Diary.diary_date.desc()).offset(skip).limit(limit).all()
     print(f"조회된 일기 개수: {len(results)}")
-    for diary in results:
-        print(f"  - ID {diary.id}: {diary.diary_date}")
+    # fields 로 diary_date 를 읽지 않았을 수 있으므로 id 만 출력
+    print(f"  - ID: {[diary.id for diary in results]}")
     
     return results
 
 
+@tracing.traced("crud.get_diary_by_date")
 def get_diary_by_date(db: Session, owner_id: int, date: date):
-    """특정 날짜의 일기를 조회 (하루에 하나씩만 작성 가능하므로 단일 일기 반환)"""
-    
-    # 주의: 이 함수는 서버에서 호출되므로 UTC 기준으로 처리
-    # 클라이언트에서 이미 사용자 현지시각을 UTC로 변환해서 보냄
-    start_datetime = datetime.combine(date, datetime.min.time(), tzinfo=timezone.utc)
-    end_datetime = datetime.combine(date, datetime.max.time(), tzinfo=timezone.utc)
-    
-    print(f"서버 날짜 조회: {date} (UTC 기준) -> {start_datetime} ~ {end_datetime}")
-    
-    diary = db.query(models.Diary).filter(
+    """특정 날짜(owner 시간대 기준 local_date)의 일기를 조회 (하루에 하나씩만 작성 가능하므로 단일 일기 반환)"""
+    return db.query(models.Diary).filter(
         and_(
             models.Diary.owner_id == owner_id,
-            models.Diary.diary_date >= start_datetime,
-            models.Diary.diary_date <= end_datetime
+            models.Diary.local_date == date,
+            models.Diary.deleted_at.is_(None)
         )
     ).first()
-    
-    if diary:
-        print(f"찾은 일기: ID={diary.id}, 날짜={diary.diary_date}")
-    else:
-        print("해당 날짜에 일기 없음")
-    
-    return diary
 
 
-def create_diary(db: Session, diary: schemas.DiaryCreate, owner_id: int):
-    # 같은 날짜에 이미 일기가 있는지 확인 (범위 기준, 우선 range_*가 있으면 사용)
-    if diary.range_start_utc and diary.range_end_utc:
-        start_datetime = diary.range_start_utc
-        end_datetime = diary.range_end_utc
+@tracing.traced("crud.get_diaries_by_local_date_range")
+def get_diaries_by_local_date_range(db: Session, owner_id: int, start_date: date, end_date: date):
+    """local_date 가 [start_date, end_date] 인 일기를 날짜 오름차순으로 조회"""
+    return db.query(models.Diary).filter(
+        and_(
+            models.Diary.owner_id == owner_id,
+            models.Diary.local_date >= start_date,
+            models.Diary.local_date <= end_date,
+            models.Diary.deleted_at.is_(None)
+        )
+    ).order_by(models.Diary.local_date.asc()).all()
 
-    existing_diary = db.query(models.Diary).filter(
+
+@tracing.traced("crud.get_calendar_days")
+def get_calendar_days(db: Session, owner_id: int, start_date: date, end_date: date):
+    """달력 표시용 (local_date, id, mood) 목록. 본문은 읽지 않습니다."""
+    return db.query(models.Diary.local_date, models.Diary.id, models.Diary.mood).filter(
         and_(
             models.Diary.owner_id == owner_id,
-            models.Diary.diary_date >= start_datetime,
-            models.Diary.diary_date <= end_datetime
+            models.Diary.local_date >= start_date,
+            models.Diary.local_date <= end_date,
+            models.Diary.deleted_at.is_(None)
         )
-    ).first()
+    ).order_by(models.Diary.local_date.asc()).all()
 
-    print(f"existing_diary: {existing_diary}")
 
+@tracing.traced("crud.create_diary")
+def create_diary(
+    db: Session,
+    diary: schemas.DiaryCreate,
+    owner_id: int,
+    timezone_name: Optional[str] = None,
+    commit: bool = True
+):
+    """
+    일기를 생성합니다. local_date 는 owner 시간대로 diary_date 를 변환해 확정하며,
+    (owner_id, local_date) 유니크 인덱스로 하루 하나 규칙을 검사합니다.
+    같은 날짜에 삭제된 일기(tombstone)가 있으면 그 행(같은 id)을 새 내용으로 되살립니다.
+    range_start_utc / range_end_utc 는 하위 호환을 위해 받기만 하고 사용하지 않습니다.
+    commit=False 면 flush 만 하고 트랜잭션 처리는 호출 측(배치)에 맡깁니다.
+    """
+    if timezone_name is None:
+        owner = get_user(db, user_id=owner_id)
+        timezone_name = owner.timezone if owner else None
+    local_date = to_local_date(diary.diary_date, timezone_name)
+
+    duplicate_message = f"해당 날짜({local_date})에 이미 일기가 작성되어 있습니다."
+    # (owner_id, local_date) 유니크 인덱스는 tombstone 도 포함하므로 삭제된 행이 있으면 그 행을 되살려 씀
+    existing = db.query(models.Diary).filter(
+        and_(models.Diary.owner_id == owner_id, models.Diary.local_date == local_date)
+    ).first()
+    if existing is not None and existing.deleted_at is None:
+        raise ValueError(duplicate_message)
 
-    if existing_diary:
-        raise ValueError(f"해당 날짜({diary.diary_date.date()})에 이미 일기가 작성되어 있습니다.")
-    
     # 모델에 없는 필드(range_*)는 저장에서 제외
-    db_diary = models.Diary(
-        **diary.model_dump(exclude={"range_start_utc", "range_end_utc"}),
-        owner_id=owner_id
-    )
-    db.add(db_diary)
-    db.commit()
+    values = diary.model_dump(exclude={"range_start_utc", "range_end_utc"})
+    if existing is not None:
+        db_diary = existing
+        for field, value in values.items():
+            setattr(db_diary, field, value)
+        db_diary.llm_feedback = None
+        db_diary.deleted_at = None
+        db_diary.created_at = func.now()
+    else:
+        db_diary = models.Diary(**values, local_date=local_date, owner_id=owner_id)
+        db.add(db_diary)
+    try:
+        db.flush()
+    except IntegrityError:
+        # 동시 요청이 먼저 같은 날짜에 저장한 경우 (commit=False 면 호출 측 savepoint 가 되돌림)
+        if commit:
+            db.rollback()
+        raise ValueError(duplicate_message)
+    replace_diary_mentions(db, db_diary)
+    if commit:
+        db.commit()
     db.refresh(db_diary)
     return db_diary
 
 
-def update_diary(db: Session, diary_id: int, diary_update: schemas.DiaryUpdate, owner_id: int):
+@tracing.traced("crud.update_diary")
+def update_diary(
+    db: Session, diary_id: int, diary_update: schemas.DiaryUpdate, owner_id: int, commit: bool = True
+):
     db_diary = get_diary(db, diary_id=diary_id, owner_id=owner_id)
     if not db_diary:
         return None
@@ -142,18 +217,427 @@ def update_diary(db: Session, diary_id: int, diary_update: schemas.DiaryUpdate,
     update_data = diary_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_diary, field, value)
+    if "content" in update_data:
+        replace_diary_mentions(db, db_diary)
     
     # updated_at은 자동으로 업데이트됨 (onupdate=func.now())
-    db.commit()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     db.refresh(db_diary)
     return db_diary
 
 
-def delete_diary(db: Session, diary_id: int, owner_id: int):
+@tracing.traced("crud.save_diary_feedback")
+def save_diary_feedback(db: Session, diary_id: int, feedback: str):
+    """AI 피드백 저장 (생성 스레드에서 호출되므로 owner 검증은 호출 측에서 끝난 상태)"""
+    db_diary = db.query(models.Diary).filter(
+        and_(models.Diary.id == diary_id, models.Diary.deleted_at.is_(None))
+    ).first()
+    if not db_diary:
+        return None
+    db_diary.llm_feedback = feedback
+    db.commit()
+    return db_diary
+
+
+@tracing.traced("crud.delete_diary")
+def delete_diary(db: Session, diary_id: int, owner_id: int, commit: bool = True):
+    """
+    soft delete: 행은 tombstone 으로 남겨 변경 피드로 삭제를 알리고, 본문/사진/피드백과 임베딩/종목 언급은 바로 지웁니다.
+    tombstone 은 DIARY_TOMBSTONE_RETENTION_DAYS 뒤 `python -m app.utils.diary_sync purge` 로 정리됩니다.
+    """
     db_diary = get_diary(db, diary_id=diary_id, owner_id=owner_id)
     if not db_diary:
         return False
     
-    db.delete(db_diary)
+    db_diary.content = ""
+    db_diary.photo_url = None
+    db_diary.llm_feedback = None
+    db_diary.deleted_at = func.now()
+    db_diary.updated_at = func.now()
+    db.query(models.DiaryEmbedding).filter(
+        models.DiaryEmbedding.diary_id == diary_id
+    ).delete(synchronize_session=False)
+    db.query(models.DiaryMention).filter(
+        models.DiaryMention.diary_id == diary_id
+    ).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    return True 
+
+
+@tracing.traced("crud.get_diary_changes")
+def get_diary_changes(
+    db: Session,
+    owner_id: int,
+    since: Optional[Tuple[datetime, int]],
+    until: datetime,
+    limit: int
+):
+    """
+    (updated_at, id) 가 since 보다 크고 updated_at <= until 인 일기를 (updated_at, id) 순으로 limit 개 조회합니다.
+    since 가 없으면(첫 동기화) tombstone 은 제외합니다. idx_owner_updated 를 파티션마다 범위 탐색합니다.
+    """
+    query = db.query(models.Diary).filter(
+        models.Diary.owner_id == owner_id,
+        models.Diary.updated_at <= until
+    )
+    if since is None:
+        query = query.filter(models.Diary.deleted_at.is_(None))
+    else:
+        query = query.filter(tuple_(models.Diary.updated_at, models.Diary.id) > tuple_(*since))
+    return query.order_by(models.Diary.updated_at.asc(), models.Diary.id.asc()).limit(limit).all()
+
+
+@tracing.traced("crud.purge_diary_tombstones")
+def purge_diary_tombstones(db: Session, before: datetime, limit: int) -> int:
+    """before 보다 먼저 삭제된 tombstone 을 최대 limit 개 지웁니다 (idx_diaries_deleted_at 사용)."""
+    ids = db.query(models.Diary.id).filter(
+        models.Diary.deleted_at < before
+    ).limit(limit).scalar_subquery()
+    deleted = db.query(models.Diary).filter(
+        models.Diary.id.in_(ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+@tracing.traced("crud.get_diaries_by_ids")
+def get_diaries_by_ids(db: Session, owner_id: int, diary_ids: List[int]):
+    """id -> Diary 매핑 (삭제된 일기 제외)"""
+    if not diary_ids:
+        return {}
+    rows = db.query(models.Diary).filter(
+        and_(
+            models.Diary.owner_id == owner_id,
+            models.Diary.id.in_(diary_ids),
+            models.Diary.deleted_at.is_(None)
+        )
+    ).all()
+    return {row.id: row for row in rows}
+
+
+@tracing.traced("crud.get_diaries_after_id")
+def get_diaries_after_id(db: Session, after_id: int, limit: int, owner_id: Optional[int] = None):
+    """id 순 keyset 페이지 (삭제된 일기 제외). 전체 일기를 훑는 배치 작업용"""
+    query = db.query(models.Diary).filter(
+        models.Diary.id > after_id, models.Diary.deleted_at.is_(None)
+    )
+    if owner_id is not None:
+        query = query.filter(models.Diary.owner_id == owner_id)
+    return query.order_by(models.Diary.id.asc()).limit(limit).all()
+
+
+# Diary embedding CRUD operations
+@tracing.traced("crud.get_embedding_hashes")
+def get_embedding_hashes(db: Session, diary_ids: List[int]):
+    """diary_id -> 임베딩한 텍스트 해시"""
+    if not diary_ids:
+        return {}
+    rows = db.query(models.DiaryEmbedding.diary_id, models.DiaryEmbedding.content_hash).filter(
+        models.DiaryEmbedding.diary_id.in_(diary_ids)
+    ).all()
+    return {row.diary_id: row.content_hash for row in rows}
+
+
+@tracing.traced("crud.get_diary_embedding")
+def get_diary_embedding(db: Session, diary_id: int):
+    return db.query(models.DiaryEmbedding).filter(models.DiaryEmbedding.diary_id == diary_id).first()
+
+
+@tracing.traced("crud.get_owner_embeddings")
+def get_owner_embeddings(db: Session, owner_id: int, model: str):
+    """사용자 인덱스 적재용 (diary_id, vector) 목록"""
+    return db.query(models.DiaryEmbedding.diary_id, models.DiaryEmbedding.vector).filter(
+        and_(
+            models.DiaryEmbedding.owner_id == owner_id,
+            models.DiaryEmbedding.model == model
+        )
+    ).all()
+
+
+@tracing.traced("crud.upsert_diary_embedding")
+def upsert_diary_embedding(
+    db: Session, diary_id: int, owner_id: int, model: str, dimensions: int, content_hash: str, vector: bytes
+):
+    db_embedding = get_diary_embedding(db, diary_id=diary_id)
+    if db_embedding is None:
+        db_embedding = models.DiaryEmbedding(diary_id=diary_id, owner_id=owner_id)
+        db.add(db_embedding)
+    db_embedding.model = model
+    db_embedding.dimensions = dimensions
+    db_embedding.content_hash = content_hash
+    db_embedding.vector = vector
+    try:
+        db.commit()
+    except IntegrityError:
+        # 같은 일기를 동시에 색인한 경우 먼저 저장된 쪽을 그대로 둠
+        db.rollback()
+        return get_diary_embedding(db, diary_id=diary_id)
+    db.refresh(db_embedding)
+    return db_embedding
+
+
+@tracing.traced("crud.delete_diary_embedding")
+def delete_diary_embedding(db: Session, diary_id: int):
+    db.query(models.DiaryEmbedding).filter(
+        models.DiaryEmbedding.diary_id == diary_id
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+@tracing.traced("crud.replace_diary_mentions")
+def replace_diary_mentions(db: Session, diary: models.Diary):
+    """일기 본문의 종목 언급으로 diary_mentions 를 다시 채웁니다 (commit 은 호출 측에서)."""
+    db.query(models.DiaryMention).filter(
+        models.DiaryMention.diary_id == diary.id
+    ).delete(synchronize_session=False)
+    counts = get_matcher().mention_counts(diary.content or "")
+    db.add_all([
+        models.DiaryMention(
+            diary_id=diary.id,
+            local_date=diary.local_date,
+            owner_id=diary.owner_id,
+            symbol=symbol,
+            mention_count=count,
+        )
+        for symbol, count in counts.items()
+    ])
+    db.flush()
+
+
+@tracing.traced("crud.get_diaries_mentioning")
+def get_diaries_mentioning(db: Session, owner_id: int, symbol: str, skip: int = 0, limit: int = 100):
+    """symbol 을 언급한 일기를 최신순으로 조회합니다 (idx_diary_mention_owner_symbol_date 로 찾고 PK 로 조인)."""
+    return db.query(models.Diary).join(
+        models.DiaryMention,
+        and_(
+            models.DiaryMention.diary_id == models.Diary.id,
+            models.DiaryMention.local_date == models.Diary.local_date,
+        )
+    ).filter(
+        models.DiaryMention.owner_id == owner_id,
+        models.DiaryMention.symbol == symbol,
+        models.Diary.deleted_at.is_(None)
+    ).order_by(models.Diary.local_date.desc(), models.Diary.id.desc()).offset(skip).limit(limit).all()
+
+
+@tracing.traced("crud.get_mention_counts")
+def get_mention_counts(db: Session, owner_id: int, limit: int = 100):
+    """종목별 (symbol, 언급한 일기 수, 총 언급 횟수, 마지막 언급 날짜) 를 일기 수 많은 순으로 조회합니다."""
+    diary_count = func.count(models.DiaryMention.diary_id)
+    return db.query(
+        models.DiaryMention.symbol,
+        diary_count.label("diary_count"),
+        func.sum(models.DiaryMention.mention_count).label("mention_count"),
+        func.max(models.DiaryMention.local_date).label("last_mentioned"),
+    ).filter(
+        models.DiaryMention.owner_id == owner_id
+    ).group_by(
+        models.DiaryMention.symbol
+    ).order_by(diary_count.desc(), models.DiaryMention.symbol.asc()).limit(limit).all()
+
+
+@tracing.traced("crud.get_diary_draft")
+def get_diary_draft(db: Session, owner_id: int, local_date: date):
+    return db.query(models.DiaryDraft).filter(
+        and_(models.DiaryDraft.owner_id == owner_id, models.DiaryDraft.local_date == local_date)
+    ).first()
+
+
+@tracing.traced("crud.upsert_diary_drafts")
+def upsert_diary_drafts(db: Session, rows: List[dict]) -> int:
+    """
+    여러 사용자의 초안을 INSERT ... ON CONFLICT 한 문장으로 저장합니다.
+    이미 저장된 초안의 saved_at 이 더 새로우면(다른 워커가 먼저 저장) 덮어쓰지 않습니다.
+    """
+    if not rows:
+        return 0
+    stmt = pg_insert(models.DiaryDraft).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.DiaryDraft.owner_id, models.DiaryDraft.local_date],
+        set_={
+            "content": stmt.excluded.content,
+            "mood": stmt.excluded.mood,
+            "photo_url": stmt.excluded.photo_url,
+            "diary_date": stmt.excluded.diary_date,
+            "saved_at": stmt.excluded.saved_at,
+            "updated_at": func.now(),
+        },
+        where=models.DiaryDraft.saved_at < stmt.excluded.saved_at,
+    )
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+@tracing.traced("crud.delete_diary_draft")
+def delete_diary_draft(db: Session, owner_id: int, local_date: date):
+    db.query(models.DiaryDraft).filter(
+        and_(models.DiaryDraft.owner_id == owner_id, models.DiaryDraft.local_date == local_date)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+# Monthly summary CRUD operations
+@tracing.traced("crud.get_weekly_summaries")
+def get_weekly_summaries(db: Session, owner_id: int, period_starts: List[date]):
+    """구간 시작일 -> WeeklySummary 매핑을 반환합니다."""
+    if not period_starts:
+        return {}
+    rows = db.query(models.WeeklySummary).filter(
+        and_(
+            models.WeeklySummary.owner_id == owner_id,
+            models.WeeklySummary.period_start.in_(period_starts)
+        )
+    ).all()
+    return {row.period_start: row for row in rows}
+
+
+@tracing.traced("crud.upsert_weekly_summary")
+def upsert_weekly_summary(
+    db: Session, owner_id: int, period_start: date, period_end: date, content_hash: str, summary: str
+):
+    """같은 구간을 동시에 처음 요약해도 유니크 충돌 없이 나중 것으로 덮어씁니다 (INSERT ... ON CONFLICT)."""
+    stmt = pg_insert(models.WeeklySummary).values(
+        owner_id=owner_id,
+        period_start=period_start,
+        period_end=period_end,
+        content_hash=content_hash,
+        summary=summary,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.WeeklySummary.owner_id, models.WeeklySummary.period_start],
+        set_={
+            "period_end": stmt.excluded.period_end,
+            "content_hash": stmt.excluded.content_hash,
+            "summary": stmt.excluded.summary,
+            "updated_at": func.now(),
+        },
+    ).returning(models.WeeklySummary)
+    db_summary = db.execute(stmt, execution_options={"populate_existing": True}).scalar_one()
+    db.commit()
+    db.refresh(db_summary)
+    return db_summary
+
+
+@tracing.traced("crud.get_monthly_summary")
+def get_monthly_summary(db: Session, owner_id: int, year: int, month: int):
+    return db.query(models.MonthlySummary).filter(
+        and_(
+            models.MonthlySummary.owner_id == owner_id,
+            models.MonthlySummary.year == year,
+            models.MonthlySummary.month == month
+        )
+    ).first()
+
+
+@tracing.traced("crud.upsert_monthly_summary")
+def upsert_monthly_summary(
+    db: Session, owner_id: int, year: int, month: int, source_hash: str, summary: str, diary_count: int
+):
+    """같은 달을 동시에 처음 요약해도 유니크 충돌 없이 나중 것으로 덮어씁니다 (INSERT ... ON CONFLICT)."""
+    stmt = pg_insert(models.MonthlySummary).values(
+        owner_id=owner_id,
+        year=year,
+        month=month,
+        source_hash=source_hash,
+        summary=summary,
+        diary_count=diary_count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.MonthlySummary.owner_id, models.MonthlySummary.year, models.MonthlySummary.month],
+        set_={
+            "source_hash": stmt.excluded.source_hash,
+            "summary": stmt.excluded.summary,
+            "diary_count": stmt.excluded.diary_count,
+            "updated_at": func.now(),
+        },
+    ).returning(models.MonthlySummary)
+    db_summary = db.execute(stmt, execution_options={"populate_existing": True}).scalar_one()
+    db.commit()
+    db.refresh(db_summary)
+    return db_summary
+
+
+# Idempotency key CRUD operations
+@tracing.traced("crud.get_idempotency_key")
+def get_idempotency_key(db: Session, owner_id: int, scope: str, key: str):
+    return db.query(models.IdempotencyKey).filter(
+        and_(
+            models.IdempotencyKey.owner_id == owner_id,
+            models.IdempotencyKey.scope == scope,
+            models.IdempotencyKey.key == key
+        )
+    ).first()
+
+
+@tracing.traced("crud.get_idempotency_key_by_id")
+def get_idempotency_key_by_id(db: Session, key_id: int):
+    return db.query(models.IdempotencyKey).filter(models.IdempotencyKey.id == key_id).first()
+
+
+@tracing.traced("crud.create_idempotency_key")
+def create_idempotency_key(
+    db: Session, owner_id: int, scope: str, key: str, request_hash: str, expires_at: datetime
+):
+    """처리 중 상태로 키를 등록합니다. 같은 키가 이미 있으면 None (동시 요청이 먼저 등록)."""
+    db_key = models.IdempotencyKey(
+        owner_id=owner_id,
+        scope=scope,
+        key=key,
+        request_hash=request_hash,
+        status="in_progress",
+        expires_at=expires_at
+    )
+    db.add(db_key)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(db_key)
+    return db_key
+
+
+@tracing.traced("crud.complete_idempotency_key")
+def complete_idempotency_key(
+    db: Session,
+    db_key: models.IdempotencyKey,
+    response_status: int,
+    response_body: str,
+    resource_id: Optional[int] = None,
+    commit: bool = True
+):
+    db_key.status = "completed"
+    db_key.response_status = response_status
+    db_key.response_body = response_body
+    db_key.resource_id = resource_id
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    return db_key
+
+
+@tracing.traced("crud.delete_idempotency_key")
+def delete_idempotency_key(db: Session, key_id: int):
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.id == key_id).delete(synchronize_session=False)
+    db.commit()
+
+
+@tracing.traced("crud.purge_expired_idempotency_keys")
+def purge_expired_idempotency_keys(db: Session, now: datetime, limit: int) -> int:
+    """만료된 키를 최대 limit 개 지웁니다 (expires_at 인덱스 사용)."""
+    ids = db.query(models.IdempotencyKey.id).filter(
+        models.IdempotencyKey.expires_at < now
+    ).limit(limit).scalar_subquery()
+    deleted = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.id.in_(ids)
+    ).delete(synchronize_session=False)
     db.commit()
-    return True 
\ No newline at end of file
+    return deleted
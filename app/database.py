@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.query_stats import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL 
 
@@ -14,6 +15,9 @@ engine = create_engine(
     }
 )
 
+# 쿼리 수/DB 시간 집계 및 느린 쿼리 로그
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,17 +1,22 @@
 import sys
 import os
+import time
 import firebase_admin
 from firebase_admin import credentials
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # 프로젝트 루트를 Python 경로에 추가
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.api.v1 import api_router
-from app.database import engine
-from app import models
 from app.config import settings
+from app.database import engine
+from app.utils import metrics, query_stats, tracing
+from app.utils.admission import feedback_admission
+from app.utils.drafts import draft_buffer
+from app.utils.feedback_streams import active_generation_count
 
 # Firebase Admin SDK 초기화
 try:
@@ -24,13 +29,8 @@ except Exception as e:
     # 운영 환경에서는 이 오류를 심각하게 처리해야 합니다.
     # 예: raise SystemExit("Could not initialize Firebase Admin SDK")
 
-# 데이터베이스 테이블 생성
-try:
-    models.Base.metadata.create_all(bind=engine)
-    print("✅ 데이터베이스 테이블이 성공적으로 준비되었습니다.")
-except Exception as e:
-    print(f"🔥 데이터베이스 테이블 생성 중 오류 발생: {e}")
-    print("데이터베이스 연결을 확인해주세요.")
+# 데이터베이스 스키마는 앱 시작 시 만들지 않습니다 (DDL 없음).
+# 배포/개발 시 먼저 마이그레이션을 적용하세요: alembic -c app/alembic.ini upgrade head
 
 
 app = FastAPI(
@@ -49,11 +49,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 디버그 모드: 요청별 쿼리 수와 DB 시간을 응답 헤더로 노출
+if settings.DEBUG:
+    @app.middleware("http")
+    async def add_db_timing_headers(request: Request, call_next):
+        started = time.perf_counter()
+        with query_stats.track_request() as stats:
+            response = await call_next(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["Server-Timing"] = query_stats.server_timing_header(stats, total_ms)
+        return response
+
+# 트레이싱: 요청마다 루트 span 을 만들고 응답에 trace id 를 붙임 (TRACING_EXPORTER=none 이면 등록하지 않음)
+if tracing.ENABLED:
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        with tracing.start_trace(
+            f"{request.method} {request.url.path}",
+            traceparent=request.headers.get("traceparent"),
+            http_method=request.method,
+        ) as root:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if route is not None:
+                root.set_attribute("http_route", route.path)
+            root.set_attribute("http_status", response.status_code)
+        if root.trace_id:
+            response.headers["X-Trace-Id"] = root.trace_id
+        return response
+
+# 메트릭: 라우트별 지연 시간/상태 코드 (가장 바깥에서 재도록 마지막에 등록)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.register_pool_gauges(engine)
+metrics.feedback_active_generations.set_function(active_generation_count)
+metrics.feedback_admission_active.set_function(lambda: feedback_admission.stats()["active"])
+metrics.feedback_admission_queued.set_function(lambda: feedback_admission.stats()["queued"])
+metrics.draft_buffer_size.set_function(lambda: draft_buffer.stats()["buffered"])
+metrics.draft_buffer_pending.set_function(lambda: draft_buffer.stats()["pending"])
+
 # API 라우터 등록
 # 이제 /api/v1/users/login, /api/v1/diaries/ 와 같은 경로로 접근합니다.
 app.include_router(api_router, prefix="/api/v1")
 
 
+# 초안 자동 저장: 버퍼를 주기적으로 DB 에 저장하고, 종료 시 남은 초안을 저장
+@app.on_event("startup")
+def start_draft_flusher():
+    draft_buffer.start()
+
+
+@app.on_event("shutdown")
+def flush_drafts_on_shutdown():
+    draft_buffer.stop()
+
+
 @app.get("/")
 def read_root():
     return {
@@ -66,3 +116,11 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(request: Request):
+    """Prometheus 텍스트 형식 메트릭"""
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="메트릭 접근 토큰이 필요합니다.")
+    return PlainTextResponse(metrics.render_prometheus(), media_type=metrics.CONTENT_TYPE)
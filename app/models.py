@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from app.config import settings
 from app.database import Base
 
 
@@ -11,6 +12,8 @@ class User(Base):
     firebase_uid = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     display_name = Column(String, nullable=True)
+    # IANA 시간대. 새 사용자는 DEFAULT_TIMEZONE, 기존 행은 서비스 기본 시간대(Asia/Seoul)로 채움
+    timezone = Column(String, nullable=False, default=settings.DEFAULT_TIMEZONE, server_default="Asia/Seoul")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationship
@@ -18,22 +21,142 @@ class User(Base):
 
 
 class Diary(Base):
+    # local_date 기준 RANGE 파티션 테이블 (app/utils/partitions.py, 마이그레이션 0005)
     __tablename__ = "diaries"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # 파티션 테이블의 PK 는 파티션 키를 포함해야 하므로 (id, local_date). id 는 시퀀스로 계속 유일합니다.
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     content = Column(Text, nullable=False)
     mood = Column(String, nullable=False)  # "happy", "sad", "worried", "angry", "excited"
     photo_url = Column(String, nullable=True)
     diary_date = Column(DateTime(timezone=True), nullable=False, index=True)  # 사용자가 의도한 작성 시간 (UTC)
+    local_date = Column(Date, primary_key=True, nullable=False)  # 작성 시점 owner 시간대 기준 날짜 (하루 1개 규칙/달력 조회 기준)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # 실제 서버 저장 시간 (UTC)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     llm_feedback = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # 삭제 시각 (tombstone). 삭제된 행은 변경 피드(/diaries/changes)에만 보이고 보존 기간 뒤 정리됩니다.
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationship
     owner = relationship("User", back_populates="diaries")
 
+    # ORM 에서는 id 만으로 식별
+    __mapper_args__ = {"primary_key": [id]}
+
     # Indexes
     __table_args__ = (
-        Index('idx_owner_date', 'owner_id', 'diary_date', unique=True),  # 하루에 하나씩만 작성
-    ) 
\ No newline at end of file
+        # 파티션 테이블의 유니크 인덱스에는 파티션 키가 있어야 하므로 diary_date 인덱스는 일반 인덱스
+        Index('idx_owner_date', 'owner_id', 'diary_date'),
+        Index('idx_owner_local_date', 'owner_id', 'local_date', unique=True),  # 하루에 하나씩만 작성
+        Index('idx_owner_updated', 'owner_id', 'updated_at', 'id'),  # 변경 피드 (updated_at, id) 커서
+        Index('idx_diaries_deleted_at', 'deleted_at', postgresql_where=text('deleted_at IS NOT NULL')),  # tombstone 정리
+        {"postgresql_partition_by": "RANGE (local_date)"},
+    )
+
+
+class WeeklySummary(Base):
+    """월간 요약의 map 단계 결과 (월 안의 7일 구간별 부분 요약 캐시)"""
+    __tablename__ = "weekly_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period_start = Column(Date, nullable=False)  # 구간 시작일 (매월 1, 8, 15, 22, 29일)
+    period_end = Column(Date, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # 구간 내 일기 내용 해시 (바뀌면 재계산)
+    summary = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_weekly_summary_owner_period', 'owner_id', 'period_start', unique=True),
+    )
+
+
+class MonthlySummary(Base):
+    """월간 회고 요약 (reduce 단계 결과)"""
+    __tablename__ = "monthly_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    source_hash = Column(String(64), nullable=False)  # 구간 해시들의 해시 (같으면 그대로 제공)
+    summary = Column(Text, nullable=False)
+    diary_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_monthly_summary_owner_month', 'owner_id', 'year', 'month', unique=True),
+    )
+
+
+class IdempotencyKey(Base):
+    """Idempotency-Key 헤더로 받은 요청의 처리 상태와 저장된 응답 (expires_at 이후 정리)"""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    scope = Column(String(32), nullable=False)  # "diary_create", "ai_feedback"
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # 같은 키로 다른 요청을 보내면 거절
+    status = Column(String(16), nullable=False)  # "in_progress", "completed"
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON
+    resource_id = Column(Integer, nullable=True)  # 만들어진/대상 일기 id
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index('idx_idempotency_owner_scope_key', 'owner_id', 'scope', 'key', unique=True),
+    )
+
+
+class DiaryEmbedding(Base):
+    """일기 임베딩 (float32 배열을 bytes 로 저장). 비슷한 일기 검색 인덱스의 원본"""
+    __tablename__ = "diary_embeddings"
+
+    # diaries 의 PK 는 (id, local_date) 라 FK 를 걸 수 없으므로 id 만 저장 (삭제 시 crud 에서 함께 지움)
+    diary_id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    model = Column(String(128), nullable=False)  # 제공자/모델/차원 (예: "openai:text-embedding-3-small:256")
+    dimensions = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # 임베딩한 텍스트 해시 (같으면 다시 계산하지 않음)
+    vector = Column(LargeBinary, nullable=False)  # float32 little-endian, 길이 dimensions * 4
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_diary_embedding_owner_model', 'owner_id', 'model'),
+    )
+
+
+class DiaryDraft(Base):
+    """자동 저장 초안 (사용자/날짜당 하나). app/utils/drafts.py 의 버퍼가 모아서 주기적으로 저장"""
+    __tablename__ = "diary_drafts"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    local_date = Column(Date, primary_key=True)  # 사용자 시간대 기준 날짜 (일기의 local_date 와 같은 규칙)
+    content = Column(Text, nullable=False)
+    mood = Column(String, nullable=True)
+    photo_url = Column(String, nullable=True)
+    diary_date = Column(DateTime(timezone=True), nullable=False)  # 확정할 때 쓸 일기 시각 (UTC)
+    # 서버가 마지막 변경을 받은 시각. 늦게 도착한 flush 가 더 새 초안을 덮어쓰지 않도록 비교에 사용
+    saved_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class DiaryMention(Base):
+    """일기 본문에서 찾은 종목 언급 (app/utils/ticker_matcher.py). 일기 저장 시 다시 채워짐"""
+    __tablename__ = "diary_mentions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    diary_id = Column(Integer, nullable=False)  # diaries 는 (id, local_date) PK 라 FK 없이 저장 (삭제 시 crud 에서 함께 지움)
+    local_date = Column(Date, nullable=False)  # diaries 와 (id, local_date) 로 조인해 파티션 PK 인덱스를 탐
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    symbol = Column(String(16), nullable=False)
+    mention_count = Column(Integer, nullable=False)  # 본문에서 언급된 횟수
+
+    __table_args__ = (
+        Index('idx_diary_mention_diary_symbol', 'diary_id', 'symbol', unique=True),
+        Index('idx_diary_mention_owner_symbol_date', 'owner_id', 'symbol', 'local_date'),
+    )
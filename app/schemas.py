@@ -1,6 +1,9 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
-from datetime import datetime, timezone
+from functools import lru_cache
+from pydantic import BaseModel, EmailStr, Field, create_model, validator
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from datetime import date, datetime, timezone
+
+from app.utils.timezones import is_valid_timezone
 
 
 # User schemas
@@ -13,9 +16,20 @@ class UserCreate(UserBase):
     firebase_uid: str
 
 
+class UserTimezoneUpdate(BaseModel):
+    timezone: str = Field(description="IANA 시간대 이름 (예: Asia/Seoul)")
+
+    @validator('timezone')
+    def validate_timezone(cls, value):
+        if not is_valid_timezone(value):
+            raise ValueError(f"알 수 없는 시간대입니다: {value}")
+        return value
+
+
 class UserInDB(UserBase):
     id: int
     firebase_uid: str
+    timezone: str = Field(description="IANA 시간대 이름")
     created_at: datetime = Field(description="UTC 시간 기준")
 
     model_config = {"from_attributes": True}
@@ -40,7 +54,8 @@ class DiaryBase(BaseModel):
 
 class DiaryCreate(DiaryBase):
     photo_url: Optional[str] = None
-    # 클라이언트가 현지시각 기준 날짜 범위를 UTC로 변환하여 전달
+    # (하위 호환용) 예전 클라이언트가 현지시각 기준 날짜 범위를 UTC로 변환하여 전달하던 값
+    # 서버는 사용자 시간대로 local_date 를 계산하므로 더 이상 사용하지 않음
     range_start_utc: Optional[datetime] = None
     range_end_utc: Optional[datetime] = None
 
@@ -59,6 +74,7 @@ class DiaryUpdate(BaseModel):
 
 class DiaryInDB(DiaryBase):
     id: int
+    local_date: date = Field(description="작성 시점 사용자 시간대 기준 날짜")
     photo_url: Optional[str] = None
     llm_feedback: Optional[str] = None
     created_at: datetime = Field(description="실제 서버 저장 시간 (UTC)")
@@ -72,12 +88,133 @@ class Diary(DiaryInDB):
     owner: User
 
 
+# fields= 로 골라 받을 수 있는 일기 필드 (owner 제외, id 는 항상 포함)
+DIARY_SPARSE_FIELDS = tuple(DiaryInDB.model_fields)
+
+
+@lru_cache(maxsize=128)
+def sparse_diary_schema(fields: Tuple[str, ...]) -> type:
+    """요청한 필드만 가진 응답 스키마 (전체 응답과 같은 방식으로 직렬화)"""
+    return create_model(
+        "DiarySparse",
+        __config__={"from_attributes": True},
+        **{name: (DiaryInDB.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+# Batch schemas
+BATCH_MAX_OPERATIONS = 100
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete", "get"]
+    diary_id: Optional[int] = Field(None, description="update / delete / get 대상 일기 id")
+    data: Optional[Dict[str, Any]] = Field(None, description="create: DiaryCreate, update: DiaryUpdate 형식")
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+    atomic: bool = Field(True, description="true 면 하나라도 실패 시 전체 롤백, false 면 성공한 작업만 반영")
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    diary: Optional[Diary] = None
+    detail: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    atomic: bool
+    committed: bool
+    results: List[BatchOperationResult]
+
+
 # AI Feedback schema
 class AIFeedback(BaseModel):
     feedback: str
     generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="UTC 시간 기준")
 
 
+# Change feed schemas
+DIARY_CHANGES_MAX_LIMIT = 500
+
+
+class DiaryTombstone(BaseModel):
+    id: int
+    deleted_at: datetime
+
+
+class DiaryChanges(BaseModel):
+    upserted: List[DiaryInDB] = Field(description="since 이후 생성/수정된 일기 ((updated_at, id) 순)")
+    deleted: List[DiaryTombstone] = Field(description="since 이후 삭제된 일기")
+    next_token: str = Field(description="다음 요청의 since 로 넘길 토큰")
+    has_more: bool = Field(description="true 면 next_token 으로 바로 이어서 요청")
+
+
+# Similar diaries schema
+SIMILAR_DIARIES_MAX_K = 20
+
+
+class SimilarDiary(BaseModel):
+    similarity: float = Field(description="코사인 유사도 (-1 ~ 1, 클수록 비슷함)")
+    diary: DiaryInDB
+
+
+# Draft schemas
+class DiaryDraftUpdate(BaseModel):
+    diary_date: Optional[datetime] = Field(
+        None, description="초안이 속한 일기 시각 (UTC, 없으면 지금). 사용자 시간대 기준 날짜로 초안을 구분"
+    )
+    content: Optional[str] = None
+    mood: Optional[str] = None
+    photo_url: Optional[str] = None
+
+
+class DiaryDraft(BaseModel):
+    local_date: date = Field(description="사용자 시간대 기준 날짜")
+    content: str
+    mood: Optional[str] = None
+    photo_url: Optional[str] = None
+    diary_date: datetime = Field(description="확정할 때 쓸 일기 시각 (UTC)")
+    saved_at: datetime = Field(description="서버가 마지막 변경을 받은 시각 (UTC)")
+
+    model_config = {"from_attributes": True}
+
+
+class DiaryDraftFinalize(BaseModel):
+    local_date: date = Field(description="확정할 초안의 날짜 (사용자 시간대 기준)")
+
+
+# Ticker mention schema
+class TickerMentionCount(BaseModel):
+    symbol: str
+    name: str
+    market: str
+    diary_count: int = Field(description="이 종목을 언급한 일기 수")
+    mention_count: int = Field(description="전체 언급 횟수")
+    last_mentioned: date = Field(description="마지막으로 언급한 일기의 날짜 (사용자 시간대 기준)")
+
+
+# Calendar schema
+class CalendarDay(BaseModel):
+    local_date: date
+    diary_id: int
+    mood: str
+
+
+# Monthly summary schema
+class MonthlySummary(BaseModel):
+    year: int
+    month: int
+    summary: str
+    diary_count: int
+    updated_at: datetime = Field(description="UTC 시간 기준")
+
+    model_config = {"from_attributes": True}
+
+
 # Response schemas
 class Message(BaseModel):
     message: str
@@ -0,0 +1,221 @@
+"""
+AI 피드백 생성 입장 제어 (사용자별 공정 분배).
+
+업스트림(OpenAI) 동시 생성 수를 FEEDBACK_MAX_CONCURRENCY 로 제한하고,
+빈 자리는 사용자별 가중치 공정 큐(WFQ)로 나눠 줍니다. 한 사용자가 요청을 몰아 보내도
+다른 사용자의 생성이 그 뒤에 줄 서지 않고 번갈아 자리를 받습니다.
+
+- 새 생성 요청마다 사용자 토큰 버킷(FEEDBACK_USER_RATE_PER_MINUTE, FEEDBACK_USER_BURST)에서 토큰을 씁니다.
+- 사용자별 대기열이 FEEDBACK_USER_QUEUE_LIMIT 를 넘거나 토큰이 없으면 AdmissionRejected (-> 429 + Retry-After).
+- 진행 중인 생성에 구독자로 붙는 요청은 업스트림을 더 쓰지 않으므로 입장 제어 대상이 아닙니다.
+
+상태는 프로세스 메모리에 있으므로 워커별로 따로 적용됩니다.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional
+
+from app.config import settings
+from app.utils.metrics import feedback_admission_rejected_total, feedback_admission_wait_seconds
+
+# 유휴 사용자 버킷 정리를 시작하는 크기
+_MAX_IDLE_BUCKETS = 10_000
+
+
+class AdmissionRejected(Exception):
+    """입장 거절. retry_after 초 뒤 다시 시도할 수 있습니다."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class _TokenBucket:
+    def __init__(self, rate_per_second: float, burst: float, now: float):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until_token(self) -> float:
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Ticket:
+    """대기열에 선 생성 하나. 자리를 받으면 granted 가 True 가 됩니다."""
+
+    def __init__(self, user_key: Hashable, start_tag: float, finish_tag: float):
+        self.user_key = user_key
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.granted_at: Optional[float] = None
+        self.done = False
+
+
+class FairShareAdmission:
+    def __init__(self, *, max_concurrency: int, rate_per_minute: float, burst: int, queue_limit: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.queue_limit = max(1, queue_limit)
+        self._buckets: Dict[Hashable, _TokenBucket] = {}
+        self._queues: Dict[Hashable, Deque[Ticket]] = {}
+        self._last_finish: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        self._active = 0
+        # 생성 한 건이 자리를 차지하는 평균 시간(초)의 EWMA. Retry-After 추정에 사용
+        self._avg_hold_seconds = 10.0
+        self._cond = threading.Condition()
+
+    def reserve(self, user_key: Hashable, weight: float = 1.0) -> Ticket:
+        """토큰을 쓰고 대기열에 섭니다. 한도를 넘으면 AdmissionRejected."""
+        now = time.monotonic()
+        with self._cond:
+            if len(self._buckets) > _MAX_IDLE_BUCKETS:
+                self._prune_idle_locked(now)
+            bucket = self._buckets.get(user_key)
+            if bucket is None:
+                bucket = self._buckets[user_key] = _TokenBucket(self.rate_per_second, self.burst, now)
+            bucket.refill(now)
+
+            queue = self._queues.setdefault(user_key, deque())
+            if len(queue) >= self.queue_limit:
+                feedback_admission_rejected_total.inc(reason="queue_full")
+                raise AdmissionRejected(
+                    "이미 처리 중인 AI 피드백 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+                    retry_after=self._avg_hold_seconds,
+                )
+            if bucket.tokens < 1:
+                feedback_admission_rejected_total.inc(reason="rate_limited")
+                raise AdmissionRejected(
+                    "AI 피드백 요청이 너무 잦습니다. 잠시 후 다시 시도해주세요.",
+                    retry_after=bucket.seconds_until_token(),
+                )
+            bucket.tokens -= 1
+
+            # WFQ: 사용자별 가상 종료 시각이 가장 이른 요청부터 자리를 받음 (가중치가 클수록 자주)
+            start_tag = max(self._virtual_time, self._last_finish.get(user_key, 0.0))
+            finish_tag = start_tag + 1.0 / max(weight, 0.01)
+            self._last_finish[user_key] = finish_tag
+            ticket = Ticket(user_key, start_tag, finish_tag)
+            queue.append(ticket)
+            self._dispatch_locked()
+            return ticket
+
+    def acquire(self, ticket: Ticket, timeout: Optional[float]) -> bool:
+        """자리를 받을 때까지 기다립니다. 시간 초과나 취소 시 False (대기열에서 빠짐)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not ticket.granted and not ticket.done:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not ticket.granted:
+                self._remove_locked(ticket)
+                return False
+        feedback_admission_wait_seconds.observe(ticket.granted_at - ticket.enqueued_at)
+        return True
+
+    def cancel(self, ticket: Ticket) -> None:
+        """대기 중인 요청을 대기열에서 빼고 기다리는 쪽을 깨웁니다. 이미 자리를 받았다면 아무것도 하지 않습니다."""
+        with self._cond:
+            if not ticket.granted:
+                self._remove_locked(ticket)
+                self._cond.notify_all()
+
+    def release(self, ticket: Ticket) -> None:
+        with self._cond:
+            if not ticket.granted or ticket.done:
+                return
+            ticket.done = True
+            self._active -= 1
+            held = time.monotonic() - ticket.granted_at
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held
+            self._dispatch_locked()
+
+    def _remove_locked(self, ticket: Ticket) -> None:
+        ticket.done = True
+        queue = self._queues.get(ticket.user_key)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+        if queue is not None and not queue:
+            del self._queues[ticket.user_key]
+
+    def _dispatch_locked(self) -> None:
+        granted = False
+        while self._active < self.max_concurrency:
+            heads = [queue[0] for queue in self._queues.values() if queue]
+            if not heads:
+                break
+            ticket = min(heads, key=lambda head: (head.finish_tag, head.enqueued_at))
+            queue = self._queues[ticket.user_key]
+            queue.popleft()
+            if not queue:
+                del self._queues[ticket.user_key]
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            ticket.granted = True
+            ticket.granted_at = time.monotonic()
+            self._active += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _prune_idle_locked(self, now: float) -> None:
+        for user_key in list(self._buckets):
+            bucket = self._buckets[user_key]
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst and user_key not in self._queues:
+                del self._buckets[user_key]
+                self._last_finish.pop(user_key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": sum(len(queue) for queue in self._queues.values()),
+            }
+
+
+def _parse_weights(raw: str) -> Dict[int, float]:
+    """'사용자id:가중치,...' 형식"""
+    weights: Dict[int, float] = {}
+    for entry in raw.split(","):
+        if ":" not in entry:
+            continue
+        user_id, weight = entry.split(":", 1)
+        try:
+            weights[int(user_id.strip())] = float(weight.strip())
+        except ValueError:
+            print(f"⚠️ FEEDBACK_USER_WEIGHTS 항목을 무시합니다: {entry!r}")
+    return weights
+
+
+USER_WEIGHTS = _parse_weights(settings.FEEDBACK_USER_WEIGHTS)
+
+
+def user_weight(user_id: int) -> float:
+    return USER_WEIGHTS.get(user_id, 1.0)
+
+
+feedback_admission = FairShareAdmission(
+    max_concurrency=settings.FEEDBACK_MAX_CONCURRENCY,
+    rate_per_minute=settings.FEEDBACK_USER_RATE_PER_MINUTE,
+    burst=settings.FEEDBACK_USER_BURST,
+    queue_limit=settings.FEEDBACK_USER_QUEUE_LIMIT,
+)
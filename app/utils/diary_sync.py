@@ -0,0 +1,111 @@
+"""
+일기 변경 피드 (GET /diaries/changes).
+
+클라이언트가 로컬 캐시를 유지하면서 마지막 동기화 이후 바뀐 것만 받도록,
+(updated_at, id) 순서의 커서(since 토큰)로 생성/수정된 일기와 삭제 tombstone 을 돌려줍니다.
+
+- since 없이 부르면 살아 있는 일기 전체를 페이지 단위로 받습니다 (첫 동기화).
+- 응답의 next_token 을 다음 요청의 since 로 넘기고, has_more 가 false 가 될 때까지 반복합니다.
+- updated_at 은 트랜잭션 시작 시각이라 늦게 커밋된 변경이 커서 뒤로 끼어들 수 있으므로
+  최근 DIARY_SYNC_SAFETY_LAG_SECONDS 초의 변경은 다음 동기화 때 돌려줍니다.
+- tombstone 은 DIARY_TOMBSTONE_RETENTION_DAYS 뒤 정리되므로 그보다 오래된 토큰은
+  SyncTokenExpired (410) 로 전체 동기화를 요구합니다.
+- 정리는 요청 경로가 아니라 배포/cron 에서 따로 실행합니다 (조회 요청은 읽기만 함):
+    python -m app.utils.diary_sync purge
+"""
+import argparse
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.config import settings
+
+class SyncTokenInvalid(Exception):
+    status_code = 400
+
+
+class SyncTokenExpired(Exception):
+    status_code = 410
+
+
+def encode_token(updated_at: datetime, diary_id: int) -> str:
+    raw = json.dumps({"t": updated_at.isoformat(), "id": diary_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        updated_at = datetime.fromisoformat(payload["t"])
+        diary_id = int(payload["id"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise SyncTokenInvalid("since 토큰 형식이 올바르지 않습니다.")
+    if updated_at.tzinfo is None:
+        raise SyncTokenInvalid("since 토큰 형식이 올바르지 않습니다.")
+    return updated_at, diary_id
+
+
+def get_changes(db: Session, *, owner_id: int, since: Optional[str], limit: int) -> dict:
+    """schemas.DiaryChanges 형태의 dict 를 돌려줍니다."""
+    cursor = decode_token(since) if since else None
+    now = db.query(func.now()).scalar()
+    if cursor is not None and cursor[0] < now - timedelta(days=settings.DIARY_TOMBSTONE_RETENTION_DAYS):
+        raise SyncTokenExpired("마지막 동기화가 너무 오래되었습니다. since 없이 전체 동기화해주세요.")
+
+    until = now - timedelta(seconds=settings.DIARY_SYNC_SAFETY_LAG_SECONDS)
+    rows = crud.get_diary_changes(db, owner_id=owner_id, since=cursor, until=until, limit=limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if rows:
+        cursor = (rows[-1].updated_at, rows[-1].id)
+    if not has_more and (cursor is None or cursor[0] < until):
+        # until 까지는 모두 받았으므로 커서를 until 로 당겨 둠 (변경이 없는 사용자의 토큰이 만료되지 않도록)
+        cursor = (until, 0)
+
+    return {
+        "upserted": [row for row in rows if row.deleted_at is None],
+        "deleted": [{"id": row.id, "deleted_at": row.deleted_at} for row in rows if row.deleted_at is not None],
+        "next_token": encode_token(*cursor),
+        "has_more": has_more,
+    }
+
+
+def purge_tombstones(db: Session, *, now: datetime, batch_size: int) -> int:
+    """보존 기간이 지난 tombstone 을 batch_size 개씩 나눠 지웁니다 (잠금을 짧게 유지). 지운 수를 반환합니다."""
+    before = now - timedelta(days=settings.DIARY_TOMBSTONE_RETENTION_DAYS)
+    total = 0
+    while True:
+        deleted = crud.purge_diary_tombstones(db, before=before, limit=batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def main() -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="일기 변경 피드 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    purge = sub.add_parser("purge", help="보존 기간이 지난 삭제 tombstone 정리 (배포/cron)")
+    purge.add_argument("--batch-size", type=int, default=settings.DIARY_TOMBSTONE_PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        db = SessionLocal()
+        try:
+            deleted = purge_tombstones(db, now=datetime.now(timezone.utc), batch_size=max(1, args.batch_size))
+        finally:
+            db.close()
+        print(f"🧹 보존 기간이 지난 일기 tombstone {deleted}개 정리")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+일기 초안 자동 저장 (PATCH /diaries/drafts).
+
+클라이언트는 입력이 멈출 때마다 초안을 보내지만, 매번 커밋하지 않고 (사용자, 날짜)별 최신 초안만
+프로세스 메모리 버퍼에 덮어씁니다. 백그라운드 스레드가 DRAFT_FLUSH_INTERVAL_SECONDS 마다
+바뀐 초안을 모아 여러 사용자 것을 한 번의 INSERT ... ON CONFLICT 로 diary_drafts 에 저장합니다.
+
+- 초안 읽기는 버퍼에서 돌려주고, 버퍼에 없으면 DB 에서 읽어 버퍼에 올립니다.
+  DB 와 맞춰 본 지 한 주기가 지난 (저장이 끝난) 초안은 다시 DB 의 saved_at 과 비교해 더 새로운 쪽을 씁니다.
+- 그 날짜에 일기가 있으면 새 초안은 그 일기 내용에서 시작하므로, 일부 필드만 보내도 나머지는 일기 그대로입니다.
+- 저장이 끝난 초안은 DRAFT_BUFFER_IDLE_SECONDS 동안 쓰이지 않으면 버퍼에서 내립니다.
+- 확정(POST /diaries/drafts/finalize)이나 일기 생성 시 초안을 버퍼와 DB 에서 지웁니다.
+  확정은 항상 DB 를 다시 읽어 다른 워커가 저장한 더 새로운 초안을 놓치지 않습니다.
+- 앱 종료 시 남은 초안을 저장합니다. 프로세스가 비정상 종료되면 마지막 주기 동안의 변경은 잃을 수 있습니다.
+- 워커가 여럿이면 같은 사용자의 요청이 다른 워커로 갈 때 최대 약 두 주기만큼 오래된 초안을 볼 수 있습니다
+  (다른 워커의 버퍼에 아직 저장되지 않은 변경). 저장은 saved_at 이 더 새로운 쪽만 반영하므로
+  오래된 버퍼가 새 초안을 덮어쓰지는 않습니다.
+"""
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.config import settings
+from app.database import SessionLocal
+from app.utils import metrics, tracing
+
+DraftKey = Tuple[int, date]
+
+DRAFT_FIELDS = ("content", "mood", "photo_url", "diary_date")
+
+
+@dataclass
+class Draft:
+    owner_id: int
+    local_date: date
+    content: str
+    mood: Optional[str]
+    photo_url: Optional[str]
+    diary_date: datetime
+    saved_at: datetime
+    dirty: bool = False  # DB 에 아직 저장하지 않은 변경이 있음
+    touched: float = field(default_factory=time.monotonic)  # 마지막으로 읽거나 쓴 시각 (버퍼에서 내릴 때 기준)
+    synced: float = field(default_factory=time.monotonic)  # 마지막으로 DB 와 맞춰 본 시각 (읽거나 저장)
+
+    def row(self) -> dict:
+        return {
+            "owner_id": self.owner_id,
+            "local_date": self.local_date,
+            "content": self.content,
+            "mood": self.mood,
+            "photo_url": self.photo_url,
+            "diary_date": self.diary_date,
+            "saved_at": self.saved_at,
+        }
+
+
+def _from_row(row) -> Draft:
+    return Draft(
+        owner_id=row.owner_id,
+        local_date=row.local_date,
+        content=row.content,
+        mood=row.mood,
+        photo_url=row.photo_url,
+        diary_date=row.diary_date,
+        saved_at=row.saved_at,
+    )
+
+
+class DraftBuffer:
+    def __init__(self, flush_interval: float, batch_size: int, idle_seconds: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.idle_seconds = idle_seconds
+        self.max_pending = max_pending
+        self._drafts: Dict[DraftKey, Draft] = {}
+        self._pending = 0  # dirty 인 초안 수
+        self._lock = threading.Lock()
+        # flush 의 DB 쓰기와 discard 가 겹치면 지운 초안이 되살아날 수 있어 서로 기다리게 함
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, db: Session, owner_id: int, local_date: date, fresh: bool = False) -> Optional[Draft]:
+        """
+        버퍼의 초안을 돌려주고, 없거나 DB 와 맞춰 본 지 flush_interval 이 지났으면(fresh 면 항상) DB 에서 읽어
+        saved_at 이 더 새로운 쪽을 버퍼에 둡니다. 다른 워커가 지운 초안은 버퍼에서도 내립니다.
+        """
+        key = (owner_id, local_date)
+        with self._lock:
+            draft = self._drafts.get(key)
+            if draft is not None:
+                draft.touched = time.monotonic()
+                if not fresh and (draft.dirty or draft.touched - draft.synced < self.flush_interval):
+                    return draft
+        row = crud.get_diary_draft(db, owner_id=owner_id, local_date=local_date)
+        with self._lock:
+            draft = self._drafts.get(key)
+            if row is None:
+                if draft is not None and not draft.dirty:
+                    del self._drafts[key]
+                    return None
+                return draft
+            if draft is None or row.saved_at > draft.saved_at:
+                if draft is not None and draft.dirty:
+                    # DB 쪽이 더 새로우므로 이 버퍼의 변경은 저장해도 반영되지 않음
+                    self._pending -= 1
+                draft = self._drafts[key] = _from_row(row)
+            else:
+                draft.synced = time.monotonic()
+            return draft
+
+    def get(self, db: Session, owner_id: int, local_date: date, fresh: bool = False) -> Optional[Draft]:
+        """초안 사본. fresh 면 DB 를 다시 읽어 다른 워커가 저장한 더 새로운 초안을 반영합니다 (확정 시)."""
+        draft = self._load(db, owner_id, local_date, fresh=fresh)
+        if draft is None:
+            return None
+        with self._lock:
+            return replace(draft)
+
+    def patch(self, db: Session, owner_id: int, local_date: date, changes: dict) -> Draft:
+        """
+        changes 에 있는 필드만 덮어쓴 최신 초안을 버퍼에 두고 그 사본을 돌려줍니다 (DB 는 다음 flush 때).
+        None 인 필드는 지웁니다 (보내지 않은 필드는 changes 에 없어야 함).
+        초안이 없으면 그 날짜 일기의 내용에서 시작합니다 (일기가 없으면 빈 초안).
+        """
+        now = datetime.now(timezone.utc)
+        initial = {"content": "", "mood": None, "photo_url": None, "diary_date": now}
+        if self._load(db, owner_id, local_date) is None:
+            existing = crud.get_diary_by_date(db, owner_id=owner_id, date=local_date)
+            if existing is not None:
+                initial = {
+                    "content": existing.content or "",
+                    "mood": existing.mood,
+                    "photo_url": existing.photo_url,
+                    "diary_date": existing.diary_date,
+                }
+        key = (owner_id, local_date)
+        with self._lock:
+            draft = self._drafts.get(key)
+            if draft is None:
+                draft = Draft(owner_id=owner_id, local_date=local_date, saved_at=now, **initial)
+                self._drafts[key] = draft
+            for name in DRAFT_FIELDS:
+                if name in changes:
+                    # null 로 보낸 필드는 지움 (사진/감정 삭제). 본문만은 빈 문자열로 둠
+                    value = changes[name]
+                    setattr(draft, name, "" if value is None and name == "content" else value)
+            draft.saved_at = now
+            draft.touched = time.monotonic()
+            if not draft.dirty:
+                draft.dirty = True
+                self._pending += 1
+            pending = self._pending
+            snapshot = replace(draft)
+        if pending >= self.max_pending:
+            self._wake.set()
+        return snapshot
+
+    def discard(self, owner_id: int, local_date: date) -> None:
+        """초안을 버퍼와 DB 에서 지웁니다 (확정/일기 생성 후)."""
+        with self._flush_lock:
+            with self._lock:
+                draft = self._drafts.pop((owner_id, local_date), None)
+                if draft is not None and draft.dirty:
+                    self._pending -= 1
+            db = SessionLocal()
+            try:
+                crud.delete_diary_draft(db, owner_id=owner_id, local_date=local_date)
+            except Exception as e:
+                print(f"⚠️ 초안 삭제 실패: 사용자={owner_id}, 날짜={local_date}, {e}")
+            finally:
+                db.close()
+
+    def flush(self) -> int:
+        """바뀐 초안을 batch_size 개씩 한 문장으로 저장합니다. 저장한 초안 수를 반환합니다."""
+        with self._flush_lock:
+            with self._lock:
+                pending = [draft for draft in self._drafts.values() if draft.dirty]
+                rows = [draft.row() for draft in pending]
+                for draft in pending:
+                    draft.dirty = False
+                self._pending = 0
+            if rows:
+                try:
+                    self._write(rows)
+                except Exception as e:
+                    print(f"⚠️ 초안 {len(rows)}개 저장 실패, 다음 주기에 다시 시도합니다: {e}")
+                    with self._lock:
+                        # 그 사이 다시 바뀐 초안은 이미 dirty 이므로 그대로 둠
+                        for draft in pending:
+                            if not draft.dirty:
+                                draft.dirty = True
+                                self._pending += 1
+                    return 0
+                metrics.draft_flushed_total.inc(len(rows))
+                synced = time.monotonic()
+                with self._lock:
+                    for draft in pending:
+                        draft.synced = synced
+            self._evict_idle()
+        return len(rows)
+
+    def _write(self, rows: List[dict]) -> None:
+        db = SessionLocal()
+        try:
+            with tracing.span("drafts.flush", rows=len(rows)):
+                for start in range(0, len(rows), self.batch_size):
+                    crud.upsert_diary_drafts(db, rows=rows[start:start + self.batch_size])
+        finally:
+            db.close()
+
+    def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for key in [key for key, draft in self._drafts.items() if not draft.dirty and draft.touched < deadline]:
+                del self._drafts[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "buffered": len(self._drafts),
+                "pending": self._pending,
+            }
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ 초안 flush 실패: {e}")
+            if self._stopping:
+                return
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="draft-flusher", daemon=True)
+        self._thread.start()
+        print(f"✅ 초안 자동 저장 시작 ({self.flush_interval}초마다 저장)")
+
+    def stop(self) -> None:
+        """flusher 를 멈추고 남은 초안을 저장합니다."""
+        thread = self._thread
+        if thread is not None:
+            self._stopping = True
+            self._wake.set()
+            thread.join(timeout=30)
+            self._thread = None
+        saved = self.flush()
+        if saved:
+            print(f"💾 종료 전 초안 {saved}개 저장")
+
+
+draft_buffer = DraftBuffer(
+    flush_interval=settings.DRAFT_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.DRAFT_FLUSH_BATCH_SIZE,
+    idle_seconds=settings.DRAFT_BUFFER_IDLE_SECONDS,
+    max_pending=settings.DRAFT_FLUSH_MAX_PENDING,
+)
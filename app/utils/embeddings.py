@@ -0,0 +1,262 @@
+"""
+비슷한 과거 일기 검색 ("전에 언제 이런 기분이었지?").
+
+일기를 쓰거나 고칠 때 임베딩을 계산해 diary_embeddings 에 float32 bytes 로 저장하고,
+사용자별 인덱스(정규화된 벡터 행렬)를 메모리에 올려 NumPy 행렬-벡터 곱으로 코사인 top-k 를 찾습니다.
+
+- 제공자 (EMBEDDING_PROVIDER):
+  "openai"  : OpenAI 임베딩 API (EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+  "hashing" : 외부 호출 없는 결정적 해싱 임베딩 (개발/테스트/벤치마크용)
+- 저장된 행의 model 이 현재 제공자 키와 다르면 검색에서 빠지고, 다음 저장이나 backfill 때 다시 계산됩니다.
+- 인덱스는 이 프로세스에서 일어난 생성/수정/삭제를 바로 반영하고(증분),
+  다른 워커의 변경은 EMBEDDING_INDEX_TTL_SECONDS 마다 DB 에서 다시 읽어 반영합니다.
+
+기존 일기 채우기:
+    python -m app.utils.embeddings backfill [--owner-id N] [--batch-size 64]
+"""
+import argparse
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.config import settings
+from app.database import SessionLocal
+from app.utils import tracing
+from app.utils.vector_index import DTYPE, UserIndex, from_bytes, normalize, to_bytes
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingUnavailable(Exception):
+    """임베딩을 계산할 수 없음 (제공자 설정/호출 실패)"""
+
+
+class HashingEmbeddingProvider:
+    """
+    단어와 단어 안의 글자 bigram 을 해시해 부호 있는 버킷에 더하는 결정적 임베딩.
+    한국어 활용형("하락했다"/"하락에")도 bigram 이 겹쳐 가깝게 나옵니다. 의미 검색 품질은 낮습니다.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.key = f"hashing:{dimensions}"
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % self.dimensions] += weight if (digest >> 63) & 1 else -weight
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=DTYPE)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text.lower()):
+                self._add(matrix[row], word, 1.0)
+                for i in range(len(word) - 1):
+                    self._add(matrix[row], word[i:i + 2], 0.5)
+        return normalize(matrix)
+
+
+class OpenAIEmbeddingProvider:
+    def __init__(self, model: str, dimensions: int):
+        self.model = model
+        self.dimensions = dimensions
+        self.key = f"openai:{model}:{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        from app.utils.openai_client import create_embeddings
+
+        try:
+            vectors = create_embeddings(texts=list(texts), model=self.model, dimensions=self.dimensions)
+        except Exception as e:
+            raise EmbeddingUnavailable(f"임베딩 생성 실패: {e}")
+        return normalize(np.asarray(vectors, dtype=DTYPE))
+
+
+def _build_provider():
+    kind = settings.EMBEDDING_PROVIDER.lower()
+    if kind == "hashing":
+        return HashingEmbeddingProvider(settings.EMBEDDING_DIMENSIONS)
+    if kind != "openai":
+        print(f"⚠️ 알 수 없는 EMBEDDING_PROVIDER={settings.EMBEDDING_PROVIDER!r}, openai 를 사용합니다.")
+    return OpenAIEmbeddingProvider(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSIONS)
+
+
+provider = _build_provider()
+
+
+class EmbeddingIndex:
+    """사용자별 UserIndex 캐시 (최근 사용 순 EMBEDDING_INDEX_MAX_USERS 명까지)"""
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max(1, max_users)
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[int, UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, owner_id: int) -> Optional[UserIndex]:
+        with self._lock:
+            index = self._users.get(owner_id)
+            if index is None:
+                return None
+            if self.ttl_seconds > 0 and time.monotonic() - index.loaded_at > self.ttl_seconds:
+                del self._users[owner_id]
+                return None
+            self._users.move_to_end(owner_id)
+            return index
+
+    def get(self, db: Session, owner_id: int) -> UserIndex:
+        index = self._cached(owner_id)
+        if index is not None:
+            return index
+        with tracing.span("embeddings.load_user_index", owner_id=owner_id) as load_span:
+            rows = crud.get_owner_embeddings(db, owner_id=owner_id, model=provider.key)
+            ids = [row.diary_id for row in rows]
+            vectors = np.frombuffer(b"".join(row.vector for row in rows), dtype=DTYPE).reshape(len(rows), provider.dimensions)
+            index = UserIndex(provider.dimensions, ids, vectors)
+            load_span.set_attribute("size", len(index))
+        with self._lock:
+            # 동시에 적재한 경우 먼저 들어간 것을 씀
+            existing = self._users.get(owner_id)
+            if existing is not None:
+                return existing
+            self._users[owner_id] = index
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return index
+
+    def upsert(self, owner_id: int, diary_id: int, vector: np.ndarray) -> None:
+        """이미 메모리에 있는 사용자 인덱스만 갱신 (없으면 다음 검색 때 DB 에서 읽음)"""
+        index = self._cached(owner_id)
+        if index is not None:
+            with index.lock:
+                index.upsert(diary_id, vector)
+
+    def remove(self, owner_id: int, diary_id: int) -> None:
+        index = self._cached(owner_id)
+        if index is not None:
+            with index.lock:
+                index.remove(diary_id)
+
+
+user_indexes = EmbeddingIndex(settings.EMBEDDING_INDEX_MAX_USERS, settings.EMBEDDING_INDEX_TTL_SECONDS)
+
+
+def embedding_text(diary: models.Diary) -> str:
+    return f"감정: {diary.mood}\n{diary.content}"
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(f"{provider.key}\n{text}".encode("utf-8")).hexdigest()
+
+
+def ensure_embedding(db: Session, diary: models.Diary) -> np.ndarray:
+    """일기의 현재 내용에 맞는 임베딩을 돌려줍니다. 없거나 낡았으면 계산해 저장하고 인덱스에 반영합니다."""
+    text = embedding_text(diary)
+    content_hash = _content_hash(text)
+    stored = crud.get_diary_embedding(db, diary_id=diary.id)
+    if stored is not None and stored.content_hash == content_hash and stored.model == provider.key:
+        return from_bytes(stored.vector)
+
+    with tracing.span("embeddings.embed", provider=provider.key):
+        vector = provider.embed([text])[0]
+    crud.upsert_diary_embedding(
+        db,
+        diary_id=diary.id,
+        owner_id=diary.owner_id,
+        model=provider.key,
+        dimensions=provider.dimensions,
+        content_hash=content_hash,
+        vector=to_bytes(vector),
+    )
+    user_indexes.upsert(diary.owner_id, diary.id, vector)
+    return vector
+
+
+def index_diary(diary_id: int, owner_id: int) -> None:
+    """일기 생성/수정 후 백그라운드에서 임베딩을 계산합니다 (실패해도 다음 검색 때 다시 시도)."""
+    db = SessionLocal()
+    try:
+        diary = crud.get_diary(db, diary_id=diary_id, owner_id=owner_id)
+        if diary is None:
+            return
+        ensure_embedding(db, diary)
+    except Exception as e:
+        print(f"⚠️ 일기 임베딩 실패: diary={diary_id}, {e}")
+    finally:
+        db.close()
+
+
+def forget_diary(diary_id: int, owner_id: int) -> None:
+    """삭제된 일기를 메모리 인덱스에서 뺍니다 (DB 행은 crud.delete_diary 가 지움)."""
+    user_indexes.remove(owner_id, diary_id)
+
+
+def find_similar(db: Session, diary: models.Diary, k: int) -> List[Tuple[int, float]]:
+    """diary 와 비슷한 같은 사용자의 다른 일기 (diary_id, 코사인 유사도) 상위 k 개"""
+    vector = ensure_embedding(db, diary)
+    index = user_indexes.get(db, diary.owner_id)
+    with index.lock:
+        if index.vector(diary.id) is None:
+            index.upsert(diary.id, vector)
+        return index.top_k(vector, k, exclude_id=diary.id)
+
+
+def backfill(owner_id: Optional[int] = None, batch_size: int = 64) -> int:
+    """임베딩이 없거나 낡은 일기를 batch_size 개씩 묶어 계산합니다. 계산한 일기 수를 반환합니다."""
+    db = SessionLocal()
+    done = 0
+    after_id = 0
+    try:
+        while True:
+            diaries = crud.get_diaries_after_id(db, after_id=after_id, limit=batch_size, owner_id=owner_id)
+            if not diaries:
+                break
+            after_id = diaries[-1].id
+            hashes = crud.get_embedding_hashes(db, diary_ids=[diary.id for diary in diaries])
+            pending = []
+            for diary in diaries:
+                text = embedding_text(diary)
+                content_hash = _content_hash(text)
+                if hashes.get(diary.id) != content_hash:
+                    pending.append((diary, text, content_hash))
+            if not pending:
+                continue
+            vectors = provider.embed([text for _, text, _ in pending])
+            for (diary, _, content_hash), vector in zip(pending, vectors):
+                crud.upsert_diary_embedding(
+                    db,
+                    diary_id=diary.id,
+                    owner_id=diary.owner_id,
+                    model=provider.key,
+                    dimensions=provider.dimensions,
+                    content_hash=content_hash,
+                    vector=to_bytes(vector),
+                )
+            done += len(pending)
+            print(f"🧠 임베딩 {done}개 계산 (diary id {after_id} 까지 확인)")
+    finally:
+        db.close()
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="일기 임베딩 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fill = sub.add_parser("backfill", help="임베딩이 없거나 낡은 일기 채우기")
+    fill.add_argument("--owner-id", type=int, default=None)
+    fill.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        count = backfill(owner_id=args.owner_id, batch_size=args.batch_size)
+        print(f"✅ 임베딩 {count}개 계산 ({provider.key})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+AI 피드백 생성 공유(fan-out) 레지스트리.
+
+일기 하나당 진행 중인 OpenAI 생성은 하나만 두고, 생성된 청크를 메모리 버퍼에 쌓습니다.
+SSE 구독자는 몇 명이든 같은 생성에 붙어 버퍼를 처음(또는 Last-Event-ID 이후)부터 읽고,
+이후 청크는 도착하는 대로 받습니다. 새로고침이나 두 번째 탭이 새 생성을 시작하지 않습니다.
+
+청크의 SSE 이벤트 id 는 1부터 시작하는 청크 순번이며, 재연결 시 Last-Event-ID 로
+받은 지점 이후부터 이어 받을 수 있습니다.
+
+구독자가 모두 떠나면 FEEDBACK_DISCONNECT_GRACE_SECONDS 동안 재연결을 기다린 뒤
+업스트림 스트림을 닫아 토큰과 워커를 더 쓰지 않습니다.
+
+새 생성은 입장 제어(app/utils/admission.py)의 사용자별 공정 대기열에서 자리를 받은 뒤에
+업스트림을 호출합니다. 진행 중인 생성에 붙는 구독자는 입장 제어를 거치지 않습니다.
+
+레지스트리는 프로세스 메모리에 있으므로 같은 워커로 들어온 요청끼리만 공유됩니다.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import crud
+from app.config import settings
+from app.database import SessionLocal
+from app.utils import tracing
+from app.utils.admission import Ticket, feedback_admission, user_weight
+from app.utils.metrics import (
+    feedback_generations_abandoned_total,
+    openai_request_duration_seconds,
+    openai_time_to_first_token_seconds,
+)
+from app.utils.openai_client import create_diary_feedback_stream
+
+
+class FeedbackGeneration:
+    """일기 하나에 대한 진행 중(또는 방금 끝난) 피드백 생성과 청크 버퍼"""
+
+    def __init__(
+        self,
+        *,
+        diary_id: int,
+        content: str,
+        mood: str,
+        photo_url: Optional[str],
+        username: str,
+        ticket: Optional[Ticket] = None,
+    ):
+        self.diary_id = diary_id
+        self._ticket = ticket
+        self._content = content
+        self._mood = mood
+        self._photo_url = photo_url
+        self._username = username
+
+        self.chunks: List[str] = []
+        self.error: Optional[str] = None
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+        self._subscribers = 0
+        # 마지막 구독자가 떠날 때마다 새로 거는 유예 타이머 (다시 구독하거나 새 타이머를 걸면 이전 것은 취소)
+        self._grace_timer: Optional[threading.Timer] = None
+        self._stream = None
+        self._upstream_error: Optional[str] = None
+        self._done_callbacks: List[Callable[["FeedbackGeneration"], None]] = []
+        # 생성을 시작한 요청의 span. 생성 스레드의 span 을 같은 trace 로 이어 붙임
+        self._trace_parent = tracing.current_span()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name=f"feedback-{diary_id}", daemon=True
+        )
+
+    def start(self) -> "FeedbackGeneration":
+        self._thread.start()
+        return self
+
+    def _append(self, chunk: str) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def _finish(self, error: Optional[str] = None) -> None:
+        with self._cond:
+            if error and self.error is None:
+                self.error = error
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def _consume_upstream(self) -> None:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with tracing.span("openai.responses.stream") as upstream_span, create_diary_feedback_stream(
+                content=self._content,
+                mood=self._mood,
+                photo_url=self._photo_url,
+                username=self._username,
+            ) as stream:
+                self._stream = stream
+                for event in stream:
+                    if self.cancelled:
+                        break
+                    if event.type == "response.output_text.delta":
+                        if event.delta:
+                            if not self.chunks:
+                                upstream_span.set_attribute("first_token_ms", round(upstream_span.elapsed_ms(), 1))
+                                openai_time_to_first_token_seconds.observe(time.perf_counter() - started)
+                            self._append(event.delta)
+                    elif event.type == "response.error":
+                        self._upstream_error = event.error.get('message', 'OpenAI error')
+            outcome = "error" if self._upstream_error else "ok"
+        except Exception:
+            # 취소하면서 스트림을 닫은 경우 읽기 중 예외는 정상 흐름
+            if not self.cancelled:
+                raise
+        finally:
+            self._stream = None
+            if self.cancelled:
+                outcome = "cancelled"
+            openai_request_duration_seconds.observe(time.perf_counter() - started, call="stream", outcome=outcome)
+
+    def _admit(self) -> bool:
+        """입장 제어 대기열에서 자리를 받을 때까지 기다립니다."""
+        if self._ticket is None:
+            return True
+        with tracing.span("feedback.admission_wait"):
+            return feedback_admission.acquire(self._ticket, settings.FEEDBACK_QUEUE_TIMEOUT_SECONDS)
+
+    def _run(self) -> None:
+        with tracing.attach(self._trace_parent), tracing.span("feedback.generation", diary_id=self.diary_id) as run_span:
+            self._generate()
+            run_span.set_attribute("chunks", len(self.chunks))
+            run_span.set_attribute("cancelled", self.cancelled)
+
+    def _generate(self) -> None:
+        error: Optional[str] = None
+        try:
+            if not self.cancelled and not self._admit() and not self.cancelled:
+                raise RuntimeError("AI 피드백 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+            if not self.cancelled:
+                self._consume_upstream()
+            final_text = "".join(self.chunks).strip()
+            if self.cancelled:
+                save_partial = bool(final_text) and settings.FEEDBACK_SAVE_PARTIAL_ON_DISCONNECT
+                feedback_generations_abandoned_total.inc(partial_saved=str(save_partial).lower())
+                print(f"🛑 AI 피드백 생성 중단: diary={self.diary_id}, 청크 {len(self.chunks)}개, 부분 저장={save_partial}")
+                if save_partial:
+                    self._save(final_text)
+                error = "구독자가 없어 피드백 생성을 중단했습니다."
+            elif final_text and self._upstream_error is None:
+                self._save(final_text)
+        except Exception as e:
+            error = str(e)
+        finally:
+            if self._ticket is not None:
+                feedback_admission.release(self._ticket)
+            self._finish(self._upstream_error or error)
+            for callback in self._done_callbacks:
+                self._call_done(callback)
+
+    def add_done_callback(self, callback: Callable[["FeedbackGeneration"], None]) -> None:
+        """생성이 끝나면(성공/실패/취소) 생성 스레드에서 callback(generation) 을 호출합니다."""
+        with self._cond:
+            if not self.finished:
+                self._done_callbacks.append(callback)
+                return
+        self._call_done(callback)
+
+    def _call_done(self, callback: Callable[["FeedbackGeneration"], None]) -> None:
+        try:
+            callback(self)
+        except Exception as e:
+            print(f"❌ 피드백 생성 완료 콜백 실패: diary={self.diary_id}, {e}")
+
+    def _save(self, final_text: str) -> None:
+        db = SessionLocal()
+        try:
+            crud.save_diary_feedback(db, diary_id=self.diary_id, feedback=final_text)
+        finally:
+            db.close()
+
+    def subscribe(self) -> None:
+        with self._cond:
+            self._subscribers += 1
+            self._stop_grace_timer()
+
+    def unsubscribe(self) -> None:
+        """
+        구독 해제. 마지막 구독자였다면 유예 시간 뒤에도 아무도 없을 때 생성을 취소합니다.
+        유예 시간은 마지막으로 떠난 시점부터 셉니다 (이전 이탈의 타이머는 취소).
+        """
+        grace = settings.FEEDBACK_DISCONNECT_GRACE_SECONDS
+        with self._cond:
+            self._subscribers -= 1
+            if self._subscribers > 0 or self.finished:
+                return
+            self._stop_grace_timer()
+            if grace > 0:
+                timer = threading.Timer(grace, self._cancel_if_abandoned, kwargs={"timer": None})
+                timer.kwargs["timer"] = timer
+                timer.daemon = True
+                self._grace_timer = timer
+                timer.start()
+        if grace <= 0:
+            self._cancel_if_abandoned()
+
+    def _stop_grace_timer(self) -> None:
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+
+    def _cancel_if_abandoned(self, timer: Optional[threading.Timer] = None) -> None:
+        with self._cond:
+            # 이미 취소됐지만 실행이 시작된 이전 타이머는 무시
+            if timer is not None and timer is not self._grace_timer:
+                return
+            self._grace_timer = None
+            if self._subscribers > 0 or self.finished or self.cancelled:
+                return
+            self.cancelled = True
+            stream = self._stream
+        # 아직 대기열에 있다면 자리를 기다리지 않도록 빼냄
+        if self._ticket is not None:
+            feedback_admission.cancel(self._ticket)
+        # 업스트림이 멈춰 있어도 바로 빠져나오도록 응답 스트림을 닫음
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def wait_for_chunks(self, position: int, timeout: Optional[float]) -> Tuple[List[str], bool, Optional[str]]:
+        """
+        position 이후의 청크를 반환합니다. 새 청크가 없으면 timeout 동안 기다립니다.
+        반환값: (새 청크 목록, 생성 종료 여부, 에러 메시지)
+        """
+        with self._cond:
+            if position >= len(self.chunks) and not self.finished:
+                self._cond.wait(timeout)
+            new_chunks = self.chunks[position:]
+            return new_chunks, self.finished, self.error
+
+
+class CompletedFeedback:
+    """저장된 피드백 텍스트를 생성과 같은 방식으로 재생합니다 (Idempotency-Key 재요청용)."""
+
+    def __init__(self, text: str):
+        self.chunks: List[str] = [text] if text else []
+        self.finished = True
+        self.error: Optional[str] = None
+
+    def wait_for_chunks(self, position: int, timeout: Optional[float]) -> Tuple[List[str], bool, Optional[str]]:
+        return self.chunks[position:], True, None
+
+    def unsubscribe(self) -> None:
+        pass
+
+
+class Subscription:
+    """
+    attach_generation 으로 얻은 구독을 정확히 한 번만 해제합니다.
+    SSE 제너레이터의 finally 와 응답의 background 양쪽에서 release() 를 부르므로,
+    본문 전송이 시작되기 전에 클라이언트가 끊겨 제너레이터가 실행되지 않아도 구독이 남지 않습니다.
+    """
+
+    def __init__(self, generation):
+        self._generation = generation
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._generation.unsubscribe()
+
+
+_generations: Dict[int, FeedbackGeneration] = {}
+_registry_lock = threading.Lock()
+
+
+def _prune_locked(now: float) -> None:
+    retention = settings.FEEDBACK_STREAM_RETENTION_SECONDS
+    expired = [
+        diary_id for diary_id, generation in _generations.items()
+        if generation.finished and now - generation.finished_at > retention
+    ]
+    for diary_id in expired:
+        del _generations[diary_id]
+
+
+def attach_generation(
+    *,
+    diary_id: int,
+    content: str,
+    mood: str,
+    photo_url: Optional[str],
+    username: str,
+    user_id: int,
+    resuming: bool,
+) -> Tuple[FeedbackGeneration, bool]:
+    """
+    진행 중인 생성에 구독자로 붙거나, 없으면 새로 시작합니다. 반환값: (생성, 새로 시작했는지)
+    호출 측은 스트림이 끝나거나 연결이 끊기면 반드시 unsubscribe() 해야 합니다.
+
+    이미 끝난 생성은 재연결(resuming)일 때만 보존 기간 동안 그대로 재생하고,
+    새 요청이거나 취소된 생성이면 다시 생성합니다.
+    새로 생성할 때는 user_id 의 입장 제어 한도를 넘으면 AdmissionRejected 를 던집니다.
+    """
+    with _registry_lock:
+        _prune_locked(time.monotonic())
+        generation = _generations.get(diary_id)
+        if generation is not None and not generation.cancelled and (not generation.finished or resuming):
+            generation.subscribe()
+            return generation, False
+
+        ticket = feedback_admission.reserve(user_id, weight=user_weight(user_id))
+        generation = FeedbackGeneration(
+            diary_id=diary_id,
+            content=content,
+            mood=mood,
+            photo_url=photo_url,
+            username=username,
+            ticket=ticket,
+        )
+        _generations[diary_id] = generation
+        generation.subscribe()
+    return generation.start(), True
+
+
+def replay_completed(diary_id: int, feedback: str, resume_from: int):
+    """
+    Idempotency-Key 로 끝난 결과를 재생할 소스와 시작 위치를 돌려줍니다. 반환값: (소스, 위치)
+
+    Last-Event-ID 는 원래 스트림의 청크 순번이므로, 그 생성이 아직 보존 중이고 저장된 결과와 같을 때만
+    그 청크 버퍼에서 이어 재생합니다. 아니면 저장된 텍스트 전체를 처음부터 재생합니다 (순번이 맞지 않음).
+    """
+    if resume_from > 0:
+        with _registry_lock:
+            _prune_locked(time.monotonic())
+            generation = _generations.get(diary_id)
+            if (
+                generation is not None
+                and generation.finished
+                and not generation.cancelled
+                and generation.error is None
+                and "".join(generation.chunks).strip() == feedback
+            ):
+                generation.subscribe()
+                return generation, min(resume_from, len(generation.chunks))
+    return CompletedFeedback(feedback), 0
+
+
+def active_generation_count() -> int:
+    with _registry_lock:
+        return sum(1 for generation in _generations.values() if not generation.finished)
@@ -0,0 +1,169 @@
+"""
+Idempotency-Key 헤더 처리.
+
+모바일 클라이언트가 불안정한 네트워크에서 같은 요청을 다시 보내도 작업을 한 번만 하도록,
+(사용자, 범위, 키) 별로 처리 상태와 응답을 idempotency_keys 테이블에 저장합니다.
+
+- 처음 보는 키: in_progress 로 등록한 뒤 처리하고, 성공하면 응답을 저장(completed)합니다.
+  실패하면 키를 지워 같은 키로 다시 시도할 수 있게 합니다.
+- 완료된 키: 저장된 응답을 그대로 돌려줍니다.
+- 처리 중인 키: 호출 측이 진행 중인 결과에 붙거나(피드백) 409 로 알립니다.
+- 같은 키로 내용이 다른 요청을 보내면 IdempotencyKeyMismatch (422).
+
+키는 IDEMPOTENCY_KEY_TTL_SECONDS 동안 유효합니다. 만료된 키는 요청 경로가 아니라 배포/cron 에서 정리합니다
+(요청 처리 중 만난 만료 키는 그 자리에서 지우고 다시 등록):
+    python -m app.utils.idempotency purge
+"""
+import argparse
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.config import settings
+from app.database import SessionLocal
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+SCOPE_DIARY_CREATE = "diary_create"
+SCOPE_AI_FEEDBACK = "ai_feedback"
+
+
+class IdempotencyError(Exception):
+    status_code = 422
+
+
+class IdempotencyKeyInvalid(IdempotencyError):
+    status_code = 400
+
+
+class IdempotencyKeyMismatch(IdempotencyError):
+    status_code = 422
+
+
+class IdempotencyInProgress(IdempotencyError):
+    status_code = 409
+
+
+def request_hash(payload: Any) -> str:
+    canonical = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _is_live(record: models.IdempotencyKey, now: datetime) -> bool:
+    if record.expires_at <= now:
+        return False
+    if record.status == "completed":
+        return True
+    # 처리하던 워커가 죽어 in_progress 로 남은 키는 일정 시간 뒤 다시 처리할 수 있게 함
+    return record.created_at > now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS)
+
+
+def begin(db: Session, *, owner_id: int, scope: str, key: str, payload: Any) -> Tuple[models.IdempotencyKey, bool]:
+    """
+    키를 확인하고 없으면 처리 중으로 등록합니다. 반환값: (키 레코드, 새로 등록했는지)
+    새로 등록했다면 호출 측은 처리 후 complete() 또는 discard() 를 호출해야 합니다.
+    """
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyKeyInvalid(f"{HEADER} 는 1~{MAX_KEY_LENGTH}자여야 합니다.")
+
+    now = datetime.now(timezone.utc)
+    digest = request_hash(payload)
+    for _ in range(2):
+        existing = crud.get_idempotency_key(db, owner_id=owner_id, scope=scope, key=key)
+        if existing is not None and _is_live(existing, now):
+            if existing.request_hash != digest:
+                raise IdempotencyKeyMismatch(f"같은 {HEADER} 로 다른 내용의 요청을 보낼 수 없습니다.")
+            return existing, False
+        if existing is not None:
+            crud.delete_idempotency_key(db, key_id=existing.id)
+        created = crud.create_idempotency_key(
+            db,
+            owner_id=owner_id,
+            scope=scope,
+            key=key,
+            request_hash=digest,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+        )
+        if created is not None:
+            return created, True
+    raise IdempotencyInProgress(f"같은 {HEADER} 의 요청이 처리 중입니다.")
+
+
+def complete(
+    db: Session,
+    record: models.IdempotencyKey,
+    *,
+    status_code: int,
+    body: Any,
+    resource_id: Optional[int] = None,
+    commit: bool = True,
+) -> None:
+    crud.complete_idempotency_key(
+        db,
+        record,
+        response_status=status_code,
+        response_body=json.dumps(body, ensure_ascii=False),
+        resource_id=resource_id,
+        commit=commit,
+    )
+
+
+def discard(db: Session, record: models.IdempotencyKey) -> None:
+    crud.delete_idempotency_key(db, key_id=record.id)
+
+
+def stored_body(record: models.IdempotencyKey) -> Any:
+    return json.loads(record.response_body) if record.response_body else None
+
+
+def finish_feedback_key(key_id: int, generation) -> None:
+    """피드백 생성이 끝나면(생성 스레드) 결과를 키에 저장하거나, 실패했으면 키를 지웁니다."""
+    db = SessionLocal()
+    try:
+        record = crud.get_idempotency_key_by_id(db, key_id=key_id)
+        if record is None:
+            return
+        text = "".join(generation.chunks).strip()
+        if generation.error is None and not generation.cancelled and text:
+            complete(db, record, status_code=200, body={"feedback": text}, resource_id=generation.diary_id)
+        else:
+            discard(db, record)
+    finally:
+        db.close()
+
+
+def purge_expired(db: Session, *, now: datetime, batch_size: int) -> int:
+    """만료된 키를 batch_size 개씩 나눠 지웁니다 (잠금을 짧게 유지). 지운 수를 반환합니다."""
+    total = 0
+    while True:
+        deleted = crud.purge_expired_idempotency_keys(db, now=now, limit=batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idempotency-Key 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    purge = sub.add_parser("purge", help="만료된 Idempotency-Key 정리 (배포/cron)")
+    purge.add_argument("--batch-size", type=int, default=settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        db = SessionLocal()
+        try:
+            deleted = purge_expired(db, now=datetime.now(timezone.utc), batch_size=max(1, args.batch_size))
+        finally:
+            db.close()
+        print(f"🧹 만료된 Idempotency-Key {deleted}개 정리")
+
+
+if __name__ == "__main__":
+    main()
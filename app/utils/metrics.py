@@ -0,0 +1,293 @@
+"""
+프로세스 내 메트릭.
+
+외부 라이브러리 없이 스레드 안전한 카운터/게이지/히스토그램을 제공하고, 앱에서 쓰는 메트릭을 이곳에 모아 정의합니다.
+render_prometheus() 가 모든 메트릭을 Prometheus 텍스트 형식으로 내보내며 /metrics 에서 사용합니다.
+
+기록 비용은 라벨 튜플 생성 + 락 한 번 정도라 운영에서 항상 켜 둡니다.
+커넥션 풀처럼 값을 따로 추적하기 어려운 것은 Gauge.set_function 으로 수집 시점에 읽습니다.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # (이름 접미사, 라벨, 값)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터 (라벨별로 값을 따로 집계)"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", self._labels(key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """현재 값 게이지. set_function 을 쓰면 수집할 때마다 함수로 값을 읽습니다."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """라벨 없는 게이지의 값을 수집 시점에 function() 으로 읽습니다."""
+        self._function = function
+
+    def value(self, **labels: object) -> float:
+        if self._function is not None:
+            return float(self._function())
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Iterable[Sample]:
+        if self._function is not None:
+            try:
+                return [("", {}, float(self._function()))]
+            except Exception as e:
+                print(f"⚠️ 게이지 {self.name} 수집 실패: {e}")
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [("", self._labels(key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (Prometheus 방식의 le 버킷 + sum/count)"""
+    type_name = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 -> (버킷별 개수(+Inf 포함), 합계, 개수)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _cumulative(self, key: LabelKey) -> Tuple[List[int], float, int]:
+        counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def snapshot(self, **labels: object) -> Tuple[List[int], float, int]:
+        """(버킷별 누적 개수, 합계, 개수)"""
+        with self._lock:
+            return self._cumulative(self._key(labels))
+
+    def collect(self) -> Iterable[Sample]:
+        with self._lock:
+            snapshots = [(key, self._cumulative(key)) for key in list(self._values)]
+        samples: List[Sample] = []
+        for key, (cumulative, total, count) in snapshots:
+            labels = self._labels(key)
+            for bound, bucket_count in zip(self.buckets + (math.inf,), cumulative):
+                samples.append(("_bucket", {**labels, "le": _format_value(bound)}, bucket_count))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return samples
+
+
+REGISTRY: List[_Metric] = []
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    """등록된 모든 메트릭을 Prometheus 텍스트 형식(0.0.4)으로 만듭니다."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        for suffix, labels, value in metric.collect():
+            label_text = ",".join(f'{name}="{_escape(str(label))}"' for name, label in labels.items())
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{metric.name}{suffix}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    라우트별 지연 시간/상태 코드를 기록하는 ASGI 미들웨어.
+    라벨은 경로 템플릿(/api/v1/diaries/{diary_id})이라 카디널리티가 라우트 수로 제한됩니다.
+    스트리밍 응답(SSE)은 본문 전송이 끝날 때까지를 잽니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(time.perf_counter() - started, method=method, route=template)
+            http_requests_total.inc(method=method, route=template, status=str(status_code))
+
+
+def register_pool_gauges(engine) -> None:
+    """SQLAlchemy 커넥션 풀 상태를 수집 시점에 읽는 게이지 연결"""
+    pool = engine.pool
+    for gauge, attribute in (
+        (db_pool_size, "size"),
+        (db_pool_checked_out, "checkedout"),
+        (db_pool_checked_in, "checkedin"),
+        (db_pool_overflow, "overflow"),
+    ):
+        if hasattr(pool, attribute):
+            gauge.set_function(getattr(pool, attribute))
+
+
+# HTTP
+http_requests_total = Counter(
+    "http_requests_total",
+    "라우트/메서드/상태 코드별 HTTP 요청 수",
+    labelnames=("method", "route", "status"),
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "라우트/메서드별 HTTP 요청 처리 시간(초)",
+    labelnames=("method", "route"),
+)
+
+# DB 커넥션 풀
+db_pool_size = Gauge("db_pool_size", "커넥션 풀 기본 크기")
+db_pool_checked_out = Gauge("db_pool_checked_out", "현재 사용 중(checkout)인 커넥션 수")
+db_pool_checked_in = Gauge("db_pool_checked_in", "풀에서 대기 중인 커넥션 수")
+db_pool_overflow = Gauge("db_pool_overflow", "기본 크기를 넘어 만든 overflow 커넥션 수 (음수면 여유)")
+
+# SSE
+sse_active_streams = Gauge("sse_active_streams", "현재 열려 있는 AI 피드백 SSE 스트림 수")
+
+# OpenAI
+openai_time_to_first_token_seconds = Histogram(
+    "openai_time_to_first_token_seconds",
+    "피드백 스트림 요청부터 첫 텍스트 토큰까지의 시간(초)",
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0),
+)
+openai_request_duration_seconds = Histogram(
+    "openai_request_duration_seconds",
+    "OpenAI 호출 전체 시간(초). call=stream|create|embeddings, outcome=ok|error|cancelled",
+    labelnames=("call", "outcome"),
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0),
+)
+
+# AI 피드백
+feedback_generations_abandoned_total = Counter(
+    "feedback_generations_abandoned_total",
+    "구독자가 모두 떠나 중간에 취소된 AI 피드백 생성 수",
+    labelnames=("partial_saved",),
+)
+feedback_active_generations = Gauge("feedback_active_generations", "진행 중인 AI 피드백 생성 수 (대기 포함)")
+
+# AI 피드백 입장 제어
+feedback_admission_wait_seconds = Histogram(
+    "feedback_admission_wait_seconds",
+    "새 AI 피드백 생성이 업스트림 자리를 받기까지 대기열에서 기다린 시간(초)",
+)
+feedback_admission_rejected_total = Counter(
+    "feedback_admission_rejected_total",
+    "입장 제어로 거절(429)된 AI 피드백 생성 요청 수",
+    labelnames=("reason",),
+)
+feedback_admission_active = Gauge("feedback_admission_active", "업스트림 자리를 받아 생성 중인 수")
+feedback_admission_queued = Gauge("feedback_admission_queued", "업스트림 자리를 기다리는 생성 수")
+
+# 초안 자동 저장
+draft_buffer_size = Gauge("draft_buffer_size", "메모리 버퍼에 올라와 있는 초안 수")
+draft_buffer_pending = Gauge("draft_buffer_pending", "DB 에 아직 저장하지 않은 초안 수")
+draft_flushed_total = Counter("draft_flushed_total", "버퍼에서 DB 로 저장한 초안 수")
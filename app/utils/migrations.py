@@ -0,0 +1,102 @@
+"""
+Alembic 마이그레이션 공용 헬퍼.
+
+- create_all 로 먼저 만들어진 DB에서도 upgrade 가 통과하도록 테이블/컬럼 존재 여부를 확인
+- 운영 중인 테이블을 잠그지 않도록 인덱스는 CREATE INDEX CONCURRENTLY 로 생성
+  (트랜잭션 밖에서 실행해야 하므로 autocommit_block 안에서 실행되며,
+   이전에 실패해 INVALID 로 남은 인덱스는 지우고 다시 만듭니다)
+- 파티션 테이블은 부모에 CONCURRENTLY 를 쓸 수 없으므로, 부모에 ON ONLY 로 빈 인덱스를 만든 뒤
+  파티션마다 CONCURRENTLY 로 만들어 ATTACH 합니다 (create_partitioned_index_concurrently)
+"""
+from typing import Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(col["name"] == column for col in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _index_state(name: str) -> Optional[bool]:
+    """인덱스가 없으면 None, 있으면 유효(valid) 여부"""
+    row = op.get_bind().execute(
+        sa.text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        ),
+        {"name": name},
+    ).first()
+    return None if row is None else bool(row[0])
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+    where: Optional[str] = None,
+) -> None:
+    """테이블 쓰기를 막지 않고 인덱스를 만듭니다. 이미 유효한 인덱스가 있으면 건너뜁니다."""
+    with op.get_context().autocommit_block():
+        state = _index_state(name)
+        if state:
+            return
+        if state is False:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        unique_sql = "UNIQUE " if unique else ""
+        where_sql = f" WHERE {where}" if where else ""
+        op.execute(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY {name} ON {table} ({', '.join(columns)}){where_sql}"
+        )
+
+
+def drop_index_concurrently(name: str) -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _is_partitioned(table: str) -> bool:
+    row = op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table}
+    ).first()
+    return row is not None and row[0] == 'p'
+
+
+def create_partitioned_index_concurrently(
+    name: str, table: str, columns: Sequence[str], *, where: Optional[str] = None
+) -> None:
+    """
+    파티션 테이블에 쓰기를 막지 않고 인덱스를 만듭니다. 파티션이 아니면 create_index_concurrently 와 같습니다.
+    부모 인덱스는 모든 파티션 인덱스가 ATTACH 되면 유효해지고, 이후 새 파티션에는 자동으로 만들어집니다.
+    """
+    if not _is_partitioned(table):
+        create_index_concurrently(name, table, columns, where=where)
+        return
+    column_sql = ', '.join(columns)
+    where_sql = f" WHERE {where}" if where else ""
+    with op.get_context().autocommit_block():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({column_sql}){where_sql}")
+        partitions = [row[0] for row in op.get_bind().execute(
+            sa.text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(:name)"),
+            {"name": table},
+        )]
+        for partition in partitions:
+            partition_index = f"{partition}_{name}"[:63]
+            state = _index_state(partition_index)
+            if state is False:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {partition_index}")
+            if not state:
+                op.execute(f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} ({column_sql}){where_sql}")
+            attached = op.get_bind().execute(
+                sa.text("SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:child) AND inhparent = to_regclass(:parent)"),
+                {"child": partition_index, "parent": name},
+            ).first()
+            if attached is None:
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
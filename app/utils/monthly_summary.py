@@ -0,0 +1,134 @@
+"""
+월간 회고 요약 (map-reduce).
+
+사용자 시간대 기준 날짜(local_date)로 한 달을 7일 구간(1~7, 8~14, 15~21, 22~28, 29~말일)으로 나눠
+구간별 부분 요약(map)을 만들고, 구간 요약들을 합쳐 월간 요약(reduce)을 만듭니다.
+
+- 구간 요약은 구간 내 일기 내용 해시로 캐시되어, 일기가 바뀐 구간만 다시 요약합니다.
+- 월간 요약은 구간 해시들의 해시(source_hash)와 함께 저장되어, 변경이 없으면 모델 호출 없이 바로 반환합니다.
+"""
+import calendar
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.utils.openai_client import generate_text
+
+_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "prompts")
+
+with open(os.path.join(_PROMPTS_DIR, "weekly_summary_prompt.txt"), "r", encoding="utf-8") as f:
+    WEEKLY_SUMMARY_INSTRUCTION = f.read()
+
+with open(os.path.join(_PROMPTS_DIR, "monthly_summary_prompt.txt"), "r", encoding="utf-8") as f:
+    MONTHLY_SUMMARY_INSTRUCTION = f.read()
+
+# 프롬프트가 바뀌면 기존 캐시를 모두 무효화하기 위해 해시에 포함
+_PROMPT_VERSION = hashlib.sha256(
+    (WEEKLY_SUMMARY_INSTRUCTION + MONTHLY_SUMMARY_INSTRUCTION).encode("utf-8")
+).hexdigest()[:16]
+
+# map 단계에서 동시에 요약할 최대 구간 수 (한 달은 최대 5구간)
+_MAP_CONCURRENCY = 5
+
+
+def month_periods(year: int, month: int) -> List[Tuple[date, date]]:
+    """월을 7일 구간 [(시작일, 종료일), ...] 으로 나눕니다. 종료일은 포함."""
+    last_day = calendar.monthrange(year, month)[1]
+    periods = []
+    for start_day in range(1, last_day + 1, 7):
+        end_day = min(start_day + 6, last_day)
+        periods.append((date(year, month, start_day), date(year, month, end_day)))
+    return periods
+
+
+def _period_of(day: date) -> date:
+    return date(day.year, day.month, ((day.day - 1) // 7) * 7 + 1)
+
+
+def _format_diary(diary: models.Diary) -> str:
+    return f"[{diary.local_date.isoformat()}] 감정: {diary.mood}\n{diary.content}"
+
+
+def _content_hash(diaries: List[models.Diary]) -> str:
+    digest = hashlib.sha256(_PROMPT_VERSION.encode("utf-8"))
+    for diary in diaries:
+        digest.update(f"\x1e{diary.id}\x1f{diary.local_date.isoformat()}\x1f{diary.mood}\x1f".encode("utf-8"))
+        digest.update(diary.content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _summarize_period(diaries: List[models.Diary]) -> str:
+    text = "\n\n".join(_format_diary(diary) for diary in diaries)
+    return generate_text(text=text, system_instruction=WEEKLY_SUMMARY_INSTRUCTION)
+
+
+def get_or_create_monthly_summary(
+    db: Session, owner_id: int, year: int, month: int
+) -> Optional[models.MonthlySummary]:
+    """
+    월간 요약을 반환합니다. 해당 월에 일기가 없으면 None.
+    변경된 구간만 다시 요약하고, 전체 변경이 없으면 저장된 요약을 그대로 반환합니다.
+    """
+    periods = month_periods(year, month)
+    diaries = crud.get_diaries_by_local_date_range(
+        db, owner_id=owner_id, start_date=periods[0][0], end_date=periods[-1][1]
+    )
+    if not diaries:
+        return None
+
+    by_period: Dict[date, List[models.Diary]] = {}
+    for diary in diaries:
+        by_period.setdefault(_period_of(diary.local_date), []).append(diary)
+
+    period_hashes = {start: _content_hash(items) for start, items in by_period.items()}
+    source_hash = hashlib.sha256("|".join(
+        f"{start.isoformat()}:{period_hashes[start]}" for start in sorted(period_hashes)
+    ).encode("utf-8")).hexdigest()
+
+    existing = crud.get_monthly_summary(db, owner_id=owner_id, year=year, month=month)
+    if existing is not None and existing.source_hash == source_hash:
+        return existing
+
+    # map: 해시가 바뀐 구간만 다시 요약 (구간끼리는 병렬로)
+    cached = crud.get_weekly_summaries(db, owner_id=owner_id, period_starts=list(by_period))
+    stale = [start for start in sorted(by_period)
+             if start not in cached or cached[start].content_hash != period_hashes[start]]
+    print(f"🗓️ 월간 요약 {year}-{month:02d}: 구간 {len(by_period)}개 중 {len(stale)}개 재계산")
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(_MAP_CONCURRENCY, len(stale))) as executor:
+            fresh = dict(zip(stale, executor.map(lambda start: _summarize_period(by_period[start]), stale)))
+        period_ends = dict(periods)
+        for start, summary in fresh.items():
+            cached[start] = crud.upsert_weekly_summary(
+                db,
+                owner_id=owner_id,
+                period_start=start,
+                period_end=period_ends[start],
+                content_hash=period_hashes[start],
+                summary=summary,
+            )
+
+    # reduce: 구간 요약을 합쳐 월간 요약 생성
+    reduce_input = "\n\n".join(
+        f"[{start.isoformat()} ~ {cached[start].period_end.isoformat()}]\n{cached[start].summary}"
+        for start in sorted(by_period)
+    )
+    summary = generate_text(
+        text=f"{year}년 {month}월 구간별 요약:\n\n{reduce_input}",
+        system_instruction=MONTHLY_SUMMARY_INSTRUCTION,
+    )
+    return crud.upsert_monthly_summary(
+        db,
+        owner_id=owner_id,
+        year=year,
+        month=month,
+        source_hash=source_hash,
+        summary=summary,
+        diary_count=len(diaries),
+    )
@@ -1,9 +1,13 @@
 import os
+import time
 from typing import List, Optional, Dict, Any
 from urllib.parse import urlparse
 
 from openai import OpenAI
 from app.config import settings
+from app.utils import tracing
+from app.utils.metrics import openai_request_duration_seconds
+from app.utils.token_budget import estimate_tokens, fit_to_budget, select_model
 
 _client: Optional[OpenAI] = None
 
@@ -17,8 +21,8 @@ def _get_client() -> OpenAI:
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY 환경 변수가 설정되어 있지 않습니다.")
 
-    _client = OpenAI(api_key=api_key)
-    print("✅ OpenAI 클라이언트(싱글톤) 초기화 완료")
+    _client = OpenAI(api_key=api_key, base_url=settings.OPENAI_BASE_URL)
+    print(f"✅ OpenAI 클라이언트(싱글톤) 초기화 완료 ({_client.base_url})")
     return _client
 
 
@@ -26,6 +30,8 @@ with open("app/prompts/system_prompt.txt", "r", encoding="utf-8") as f:
     DEFAULT_SYSTEM_INSTRUCTION = f.read()
     print("✅ DEFAULT_SYSTEM_INSTRUCTION 파일이 성공적으로 준비되었습니다.")
 
+DEFAULT_SYSTEM_INSTRUCTION_TOKENS = estimate_tokens(DEFAULT_SYSTEM_INSTRUCTION)
+
 
 
 def _is_valid_public_image_url(url: str) -> bool:
@@ -65,13 +71,18 @@ def create_diary_feedback_stream(
     mood: str,
     photo_url: Optional[str] = None,
     username: str,
-    model: str = "gpt-5-nano-2025-08-07",
+    model: Optional[str] = None,
     temperature: float = 0.7,
     system_instruction: Optional[str] = DEFAULT_SYSTEM_INSTRUCTION,
 ):
     """
     OpenAI Responses API의 스트림 객체를 반환합니다.
     호출 측에서 with-context로 사용하고, 이벤트를 순회하며 delta를 전송하세요.
+
+    일기 본문은 FEEDBACK_MAX_CONTENT_TOKENS 예산에 맞게 줄이고,
+    model 을 지정하지 않으면 입력 크기에 따라 FEEDBACK_MODEL_TABLE 에서 고릅니다.
+    시스템 프롬프트는 항상 고정된 첫 메시지로 두어 프로바이더의 프롬프트 캐시가 적중하도록 합니다.
+
     사용 예:
 
         with create_diary_feedback_stream(...) as stream:
@@ -80,7 +91,21 @@ def create_diary_feedback_stream(
             final = stream.get_final_response().output_text
     """
     client = _get_client()
-    input_blocks = _build_diary_input_content(content=content, mood=mood, photo_url=photo_url, username=username)
+    budgeted = fit_to_budget(content, settings.FEEDBACK_MAX_CONTENT_TOKENS)
+    if budgeted.truncated:
+        print(f"✂️ 일기 본문을 토큰 예산에 맞춰 축약: {budgeted.original_tokens} -> {budgeted.tokens} tokens")
+    input_blocks = _build_diary_input_content(content=budgeted.text, mood=mood, photo_url=photo_url, username=username)
+
+    if model is None:
+        system_tokens = (
+            DEFAULT_SYSTEM_INSTRUCTION_TOKENS
+            if system_instruction is DEFAULT_SYSTEM_INSTRUCTION
+            else estimate_tokens(system_instruction or "")
+        )
+        model = select_model(system_tokens + budgeted.tokens)
+    # 호출 측이 연 openai 스트림 span 에 입력 정보를 기록
+    tracing.set_attribute("model", model)
+    tracing.set_attribute("input_tokens", budgeted.tokens)
 
     messages: List[Dict[str, Any]] = []
     if system_instruction:
@@ -98,3 +123,51 @@ def create_diary_feedback_stream(
     return stream
 
 
+def generate_text(
+    *,
+    text: str,
+    system_instruction: str,
+    model: str = "gpt-5-nano-2025-08-07",
+) -> str:
+    """
+    스트리밍 없이 한 번에 응답 텍스트를 생성합니다. (요약 등 백그라운드성 작업용)
+    """
+    client = _get_client()
+    messages: List[Dict[str, Any]] = [
+        {
+            "role": "system",
+            "content": [{"type": "input_text", "text": system_instruction}],
+        },
+        {
+            "role": "user",
+            "content": [{"type": "input_text", "text": text}],
+        },
+    ]
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span("openai.responses.create", model=model):
+            response = client.responses.create(model=model, input=messages)
+        outcome = "ok"
+    finally:
+        openai_request_duration_seconds.observe(time.perf_counter() - started, call="create", outcome=outcome)
+    return (response.output_text or "").strip()
+
+
+def create_embeddings(*, texts: List[str], model: str, dimensions: Optional[int] = None) -> List[List[float]]:
+    """
+    텍스트 목록의 임베딩 벡터를 입력 순서대로 반환합니다.
+    """
+    client = _get_client()
+    kwargs: Dict[str, Any] = {"model": model, "input": texts}
+    if dimensions:
+        kwargs["dimensions"] = dimensions
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span("openai.embeddings.create", model=model, inputs=len(texts)):
+            response = client.embeddings.create(**kwargs)
+        outcome = "ok"
+    finally:
+        openai_request_duration_seconds.observe(time.perf_counter() - started, call="embeddings", outcome=outcome)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
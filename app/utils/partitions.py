@@ -0,0 +1,197 @@
+"""
+diaries 테이블 범위 파티션 관리.
+
+diaries 는 local_date(작성자 시간대 기준 diary_date 의 날짜) 기준 RANGE 파티션입니다.
+PostgreSQL 은 파티션 테이블의 유니크 인덱스에 파티션 키를 포함해야 하므로,
+하루 1개 규칙 (owner_id, local_date) 을 유지할 수 있도록 diary_date 대신 local_date 로 나눕니다.
+diary_date 범위 조회는 crud 에서 local_date 경계를 함께 걸어 파티션 프루닝이 되도록 합니다.
+
+파티션 단위는 DIARY_PARTITION_INTERVAL ("year" | "quarter") 이며,
+범위를 벗어난 행은 DEFAULT 파티션(diaries_default)이 받습니다.
+
+    python -m app.utils.partitions ensure --ahead 2   # 앞으로 쓸 파티션 미리 생성 (배포/cron)
+    python -m app.utils.partitions list
+    python -m app.utils.partitions detach diaries_y2021 # 오래된 파티션 분리 후 archive 스키마로 이동
+"""
+import argparse
+import re
+import time
+from datetime import date
+from typing import List, Optional, Tuple
+
+import sqlalchemy as sa
+
+PARENT_TABLE = "diaries"
+DEFAULT_PARTITION = "diaries_default"
+ARCHIVE_SCHEMA = "archive"
+INTERVALS = ("year", "quarter")
+_PARTITION_NAME = re.compile(r"^diaries_y\d{4}(q[1-4])?$")
+
+
+def period_start(day: date, interval: str) -> date:
+    if interval == "year":
+        return date(day.year, 1, 1)
+    if interval == "quarter":
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    raise ValueError(f"알 수 없는 파티션 단위: {interval}")
+
+
+def next_period(start: date, interval: str) -> date:
+    if interval == "year":
+        return date(start.year + 1, 1, 1)
+    month = start.month + 3
+    return date(start.year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+
+def partition_name(start: date, interval: str) -> str:
+    if interval == "year":
+        return f"diaries_y{start.year}"
+    return f"diaries_y{start.year}q{(start.month - 1) // 3 + 1}"
+
+
+def partition_ranges(first_day: date, last_day: date, interval: str) -> List[Tuple[str, date, date]]:
+    """first_day ~ last_day 를 덮는 (파티션 이름, 시작일, 다음 시작일) 목록"""
+    ranges = []
+    start = period_start(first_day, interval)
+    while start <= last_day:
+        end = next_period(start, interval)
+        ranges.append((partition_name(start, interval), start, end))
+        start = end
+    return ranges
+
+
+def create_partition_sql(name: str, start: date, end: date, parent: str = PARENT_TABLE) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def create_default_partition_sql(parent: str = PARENT_TABLE) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {parent} DEFAULT"
+
+
+def list_partitions(conn) -> List[Tuple[str, str]]:
+    """(파티션 이름, 범위 표현식) 목록"""
+    rows = conn.execute(sa.text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+    ), {"parent": PARENT_TABLE}).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def ensure_partitions(conn, interval: str, ahead: int, today: Optional[date] = None) -> List[str]:
+    """현재 기간부터 ahead 기간 뒤까지의 파티션이 없으면 만듭니다. 만든 파티션 이름 목록을 반환."""
+    today = today or date.today()
+    start = period_start(today, interval)
+    last = start
+    for _ in range(ahead):
+        last = next_period(last, interval)
+    existing = {name for name, _ in list_partitions(conn)}
+    created = []
+    for name, range_start, range_end in partition_ranges(start, last, interval):
+        if name in existing:
+            continue
+        conn.execute(sa.text(create_partition_sql(name, range_start, range_end)))
+        created.append(name)
+    return created
+
+
+def partition_state(conn, name: str) -> Optional[str]:
+    """
+    "attached" | "pending" (중단된 DETACH ... CONCURRENTLY 가 남긴 상태) | "detached" (분리됐지만 아직 원래 스키마) | None (없음)
+    inhdetachpending 은 PostgreSQL 14+ 에만 있어 to_jsonb 로 읽습니다.
+    """
+    row = conn.execute(sa.text(
+        "SELECT COALESCE((to_jsonb(i) ->> 'inhdetachpending')::boolean, false) "
+        "FROM pg_inherits i "
+        "WHERE i.inhrelid = to_regclass(:name) AND i.inhparent = CAST(:parent AS regclass)"
+    ), {"name": name, "parent": PARENT_TABLE}).first()
+    if row is not None:
+        return "pending" if row[0] else "attached"
+    exists = conn.execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+    return "detached" if exists else None
+
+
+def _is_lock_timeout(error: sa.exc.OperationalError) -> bool:
+    return getattr(error.orig, "pgcode", None) == "55P03"  # lock_not_available
+
+
+def detach_partition(
+    engine,
+    name: str,
+    archive_schema: str = ARCHIVE_SCHEMA,
+    lock_timeout_ms: int = 2000,
+    attempts: int = 5,
+) -> None:
+    """
+    파티션을 부모에서 분리하고 archive 스키마로 옮깁니다.
+    분리된 테이블은 조회 대상에서 빠지며, pg_dump 후 DROP 하거나 필요 시 다시 ATTACH 할 수 있습니다.
+
+    diaries 에는 항상 DEFAULT 파티션이 있어 DETACH ... CONCURRENTLY 를 쓸 수 없으므로,
+    일반 DETACH 를 짧은 lock_timeout 트랜잭션으로 실행하고 잠금을 못 얻으면 잠시 뒤 다시 시도합니다.
+    분리 자체는 데이터를 읽지 않으므로 잠금은 잠깐만 잡습니다.
+    이전에 중단된 CONCURRENTLY 분리가 남긴 pending 상태는 DETACH ... FINALIZE 로 마무리합니다.
+    """
+    if not _PARTITION_NAME.match(name):
+        raise ValueError(f"분리할 수 없는 파티션 이름입니다: {name}")
+
+    with engine.connect() as conn:
+        state = partition_state(conn, name)
+    if state is None:
+        raise ValueError(f"파티션을 찾을 수 없습니다: {name}")
+
+    if state == "pending":
+        # FINALIZE 는 트랜잭션 블록 밖에서만 실행 가능
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} FINALIZE"))
+    elif state == "attached":
+        for attempt in range(1, attempts + 1):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(sa.text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+                    conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                break
+            except sa.exc.OperationalError as e:
+                if not _is_lock_timeout(e) or attempt == attempts:
+                    raise
+                print(f"⏳ {PARENT_TABLE} 잠금 대기 시간 초과, 다시 시도합니다 ({attempt}/{attempts})")
+                time.sleep(min(2 ** attempt, 30))
+
+    with engine.begin() as conn:
+        conn.execute(sa.text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        conn.execute(sa.text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+
+
+def main() -> None:
+    from app.config import settings
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="diaries 파티션 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ensure = sub.add_parser("ensure", help="앞으로 쓸 파티션 미리 생성")
+    ensure.add_argument("--ahead", type=int, default=settings.DIARY_PARTITION_AHEAD)
+    ensure.add_argument("--interval", choices=INTERVALS, default=settings.DIARY_PARTITION_INTERVAL)
+    sub.add_parser("list", help="파티션 목록")
+    detach = sub.add_parser("detach", help="오래된 파티션 분리 후 archive 스키마로 이동")
+    detach.add_argument("name")
+    detach.add_argument("--lock-timeout-ms", type=int, default=2000, help="부모 테이블 잠금을 기다릴 최대 시간(ms)")
+    detach.add_argument("--attempts", type=int, default=5, help="잠금을 못 얻었을 때 시도 횟수")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, args.interval, args.ahead)
+        print(f"✅ 파티션 생성: {', '.join(created) if created else '없음 (이미 준비됨)'}")
+    elif args.command == "list":
+        with engine.connect() as conn:
+            for name, bound in list_partitions(conn):
+                print(f"{name}\t{bound}")
+    elif args.command == "detach":
+        detach_partition(engine, args.name, lock_timeout_ms=args.lock_timeout_ms, attempts=args.attempts)
+        print(f"✅ {args.name} 분리 완료 -> {ARCHIVE_SCHEMA}.{args.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+SQL 쿼리 계측 유틸리티.
+SQLAlchemy 엔진 이벤트로 요청 단위 쿼리 수와 DB 시간을 집계하고,
+임계값보다 느린 쿼리는 파라미터를 가린 채 로그로 남깁니다.
+
+요청 단위 집계는 contextvar로, 테스트용 집계(count_queries)는 프로세스 전역으로 동작합니다.
+TestClient는 요청을 별도 스레드에서 처리하므로 테스트에서는 전역 집계를 사용해야 합니다.
+
+    with count_queries() as stats:
+        client.get("/api/v1/diaries/")
+    assert stats.count <= 3, stats.statements
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_time: float = 0.0
+    record_statements: bool = False
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_time * 1000
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if self.record_statements:
+            self.statements.append(statement)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+def _redact_parameters(parameters: Any, executemany: bool) -> Any:
+    """값은 모두 가리고 구조(개수/키)만 남깁니다."""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        return ["?"] * len(parameters)
+    return "?"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, elapsed)
+
+    threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold_ms and elapsed * 1000 >= threshold_ms:
+        one_line = " ".join(statement.split())
+        print(
+            f"🐢 느린 쿼리 ({elapsed * 1000:.1f}ms): {one_line} "
+            f"| params={_redact_parameters(parameters, executemany)}"
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """엔진에 쿼리 계측 이벤트 훅을 등록합니다 (중복 등록 방지)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_request() -> Iterator[QueryStats]:
+    """현재 요청 컨텍스트에서 실행되는 쿼리를 집계합니다 (미들웨어용)."""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def count_queries(record_statements: bool = True) -> Iterator[QueryStats]:
+    """블록 안에서 프로세스 전체에서 실행된 쿼리를 집계합니다 (테스트의 쿼리 예산 검증용)."""
+    stats = QueryStats(record_statements=record_statements)
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """블록 안의 쿼리 수가 max_queries 를 넘으면 AssertionError 를 발생시킵니다."""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {i + 1}. {' '.join(s.split())}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"쿼리 예산 초과: {stats.count}개 실행 (허용 {max_queries}개)\n{listing}")
+
+
+def server_timing_header(stats: QueryStats, total_ms: float) -> str:
+    return f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
@@ -4,6 +4,7 @@ import os
 import boto3
 import uuid
 from app.config import settings
+from app.utils import tracing
 
 
 
@@ -43,15 +44,16 @@ class S3Utils:
         
         print(f"S3 Presigned URL 생성: filename={filename}, content_type={content_type}, key={unique_filename}, region={settings.AWS_S3_REGION}")
         
-        presigned_url = self.s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': self.bucket_name, 
-                'Key': unique_filename, 
-                'ContentType': content_type
-            },
-            ExpiresIn=3600
-        )
+        with tracing.span("s3.generate_presigned_url", content_type=content_type):
+            presigned_url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': self.bucket_name, 
+                    'Key': unique_filename, 
+                    'ContentType': content_type
+                },
+                ExpiresIn=3600
+            )
         
         print(f"생성된 Presigned URL: {presigned_url}")
         return presigned_url
@@ -0,0 +1,126 @@
+"""
+SSE 프레임 포맷팅, 청크 병합(coalescing), 하트비트.
+
+OpenAI delta는 몇 글자 단위로 잘게 들어오므로 그대로 보내면 응답 하나에 수천 번의 작은 write가 생깁니다.
+SSECoalescer는 delta를 모아 시간 창(window) 또는 바이트 크기(max_bytes) 기준으로 한 프레임으로 내보내고,
+iter_sse_frames는 업스트림이 멈춘 동안 주석 하트비트를 보내 프록시가 유휴 연결을 끊지 않게 합니다.
+
+이 모듈은 표준 라이브러리만 사용합니다 (벤치마크에서 앱 의존성 없이 import 가능).
+"""
+import time
+from typing import Iterator, List, Optional, Protocol, Tuple
+
+
+class ChunkSource(Protocol):
+    def wait_for_chunks(self, position: int, timeout: Optional[float]) -> Tuple[List[str], bool, Optional[str]]:
+        ...
+
+
+def format_data_frame(text: str, event_id: Optional[int] = None, event: Optional[str] = None) -> str:
+    """SSE 스펙상 각 줄은 반드시 'data:' 접두사를 가져야 하므로, 내부 개행마다 접두사를 붙입니다."""
+    formatted = str(text).replace("\r\n", "\n").replace("\n", "\ndata: ")
+    head = ""
+    if event_id is not None:
+        head += f"id: {event_id}\n"
+    if event:
+        head += f"event: {event}\n"
+    return f"{head}data: {formatted}\n\n"
+
+
+def comment_frame(text: str = "keep-alive") -> str:
+    """클라이언트가 무시하는 주석 프레임 (하트비트용)"""
+    return f": {text}\n\n"
+
+
+class SSECoalescer:
+    """
+    청크를 모았다가 첫 청크 이후 window_seconds 가 지나거나 max_bytes 를 넘으면 한 프레임으로 내보냅니다.
+    window_seconds 가 0 이면 병합하지 않습니다 (청크마다 프레임).
+    프레임의 id 는 포함된 마지막 청크의 순번이므로 Last-Event-ID 재개와 호환됩니다.
+    """
+
+    def __init__(self, window_seconds: float, max_bytes: int):
+        self.window_seconds = window_seconds
+        self.max_bytes = max_bytes
+        self._parts: List[str] = []
+        self._size = 0
+        self._last_id: Optional[int] = None
+        self._first_at: Optional[float] = None
+
+    def add(self, chunk: str, event_id: int, now: float) -> Optional[str]:
+        """청크를 추가하고, 바로 내보내야 하면 프레임을 반환합니다."""
+        if not self._parts:
+            self._first_at = now
+        self._parts.append(chunk)
+        self._size += len(chunk.encode("utf-8"))
+        self._last_id = event_id
+        if self.window_seconds <= 0 or self._size >= self.max_bytes:
+            return self.flush()
+        return None
+
+    def time_until_due(self, now: float) -> Optional[float]:
+        """대기 중인 청크를 내보내야 할 때까지 남은 시간 (대기 청크가 없으면 None)"""
+        if not self._parts:
+            return None
+        return max(0.0, self._first_at + self.window_seconds - now)
+
+    def flush(self) -> Optional[str]:
+        if not self._parts:
+            return None
+        frame = format_data_frame("".join(self._parts), event_id=self._last_id)
+        self._parts = []
+        self._size = 0
+        self._first_at = None
+        return frame
+
+
+def iter_sse_frames(
+    source: ChunkSource,
+    position: int,
+    *,
+    window_seconds: float,
+    max_bytes: int,
+    heartbeat_seconds: float,
+) -> Iterator[str]:
+    """
+    source 의 position 이후 청크를 SSE 프레임으로 변환합니다.
+    생성이 끝나면 남은 청크를 내보낸 뒤 done(또는 error) 이벤트로 마칩니다.
+    heartbeat_seconds 가 0 이하이면 하트비트를 보내지 않습니다.
+    """
+    coalescer = SSECoalescer(window_seconds, max_bytes)
+    heartbeat = heartbeat_seconds > 0
+    last_sent = time.monotonic()
+    while True:
+        now = time.monotonic()
+        timeout = max(0.0, last_sent + heartbeat_seconds - now) if heartbeat else None
+        due_in = coalescer.time_until_due(now)
+        if due_in is not None:
+            timeout = due_in if timeout is None else min(timeout, due_in)
+
+        chunks, finished, error = source.wait_for_chunks(position, timeout=timeout)
+        now = time.monotonic()
+        for chunk in chunks:
+            position += 1
+            frame = coalescer.add(chunk, position, now)
+            if frame:
+                last_sent = now
+                yield frame
+
+        if finished:
+            frame = coalescer.flush()
+            if frame:
+                yield frame
+            if error:
+                yield format_data_frame(error, event="error")
+            else:
+                # 종료 신호
+                yield "event: done\ndata: [DONE]\n\n"
+            return
+
+        due_in = coalescer.time_until_due(now)
+        if due_in is not None and due_in <= 0:
+            last_sent = now
+            yield coalescer.flush()
+        elif heartbeat and now - last_sent >= heartbeat_seconds:
+            last_sent = now
+            yield comment_frame()
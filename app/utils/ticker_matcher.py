@@ -0,0 +1,248 @@
+"""
+일기 본문의 종목(티커/회사명) 언급 추출.
+
+종목 사전(TICKER_DICTIONARY_PATH, 기본 app/data/tickers.csv)의 티커, 회사명, 별칭을
+Aho-Corasick 자동자(티커용, 소문자화한 이름용)로 만들어 본문을 한 번씩 훑으며 모든 후보를 찾습니다.
+
+- 티커(AAPL, 005930)는 대소문자를 구분합니다. 영문 회사명/별칭도 구분해서 적힌 그대로와 전부 대문자만 찾습니다
+  ("HMM" 은 "hmm", "Hmm..." 에서, "Apple" 은 "apple 먹었다" 에서 잡히지 않도록). 한글이 섞인 이름은 구분하지 않습니다.
+- 영문/숫자 패턴은 앞뒤가 영문/숫자가 아니어야 합니다 ("ARM" 이 "FARM" 안에서 잡히지 않도록).
+- 한글 패턴은 조사가 바로 붙으므로("삼성전자가") 앞쪽만 한글이 아니어야 합니다.
+- 겹치는 후보는 왼쪽부터 가장 긴 것을 고릅니다 ("삼성전자우" > "삼성전자", "LG전자" > "LG").
+
+crud.create_diary / update_diary 가 저장할 때 diary_mentions 를 다시 채웁니다.
+사전을 바꿨거나 기존 일기를 채울 때:
+    python -m app.utils.ticker_matcher backfill
+    python -m app.utils.ticker_matcher match "오늘 삼성전자랑 엔비디아 샀다"
+"""
+import argparse
+import csv
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class Ticker:
+    symbol: str
+    market: str
+    name: str
+
+
+@dataclass(frozen=True)
+class Mention:
+    symbol: str
+    start: int
+    end: int  # 끝 위치 (포함하지 않음)
+    text: str
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+def _is_hangul(char: str) -> bool:
+    return "가" <= char <= "힣" or "ㄱ" <= char <= "ㆎ"
+
+
+def _fold(text: str) -> str:
+    """길이가 바뀌지 않는 소문자화 (위치를 원문과 맞추기 위해)"""
+    return "".join(lower if len(lower := char.lower()) == 1 else char for char in text)
+
+
+def _name_patterns(name: str, symbol: str) -> List[Tuple[str, str, bool]]:
+    """회사명/별칭 패턴. 영문 이름은 흔한 단어와 겹치므로 적힌 그대로와 전부 대문자만 대소문자 구분으로 찾습니다."""
+    if not name.isascii():
+        return [(name, symbol, False)]
+    patterns = [(name, symbol, True)]
+    if name.upper() != name:
+        patterns.append((name.upper(), symbol, True))
+    return patterns
+
+
+class _Automaton:
+    """Aho-Corasick 자동자: 상태별 전이(goto), 실패 링크, 출력(패턴 번호 목록)"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]  # (패턴 번호, 길이)
+
+    def add(self, pattern: str, index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((index, len(pattern)))
+
+    def build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> List[Tuple[int, int, int]]:
+        """(시작, 끝, 패턴 번호) 목록. 본문을 한 번만 훑습니다."""
+        found = []
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index, length in output[state]:
+                found.append((position + 1 - length, position + 1, index))
+        return found
+
+
+class TickerMatcher:
+    def __init__(self, tickers: List[Ticker], patterns: List[Tuple[str, str, bool]]):
+        """patterns: (패턴, symbol, 대소문자 구분 여부)"""
+        self.tickers: Dict[str, Ticker] = {ticker.symbol: ticker for ticker in tickers}
+        self._symbols: List[str] = []
+        self._lookup: Dict[str, str] = {}
+        # 대소문자를 구분하는 패턴은 원문에서, 나머지는 소문자화한 본문에서 찾음
+        self._exact = _Automaton()
+        self._folded = _Automaton()
+        seen = set()
+        for pattern, symbol, case_sensitive in patterns:
+            pattern = pattern.strip() if case_sensitive else _fold(pattern.strip())
+            if not pattern or (pattern, symbol, case_sensitive) in seen:
+                continue
+            seen.add((pattern, symbol, case_sensitive))
+            self._lookup.setdefault(_fold(pattern), symbol)
+            (self._exact if case_sensitive else self._folded).add(pattern, len(self._symbols))
+            self._symbols.append(symbol)
+        self._exact.build()
+        self._folded.build()
+
+    @classmethod
+    def from_csv(cls, path: str) -> "TickerMatcher":
+        tickers: List[Ticker] = []
+        patterns: List[Tuple[str, str, bool]] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                ticker = Ticker(symbol=row["symbol"].strip(), market=row["market"].strip(), name=row["name"].strip())
+                tickers.append(ticker)
+                patterns.append((ticker.symbol, ticker.symbol, True))
+                for name in [ticker.name, *(row.get("aliases") or "").split("|")]:
+                    patterns.extend(_name_patterns(name.strip(), ticker.symbol))
+        return cls(tickers, patterns)
+
+    def _has_boundaries(self, text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else ""
+        after = text[end] if end < len(text) else ""
+        if _is_word_char(text[start]) and before and _is_word_char(before):
+            return False
+        if _is_hangul(text[start]) and before and (_is_hangul(before) or _is_word_char(before)):
+            return False
+        if _is_word_char(text[end - 1]) and after and _is_word_char(after):
+            return False
+        return True
+
+    def find(self, text: str) -> List[Mention]:
+        """겹치지 않는 언급 목록 (왼쪽부터, 같은 위치에서는 가장 긴 것)"""
+        if not text:
+            return []
+        candidates = [
+            (start, end, index)
+            for start, end, index in self._exact.search(text) + self._folded.search(_fold(text))
+            if self._has_boundaries(text, start, end)
+        ]
+        candidates.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+        mentions: List[Mention] = []
+        last_end = 0
+        for start, end, index in candidates:
+            if start < last_end:
+                continue
+            mentions.append(Mention(symbol=self._symbols[index], start=start, end=end, text=text[start:end]))
+            last_end = end
+        return mentions
+
+    def mention_counts(self, text: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for mention in self.find(text):
+            counts[mention.symbol] = counts.get(mention.symbol, 0) + 1
+        return counts
+
+    def resolve(self, query: str) -> Optional[Ticker]:
+        """티커(대소문자 무시), 회사명, 별칭으로 종목 찾기"""
+        query = query.strip()
+        symbol = query if query in self.tickers else self._lookup.get(_fold(query))
+        return self.tickers.get(symbol) if symbol else None
+
+
+_matcher: Optional[TickerMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> TickerMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = TickerMatcher.from_csv(settings.TICKER_DICTIONARY_PATH)
+                print(f"✅ 종목 사전 로드: {len(_matcher.tickers)}개 종목 ({settings.TICKER_DICTIONARY_PATH})")
+    return _matcher
+
+
+def backfill(batch_size: int = 500) -> int:
+    """모든 일기의 언급을 현재 사전으로 다시 채웁니다. 확인한 일기 수를 반환합니다."""
+    from app import crud
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    done = 0
+    after_id = 0
+    try:
+        while True:
+            diaries = crud.get_diaries_after_id(db, after_id=after_id, limit=batch_size)
+            if not diaries:
+                break
+            for diary in diaries:
+                crud.replace_diary_mentions(db, diary)
+            db.commit()
+            after_id = diaries[-1].id
+            done += len(diaries)
+            print(f"🔎 종목 언급 {done}개 일기 처리 (diary id {after_id} 까지)")
+    finally:
+        db.close()
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="일기 종목 언급 인덱스")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fill = sub.add_parser("backfill", help="기존 일기의 diary_mentions 다시 채우기")
+    fill.add_argument("--batch-size", type=int, default=500)
+    match = sub.add_parser("match", help="텍스트에서 찾은 언급 출력")
+    match.add_argument("text")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        print(f"✅ 일기 {backfill(batch_size=args.batch_size)}개의 종목 언급을 갱신했습니다.")
+    elif args.command == "match":
+        matcher = get_matcher()
+        for mention in matcher.find(args.text):
+            ticker = matcher.tickers[mention.symbol]
+            print(f"{mention.start:>4}-{mention.end:<4} {mention.text!r} -> {ticker.symbol} ({ticker.name}, {ticker.market})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+사용자 시간대 기준 날짜 계산.
+일기의 local_date 는 작성 시점에 owner 의 시간대로 diary_date 를 변환해 확정합니다.
+"""
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.config import settings
+
+
+@lru_cache(maxsize=512)
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """시간대 이름을 ZoneInfo 로 변환합니다. 알 수 없는 이름이면 기본 시간대."""
+    try:
+        return ZoneInfo(name or settings.DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.DEFAULT_TIMEZONE)
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def to_local_date(moment: datetime, timezone_name: Optional[str]) -> date:
+    """UTC(또는 tz-aware) 시각을 사용자 시간대의 날짜로 변환합니다. naive 시각은 UTC로 간주."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(get_zone(timezone_name)).date()
+
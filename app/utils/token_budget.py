@@ -0,0 +1,111 @@
+"""
+피드백 프롬프트 토큰 예산 관리.
+
+- 토크나이저 없이 쓸 수 있는 보수적인 토큰 추정기 (한글/CJK는 글자당 1토큰, ASCII는 4글자당 1토큰)
+- 예산을 넘는 일기 본문은 공백 정리(condense) 후 가운데를 잘라(truncate) 앞뒤 맥락을 남김
+- 입력 크기에 따라 설정 테이블(FEEDBACK_MODEL_TABLE)에서 모델을 선택
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from app.config import settings
+
+_ASCII_TOKEN_COST = 0.25
+_WIDE_TOKEN_COST = 1.0
+TRUNCATION_MARKER = "\n\n...(중략: 약 {omitted}자 생략)...\n\n"
+# 잘라낼 때 앞부분에 남길 비율 (나머지는 끝부분)
+_HEAD_RATIO = 0.7
+
+
+def _char_cost(ch: str) -> float:
+    return _ASCII_TOKEN_COST if ord(ch) < 128 else _WIDE_TOKEN_COST
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트의 토큰 수를 보수적으로(넉넉하게) 추정합니다."""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    wide_chars = len(text) - ascii_chars
+    return int(wide_chars * _WIDE_TOKEN_COST + ascii_chars * _ASCII_TOKEN_COST + 0.999)
+
+
+def condense(text: str) -> str:
+    """의미를 바꾸지 않는 선에서 공백을 정리합니다."""
+    text = text.replace("\r\n", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _prefix_within(text: str, budget: float) -> int:
+    """앞에서부터 budget 토큰 안에 들어가는 글자 수."""
+    used = 0.0
+    for index, ch in enumerate(text):
+        used += _char_cost(ch)
+        if used > budget:
+            return index
+    return len(text)
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """앞/뒤를 남기고 가운데를 잘라 max_tokens 안으로 맞춥니다."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker_budget = estimate_tokens(TRUNCATION_MARKER.format(omitted=len(text)))
+    available = max(max_tokens - marker_budget, 0)
+    head_len = _prefix_within(text, available * _HEAD_RATIO)
+    tail_len = _prefix_within(text[::-1], available - available * _HEAD_RATIO)
+    tail_len = min(tail_len, len(text) - head_len)
+    omitted = len(text) - head_len - tail_len
+    tail = text[len(text) - tail_len:] if tail_len else ""
+    return text[:head_len] + TRUNCATION_MARKER.format(omitted=omitted) + tail
+
+
+@dataclass
+class BudgetedInput:
+    text: str
+    tokens: int
+    original_tokens: int
+
+    @property
+    def truncated(self) -> bool:
+        return self.tokens < self.original_tokens
+
+
+def fit_to_budget(text: str, max_tokens: int) -> BudgetedInput:
+    """예산 안이면 그대로, 넘치면 condense -> truncate_middle 순으로 줄입니다."""
+    original_tokens = estimate_tokens(text)
+    if original_tokens <= max_tokens:
+        return BudgetedInput(text=text, tokens=original_tokens, original_tokens=original_tokens)
+    condensed = condense(text)
+    if estimate_tokens(condensed) > max_tokens:
+        condensed = truncate_middle(condensed, max_tokens)
+    return BudgetedInput(text=condensed, tokens=estimate_tokens(condensed), original_tokens=original_tokens)
+
+
+def parse_model_table(raw: str) -> List[Tuple[int, str]]:
+    """'4000:model-a,16000:model-b' 형식을 [(최대 입력 토큰, 모델)] 오름차순 목록으로 파싱합니다."""
+    table: List[Tuple[int, str]] = []
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        limit, _, model = entry.partition(":")
+        table.append((int(limit), model.strip()))
+    if not table:
+        raise ValueError("FEEDBACK_MODEL_TABLE 이 비어 있습니다.")
+    return sorted(table)
+
+
+MODEL_TABLE = parse_model_table(settings.FEEDBACK_MODEL_TABLE)
+
+
+def select_model(input_tokens: int, table: List[Tuple[int, str]] = MODEL_TABLE) -> str:
+    """입력 토큰 수를 수용하는 첫 번째 모델을 고릅니다. 모두 초과하면 마지막 모델."""
+    for limit, model in table:
+        if input_tokens <= limit:
+            return model
+    return table[-1][1]
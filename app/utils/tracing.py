@@ -0,0 +1,277 @@
+"""
+요청 단위 트레이싱.
+
+contextvar 로 현재 span 을 추적하고, 끝난 span 을 설정된 exporter 로 내보냅니다.
+요청 하나에서 Firebase 토큰 검증, 사용자 조회, 일기 쿼리, OpenAI 첫 토큰까지의 시간, S3 presign 등
+어디에 시간이 쓰였는지 trace_id 로 묶어 볼 수 있습니다.
+
+    with tracing.span("s3.generate_presigned_url", key=key):
+        ...
+
+    @tracing.traced("crud.get_diaries")
+    def get_diaries(...): ...
+
+설정 (TRACING_EXPORTER):
+- "none"    : 비활성 (기본). span() 은 거의 비용 없이 no-op
+- "console" : span 이 끝날 때마다 한 줄 요약을 출력
+- "file"    : TRACING_FILE_PATH 에 span 을 JSON Lines 로 추가 (오프라인 분석용)
+
+요청의 W3C traceparent 헤더가 있으면 같은 trace_id 를 이어서 씁니다.
+다른 스레드(피드백 생성 등)로 넘어갈 때는 current_span() 을 넘겨 attach() 로 이어 붙입니다.
+
+파일로 모은 span 요약:
+    python -m app.utils.tracing summarize traces.jsonl
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_time", "_started", "duration_ms", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def end(self) -> None:
+        self.duration_ms = self.elapsed_ms()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """비활성/샘플링 제외 시 쓰는 span. 하위 span 도 모두 no-op 이 됩니다."""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+
+NOOP_SPAN = _NoopSpan()
+_current: ContextVar[Optional[object]] = ContextVar("current_span", default=None)
+
+
+class ConsoleExporter:
+    def export(self, span: Span) -> None:
+        indent = "" if span.parent_id is None else "  "
+        attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+        print(f"🔭 {indent}{span.name} {span.duration_ms:.1f}ms [{span.status}] trace={span.trace_id[:8]} {attributes}")
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _build_exporter():
+    kind = settings.TRACING_EXPORTER.lower()
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "file":
+        return FileExporter(settings.TRACING_FILE_PATH)
+    if kind not in ("", "none"):
+        print(f"⚠️ 알 수 없는 TRACING_EXPORTER={settings.TRACING_EXPORTER!r}, 트레이싱을 끕니다.")
+    return None
+
+
+_exporter = _build_exporter()
+ENABLED = _exporter is not None
+
+
+def current_span():
+    """현재 span (없으면 None). 다른 스레드로 컨텍스트를 넘길 때 사용합니다."""
+    return _current.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """현재 span 에 속성을 추가합니다."""
+    current = _current.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+@contextmanager
+def attach(parent) -> Iterator[None]:
+    """다른 스레드에서 parent span 을 현재 컨텍스트로 이어 붙입니다."""
+    token = _current.set(parent)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[object]:
+    """현재 span 의 자식 span. 바깥에 span 이 없으면 새 trace 를 시작합니다."""
+    if not ENABLED:
+        yield NOOP_SPAN
+        return
+    parent = _current.get()
+    if parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+    if parent is None:
+        with start_trace(name, **attributes) as root:
+            yield root
+        return
+    with _run_span(Span(name, parent.trace_id, parent.span_id, attributes)) as current:
+        yield current
+
+
+@contextmanager
+def child_span(parent, name: str, **attributes: Any) -> Iterator[object]:
+    """
+    parent 아래에 span 을 만들되 현재 컨텍스트는 바꾸지 않습니다.
+    async generator 처럼 다른 컨텍스트에서 닫힐 수 있는 곳(SSE 스트림)에서 사용합니다.
+    """
+    if not ENABLED or parent is None or parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+    with _run_span(Span(name, parent.trace_id, parent.span_id, attributes), activate=False) as current:
+        yield current
+
+
+@contextmanager
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[object]:
+    """루트 span. traceparent 헤더가 있으면 그 trace 를 잇고, 없으면 TRACING_SAMPLE_RATE 로 샘플링합니다."""
+    if not ENABLED:
+        yield NOOP_SPAN
+        return
+    match = _TRACEPARENT.match(traceparent.strip().lower()) if traceparent else None
+    if match:
+        trace_id, parent_id, sampled = match.group(1), match.group(2), int(match.group(3), 16) & 1
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+    if not sampled:
+        token = _current.set(NOOP_SPAN)
+        try:
+            yield NOOP_SPAN
+        finally:
+            _current.reset(token)
+        return
+    with _run_span(Span(name, trace_id, parent_id, attributes)) as root:
+        yield root
+
+
+@contextmanager
+def _run_span(current: Span, activate: bool = True) -> Iterator[Span]:
+    token = _current.set(current) if activate else None
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if token is not None:
+            _current.reset(token)
+        current.end()
+        try:
+            _exporter.export(current)
+        except Exception as e:
+            print(f"⚠️ span 내보내기 실패: {e}")
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """함수 호출 전체를 span 으로 감싸는 데코레이터"""
+    def decorator(func: Callable) -> Callable:
+        # 비활성이면 감싸지 않아 호출 비용이 없음
+        if not ENABLED:
+            return func
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(path: str) -> List[Dict[str, Any]]:
+    """JSONL 파일의 span 을 이름별로 모아 개수/p50/p95/최대 시간(ms)을 계산합니다."""
+    durations: Dict[str, List[float]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            durations.setdefault(record["name"], []).append(record["duration_ms"])
+    rows = []
+    for span_name, values in durations.items():
+        values.sort()
+        rows.append({
+            "name": span_name,
+            "count": len(values),
+            "p50_ms": values[int(0.50 * (len(values) - 1))],
+            "p95_ms": values[int(0.95 * (len(values) - 1))],
+            "max_ms": values[-1],
+            "total_ms": round(sum(values), 3),
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="트레이스 파일 분석")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summarize", help="span 이름별 지연 시간 요약")
+    summary.add_argument("path", nargs="?", default=settings.TRACING_FILE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "summarize":
+        print(f"{'span':<40} {'count':>7} {'p50(ms)':>10} {'p95(ms)':>10} {'max(ms)':>10} {'total(ms)':>12}")
+        for row in summarize(args.path):
+            print(f"{row['name']:<40} {row['count']:>7} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} "
+                  f"{row['max_ms']:>10.1f} {row['total_ms']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+사용자별 임베딩 벡터 인덱스 (NumPy).
+
+정규화된 float32 벡터를 한 행렬에 모아 두고 행렬-벡터 곱 한 번으로 코사인 유사도를 계산합니다.
+일기 수천 개 규모에서는 근사 인덱스 없이 전수 계산이 더 단순하고 충분히 빠릅니다 (benchmarks/similarity_bench.py).
+앱 설정/DB 에 의존하지 않습니다.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DTYPE = np.dtype("<f4")
+
+
+def to_bytes(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=DTYPE).tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(DTYPE, copy=False)
+
+
+class UserIndex:
+    """한 사용자의 정규화된 임베딩 행렬. 추가는 뒤에 붙이고(용량 2배씩), 삭제는 마지막 행을 옮겨 메웁니다."""
+
+    def __init__(self, dimensions: int, ids: Sequence[int] = (), vectors: Optional[np.ndarray] = None):
+        count = len(ids)
+        capacity = max(16, count)
+        self._matrix = np.zeros((capacity, dimensions), dtype=DTYPE)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        if count:
+            self._matrix[:count] = vectors
+            self._ids[:count] = ids
+        self._rows: Dict[int, int] = {int(diary_id): row for row, diary_id in enumerate(ids)}
+        self.size = count
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def upsert(self, diary_id: int, vector: np.ndarray) -> None:
+        row = self._rows.get(diary_id)
+        if row is None:
+            if self.size == len(self._ids):
+                self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+                self._ids = np.concatenate([self._ids, np.zeros_like(self._ids)])
+            row = self.size
+            self.size += 1
+            self._rows[diary_id] = row
+            self._ids[row] = diary_id
+        self._matrix[row] = vector
+
+    def remove(self, diary_id: int) -> None:
+        row = self._rows.pop(diary_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            moved_id = int(self._ids[last])
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+        self.size = last
+
+    def vector(self, diary_id: int) -> Optional[np.ndarray]:
+        row = self._rows.get(diary_id)
+        return None if row is None else self._matrix[row].copy()
+
+    def top_k(self, query: np.ndarray, k: int, exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """코사인 유사도(정규화된 벡터의 내적) 상위 k 개 (diary_id, 점수)"""
+        if self.size == 0 or k <= 0:
+            return []
+        scores = self._matrix[:self.size] @ query
+        excluded = self._rows.get(exclude_id) if exclude_id is not None else None
+        if excluded is not None:
+            scores[excluded] = -np.inf
+        k = min(k, self.size - (1 if excluded is not None else 0))
+        if k <= 0:
+            return []
+        # 전체 정렬 대신 상위 k 개만 고른 뒤 그 안에서 정렬
+        top = np.argpartition(-scores, k - 1)[:k] if k < self.size else np.arange(self.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self._ids[row]), float(scores[row])) for row in top]
@@ -0,0 +1,82 @@
+"""
+벤치마크용 앱 부트스트랩.
+Firebase 토큰 검증을 스텁으로 바꾸고, 지정한 DB URL로 uvicorn 서버를 같은 프로세스에서 띄웁니다.
+
+스텁 토큰 형식은 `bench:<user_index>` 이며, seed 스크립트가 만든
+`bench-<user_index>` 사용자(firebase_uid)로 매핑됩니다.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Optional, Tuple
+
+BENCH_TOKEN_PREFIX = "bench:"
+BENCH_UID_PREFIX = "bench-"
+
+
+def bench_uid(user_index: int) -> str:
+    return f"{BENCH_UID_PREFIX}{user_index}"
+
+
+def bench_token(user_index: int) -> str:
+    return f"{BENCH_TOKEN_PREFIX}{user_index}"
+
+
+def bench_headers(user_index: int) -> dict:
+    return {"Authorization": f"Bearer {bench_token(user_index)}"}
+
+
+def _stub_verify_firebase_token(token: str) -> dict:
+    """Firebase 대신 `bench:<n>` 토큰을 그대로 디코딩합니다."""
+    from fastapi import HTTPException, status
+
+    if not token.startswith(BENCH_TOKEN_PREFIX):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="벤치마크 토큰이 아닙니다.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    uid = bench_uid(int(token[len(BENCH_TOKEN_PREFIX):]))
+    return {"uid": uid, "email": f"{uid}@bench.local", "name": uid}
+
+
+def configure_env(db_url: Optional[str]) -> None:
+    """app.config 가 import 되기 전에 호출해야 합니다 (설정은 import 시점에 읽힘)."""
+    if db_url:
+        os.environ["DATABASE_URL"] = db_url
+    # 일기 생성마다 OpenAI 임베딩을 부르지 않도록 로컬 해싱 임베딩 사용 (환경변수로 지정하면 그대로 둠)
+    os.environ.setdefault("EMBEDDING_PROVIDER", "hashing")
+
+
+def boot_app(db_url: Optional[str], host: str = "127.0.0.1", port: int = 8765) -> Tuple[object, threading.Thread]:
+    """
+    Firebase 검증을 스텁한 앱을 백그라운드 스레드의 uvicorn으로 실행합니다.
+    반환된 server 의 `should_exit = True` 로 종료할 수 있습니다.
+    """
+    configure_env(db_url)
+
+    import uvicorn
+    from app import auth
+
+    auth.verify_firebase_token = _stub_verify_firebase_token
+
+    from app.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("벤치마크 서버가 시작되지 않았습니다.")
+        time.sleep(0.05)
+    print(f"✅ 벤치마크 서버 시작: http://{host}:{port}", file=sys.stderr, flush=True)
+    return server, thread
+
+
+def shutdown_app(server, thread: threading.Thread) -> None:
+    server.should_exit = True
+    thread.join(timeout=10)
@@ -0,0 +1,93 @@
+"""
+벤치마크 결과 집계 유틸리티.
+지연 시간 분위수(p50/p95/p99)와 처리량(RPS)을 계산하고, 커밋 간 비교가 가능하도록 JSON으로 출력합니다.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """정렬된 값 목록에서 nearest-rank 방식으로 분위수를 구합니다."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies_s: List[float], elapsed_s: float, errors: int = 0) -> Dict[str, Any]:
+    """초 단위 지연 시간 목록을 ms 단위 요약 통계로 변환합니다."""
+    values = sorted(latencies_s)
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed_s, 4),
+        "rps": round(count / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    """현재 체크아웃된 커밋 해시 (git이 없으면 None)."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def redact_db_url(url: Optional[str]) -> Optional[str]:
+    """리포트에 비밀번호가 남지 않도록 DB URL의 자격 증명을 가립니다."""
+    if not url:
+        return url
+    parsed = urlparse(url)
+    if parsed.password:
+        netloc = parsed.netloc.replace(f":{parsed.password}@", ":***@")
+        return parsed._replace(netloc=netloc).geturl()
+    return url
+
+
+def build_report(name: str, params: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "benchmark": name,
+        "git_commit": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+
+def default_output_path(name: str) -> str:
+    """커밋별로 비교할 수 있도록 benchmarks/results/<name>-<short sha>.json 경로를 만듭니다."""
+    revision = (git_revision() or "unknown")[:12]
+    return os.path.join(RESULTS_DIR, f"{name}-{revision}.json")
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]) -> str:
+    """리포트를 JSON 파일로 저장합니다. `-` 를 주면 표준 출력으로 내보냅니다."""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output == "-":
+        print(text)
+        return output
+    output = output or default_output_path(report["benchmark"])
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"✅ 벤치마크 리포트 저장: {output}", file=sys.stderr)
+    return output
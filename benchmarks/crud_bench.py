@@ -0,0 +1,169 @@
+"""
+일기 CRUD 엔드포인트 HTTP 벤치마크.
+
+Firebase 검증을 스텁한 앱을 같은 프로세스의 uvicorn으로 띄운 뒤,
+create / list / get / update / delete 를 지정한 동시성으로 호출하고
+작업별 p50/p95/p99 지연 시간과 RPS를 JSON으로 기록합니다.
+
+먼저 `python -m benchmarks.seed` 로 같은 DB에 시드 데이터를 적재하세요.
+
+사용 예:
+    python -m benchmarks.crud_bench --users 1000 --concurrency 32 --requests 2000
+    python -m benchmarks.crud_bench --db-url postgresql://... --ops list,get --output -
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks._app import bench_headers, boot_app, shutdown_app
+from benchmarks._stats import build_report, redact_db_url, summarize_latencies, write_report
+from benchmarks.seed import SEED_END_DATE
+
+ALL_OPS = ["create", "list", "get", "update", "delete"]
+# 시드 데이터와 겹치지 않도록 생성 요청은 먼 미래 날짜를 사용합니다.
+CREATE_BASE_DATE = datetime(2100, 1, 1, 12, 0, tzinfo=timezone.utc)
+API_PREFIX = "/api/v1/diaries"
+
+RequestFactory = Callable[[int], Tuple[str, str, int, Optional[dict], Optional[dict]]]
+
+
+async def _run_phase(
+    client: httpx.AsyncClient,
+    count: int,
+    concurrency: int,
+    make_request: RequestFactory,
+    on_success: Optional[Callable[[int, httpx.Response], None]] = None,
+) -> Dict[str, Any]:
+    """count 개의 요청을 concurrency 개의 워커로 나눠 실행하고 지연 시간을 수집합니다."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(count))
+
+    async def worker() -> None:
+        nonlocal errors
+        for seq in counter:
+            method, url, user_index, params, body = make_request(seq)
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    method, url, params=params, json=body, headers=bench_headers(user_index)
+                )
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            elif on_success:
+                on_success(seq, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_latencies(latencies, time.perf_counter() - started, errors)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    ops = [op.strip() for op in args.ops.split(",") if op.strip()]
+    created: List[Tuple[int, int]] = []  # (user_index, diary_id)
+    results: Dict[str, Any] = {}
+
+    def create_request(seq: int):
+        user_index = seq % args.users
+        diary_date = CREATE_BASE_DATE + timedelta(days=seq // args.users)
+        body = {
+            "content": f"벤치마크 일기 #{seq}",
+            "mood": "happy",
+            "diary_date": diary_date.isoformat(),
+        }
+        return "POST", f"{API_PREFIX}/", user_index, None, body
+
+    def record_created(seq: int, response: httpx.Response) -> None:
+        created.append((seq % args.users, response.json()["id"]))
+
+    def list_request(seq: int):
+        user_index = rng.randrange(args.users)
+        end = SEED_END_DATE - timedelta(days=rng.randrange(max(1, args.seeded_days - args.list_days)))
+        params = {
+            "start_date": (end - timedelta(days=args.list_days)).isoformat(),
+            "end_date": end.isoformat(),
+            "limit": args.list_limit,
+        }
+        return "GET", f"{API_PREFIX}/", user_index, params, None
+
+    def get_request(seq: int):
+        user_index, diary_id = rng.choice(created)
+        return "GET", f"{API_PREFIX}/{diary_id}", user_index, None, None
+
+    def update_request(seq: int):
+        user_index, diary_id = rng.choice(created)
+        return "PUT", f"{API_PREFIX}/{diary_id}", user_index, None, {"content": f"수정된 벤치마크 일기 #{seq}"}
+
+    def delete_request(seq: int):
+        user_index, diary_id = created[seq]
+        return "DELETE", f"{API_PREFIX}/{diary_id}", user_index, None, None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{args.host}:{args.port}", limits=limits, timeout=60) as client:
+        # 워밍업: 커넥션 풀과 첫 요청 비용을 측정에서 제외
+        await _run_phase(client, min(args.concurrency, 16), args.concurrency, list_request)
+
+        for op in ALL_OPS:
+            if op not in ops:
+                continue
+            if op == "create":
+                results[op] = await _run_phase(client, args.requests, args.concurrency, create_request, record_created)
+            elif op == "list":
+                results[op] = await _run_phase(client, args.requests, args.concurrency, list_request)
+            elif not created:
+                print(f"⚠️ 생성된 일기가 없어 '{op}' 단계를 건너뜁니다 (create 포함 필요)", file=sys.stderr)
+            elif op == "get":
+                results[op] = await _run_phase(client, args.requests, args.concurrency, get_request)
+            elif op == "update":
+                results[op] = await _run_phase(client, args.requests, args.concurrency, update_request)
+            elif op == "delete":
+                rng.shuffle(created)
+                results[op] = await _run_phase(client, len(created), args.concurrency, delete_request)
+            print(f"  {op}: {results.get(op)}", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="일기 CRUD 엔드포인트 HTTP 벤치마크")
+    parser.add_argument("--db-url", default=os.getenv("DATABASE_URL"), help="PostgreSQL URL (기본: DATABASE_URL)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=1000, help="시드된 bench 사용자 수")
+    parser.add_argument("--seeded-days", type=int, default=365, help="시드 시 사용한 --diaries-per-user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="작업별 요청 수")
+    parser.add_argument("--ops", default=",".join(ALL_OPS), help="실행할 작업 (콤마 구분)")
+    parser.add_argument("--list-days", type=int, default=31, help="list 요청의 날짜 범위(일)")
+    parser.add_argument("--list-limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="리포트 경로 (기본: benchmarks/results/, '-'는 stdout)")
+    args = parser.parse_args()
+
+    if not args.db_url:
+        parser.error("--db-url 또는 DATABASE_URL 이 필요합니다.")
+
+    server, thread = boot_app(args.db_url, host=args.host, port=args.port)
+    try:
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        shutdown_app(server, thread)
+
+    params = {key: value for key, value in vars(args).items() if key != "db_url"}
+    params["db_url"] = redact_db_url(args.db_url)
+    write_report(build_report("crud", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+부하 테스트용 가짜 OpenAI 서버.
+
+create_diary_feedback_stream 이 쓰는 Responses API 스트리밍(POST /v1/responses, stream=true)을
+실제와 같은 이벤트 순서로 흉내 냅니다:
+    response.created → response.in_progress → response.output_item.added → response.content_part.added
+    → response.output_text.delta × N → response.output_text.done → response.content_part.done
+    → response.output_item.done → response.completed
+요약(responses.create, stream 없음)과 임베딩(POST /v1/embeddings)도 간단히 응답하므로 앱 전체를 오프라인으로 돌릴 수 있습니다.
+
+첫 토큰 지연, 토큰 속도, 응답 길이, 오류 주입을 옵션으로 조절합니다.
+오류 모드 (--error-rate 비율로 주입):
+    http       : 스트림 시작 전 500 응답 (SDK 가 max_retries 만큼 재시도)
+    midstream  : 토큰 일부를 보낸 뒤 error 이벤트 (SDK 가 APIError 로 올림)
+    disconnect : 토큰 일부를 보낸 뒤 종료 이벤트 없이 연결을 끊음
+
+GET /stats 로 진행 중/완료/클라이언트 취소/주입한 오류 수를 확인합니다 (sse_soak 의 업스트림 누수 검사에 사용).
+앱은 OPENAI_BASE_URL=http://127.0.0.1:8766/v1 로 이 서버를 가리키면 됩니다.
+
+사용 예:
+    python -m benchmarks.fake_openai_server --port 8766 --first-token-delay 0.8 --token-rate 40 --tokens 300
+    python -m benchmarks.fake_openai_server --error-rate 0.05 --error-mode midstream
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import struct
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List
+
+SAMPLE_TEXT = (
+    "그 정도 하락에 멘탈 나가면 장 들어올 자격도 없어. 하지만 넌 다시 설 수 있어, My son. "
+    "Listen, 분할 매수는 원칙이다. 오늘 손절한 건 실패가 아니라 다음 기회를 위한 수업료야.\n"
+)
+ERROR_MODES = ("http", "midstream", "disconnect")
+
+
+@dataclass
+class FakeConfig:
+    first_token_delay: float = 0.5  # 요청부터 첫 delta 까지(초)
+    token_rate: float = 50.0  # 초당 delta 수 (0이면 지연 없이)
+    tokens: int = 200  # 응답당 delta 수
+    jitter: float = 0.2  # delta 간격의 무작위 변동 비율 (0~1)
+    error_rate: float = 0.0
+    error_mode: str = "midstream"
+    embedding_dimensions: int = 256
+    seed: int = 42
+
+
+class FakeStats:
+    def __init__(self):
+        self.started = 0
+        self.active = 0
+        self.completed = 0
+        self.client_cancelled = 0  # 끝나기 전에 클라이언트(앱)가 연결을 끊음
+        self.errors_injected = 0
+        self.peak_active = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def _deltas(rng: random.Random, count: int) -> List[str]:
+    deltas = []
+    offset = rng.randrange(len(SAMPLE_TEXT))
+    for _ in range(count):
+        size = rng.randint(1, 6)
+        deltas.append((SAMPLE_TEXT * 2)[offset:offset + size])
+        offset = (offset + size) % len(SAMPLE_TEXT)
+    return deltas
+
+
+def _response(response_id: str, model: str, status: str, output: List[dict], usage=None) -> Dict[str, Any]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "output": output,
+        "error": None,
+        "incomplete_details": None,
+        "instructions": None,
+        "metadata": {},
+        "parallel_tool_calls": True,
+        "temperature": 1.0,
+        "tool_choice": "auto",
+        "tools": [],
+        "top_p": 1.0,
+        "usage": usage,
+    }
+
+
+def _message(item_id: str, status: str, text: str = None) -> Dict[str, Any]:
+    content = [] if text is None else [{"type": "output_text", "text": text, "annotations": []}]
+    return {"id": item_id, "type": "message", "status": status, "role": "assistant", "content": content}
+
+
+def _usage(input_tokens: int, output_tokens: int) -> Dict[str, Any]:
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+def _input_tokens(body: Dict[str, Any]) -> int:
+    return max(1, len(json.dumps(body.get("input", ""), ensure_ascii=False)) // 4)
+
+
+def create_app(config: FakeConfig):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="fake-openai")
+    stats = FakeStats()
+    rng = random.Random(config.seed)
+
+    def _sse(sequence: List[int], event_type: str, payload: Dict[str, Any]) -> str:
+        payload = {"type": event_type, "sequence_number": sequence[0], **payload}
+        sequence[0] += 1
+        return f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def _stream(body: Dict[str, Any], inject: str) -> AsyncIterator[str]:
+        response_id = f"resp_{uuid.uuid4().hex}"
+        item_id = f"msg_{uuid.uuid4().hex}"
+        model = body.get("model", "fake-model")
+        deltas = _deltas(rng, config.tokens)
+        fail_at = rng.randrange(1, max(2, len(deltas))) if inject else None
+        interval = 1.0 / config.token_rate if config.token_rate > 0 else 0.0
+        sequence = [0]
+        finished = False
+
+        stats.started += 1
+        stats.active += 1
+        stats.peak_active = max(stats.peak_active, stats.active)
+        try:
+            yield _sse(sequence, "response.created", {"response": _response(response_id, model, "in_progress", [])})
+            yield _sse(sequence, "response.in_progress", {"response": _response(response_id, model, "in_progress", [])})
+            yield _sse(sequence, "response.output_item.added", {"output_index": 0, "item": _message(item_id, "in_progress")})
+            yield _sse(sequence, "response.content_part.added", {
+                "item_id": item_id, "output_index": 0, "content_index": 0,
+                "part": {"type": "output_text", "text": "", "annotations": []},
+            })
+            await asyncio.sleep(config.first_token_delay)
+
+            text = []
+            for index, delta in enumerate(deltas):
+                if index == fail_at:
+                    stats.errors_injected += 1
+                    if inject == "disconnect":
+                        finished = True
+                        raise ConnectionAbortedError("fake-openai: injected disconnect")
+                    # 스트림 중 실패: SDK 는 최상위 error 객체가 있는 이벤트를 APIError 로 올림
+                    yield _sse(sequence, "error", {
+                        "error": {"type": "server_error", "code": "server_error", "message": "fake-openai: injected error"},
+                    })
+                    finished = True
+                    return
+                if index and interval:
+                    await asyncio.sleep(interval * (1 + config.jitter * (2 * rng.random() - 1)))
+                text.append(delta)
+                yield _sse(sequence, "response.output_text.delta", {
+                    "item_id": item_id, "output_index": 0, "content_index": 0, "delta": delta, "logprobs": [],
+                })
+
+            full_text = "".join(text)
+            part = {"type": "output_text", "text": full_text, "annotations": []}
+            yield _sse(sequence, "response.output_text.done", {
+                "item_id": item_id, "output_index": 0, "content_index": 0, "text": full_text, "logprobs": [],
+            })
+            yield _sse(sequence, "response.content_part.done", {
+                "item_id": item_id, "output_index": 0, "content_index": 0, "part": part,
+            })
+            message = _message(item_id, "completed", full_text)
+            yield _sse(sequence, "response.output_item.done", {"output_index": 0, "item": message})
+            yield _sse(sequence, "response.completed", {
+                "response": _response(
+                    response_id, model, "completed", [message], _usage(_input_tokens(body), len(deltas))
+                ),
+            })
+            finished = True
+            stats.completed += 1
+        finally:
+            stats.active -= 1
+            if not finished:
+                stats.client_cancelled += 1
+
+    def _pick_error() -> str:
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            return config.error_mode
+        return ""
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        inject = _pick_error()
+        if inject == "http":
+            stats.errors_injected += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"type": "server_error", "code": "server_error", "message": "fake-openai: injected 500"}},
+            )
+        if body.get("stream"):
+            return StreamingResponse(_stream(body, inject), media_type="text/event-stream")
+
+        await asyncio.sleep(config.first_token_delay)
+        text = "".join(_deltas(rng, config.tokens))
+        message = _message(f"msg_{uuid.uuid4().hex}", "completed", text)
+        return _response(
+            f"resp_{uuid.uuid4().hex}", body.get("model", "fake-model"), "completed", [message],
+            _usage(_input_tokens(body), config.tokens),
+        )
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or config.embedding_dimensions)
+        data = []
+        for index, text in enumerate(inputs):
+            # 입력 텍스트로 정해지는 결정적 단위 벡터
+            seed = hashlib.blake2b(str(text).encode("utf-8"), digest_size=8).digest()
+            vector_rng = random.Random(struct.unpack("<Q", seed)[0])
+            vector = [vector_rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            data.append({"object": "embedding", "index": index, "embedding": [value / norm for value in vector]})
+        tokens = sum(len(str(text)) // 4 + 1 for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.as_dict()
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="부하 테스트용 가짜 OpenAI Responses API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-token-delay", type=float, default=FakeConfig.first_token_delay, help="첫 delta 까지 지연(초)")
+    parser.add_argument("--token-rate", type=float, default=FakeConfig.token_rate, help="초당 delta 수 (0이면 지연 없음)")
+    parser.add_argument("--tokens", type=int, default=FakeConfig.tokens, help="응답당 delta 수")
+    parser.add_argument("--jitter", type=float, default=FakeConfig.jitter, help="delta 간격 변동 비율 (0~1)")
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate, help="오류를 주입할 요청 비율 (0~1)")
+    parser.add_argument("--error-mode", choices=ERROR_MODES, default=FakeConfig.error_mode)
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeConfig(
+        first_token_delay=args.first_token_delay,
+        token_rate=args.token_rate,
+        tokens=args.tokens,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_mode=args.error_mode,
+        seed=args.seed,
+    )
+    print(f"✅ 가짜 OpenAI 서버: http://{args.host}:{args.port}/v1 ({config})", file=sys.stderr, flush=True)
+    uvicorn.run(
+        create_app(config), host=args.host, port=args.port, log_level="warning", access_log=False,
+        backlog=4096, timeout_keep_alive=30,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+diaries 범위 조회 벤치마크 (파티션 적용 전/후 비교용).
+
+crud.get_diaries 와 같은 모양의 쿼리(owner_id + diary_date 범위, local_date 경계 포함)와
+달력/월간 요약이 쓰는 local_date 범위 쿼리를 DB에 직접 실행해 지연 시간을 측정하고,
+EXPLAIN (ANALYZE, BUFFERS) 로 실제로 읽은 파티션 수를 함께 기록합니다.
+
+마이그레이션 0004 상태(단일 테이블)와 0005 적용 후에 각각 실행해 리포트를 비교하세요.
+
+사용 예:
+    python -m benchmarks.seed --users 2000 --diaries-per-user 1500 --truncate
+    python -m benchmarks.partition_bench --iterations 2000
+    alembic -c app/alembic.ini upgrade head
+    python -m benchmarks.partition_bench --iterations 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from benchmarks._app import bench_uid, configure_env
+from benchmarks._stats import build_report, redact_db_url, summarize_latencies, write_report
+from benchmarks.seed import SEED_END_DATE
+
+LIST_SQL = """
+    SELECT * FROM diaries
+    WHERE owner_id = :owner_id
+      AND diary_date >= :start AND diary_date <= :end
+      AND local_date >= :local_start AND local_date <= :local_end
+    ORDER BY diary_date DESC
+    LIMIT :limit
+"""
+LOCAL_RANGE_SQL = """
+    SELECT local_date, id, mood FROM diaries
+    WHERE owner_id = :owner_id AND local_date >= :local_start AND local_date <= :local_end
+    ORDER BY local_date
+"""
+# (이름, SQL, 범위 일수)
+SCENARIOS = [
+    ("list_month", LIST_SQL, 31),
+    ("list_year", LIST_SQL, 365),
+    ("calendar_month", LOCAL_RANGE_SQL, 31),
+]
+
+
+def _table_info(conn) -> Dict[str, Any]:
+    import sqlalchemy as sa
+
+    relkind = conn.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('diaries')")).scalar()
+    partitions = conn.execute(sa.text(
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass('diaries')"
+    )).scalar()
+    rows = conn.execute(sa.text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass('diaries')")).scalar()
+    if relkind == "p":
+        rows = conn.execute(sa.text(
+            "SELECT coalesce(sum(c.reltuples), 0)::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass('diaries')"
+        )).scalar()
+    return {"partitioned": relkind == "p", "partitions": partitions, "estimated_rows": rows}
+
+
+def _scanned_relations(plan: Dict[str, Any]) -> List[str]:
+    names = []
+    if "Relation Name" in plan:
+        names.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        names.extend(_scanned_relations(child))
+    return names
+
+
+def _params(rng: random.Random, owner_ids: List[int], days: int, seeded_days: int, limit: int) -> Dict[str, Any]:
+    end = SEED_END_DATE - timedelta(days=rng.randrange(max(1, seeded_days - days)))
+    start = end - timedelta(days=days)
+    return {
+        "owner_id": rng.choice(owner_ids),
+        "start": start,
+        "end": end,
+        "local_start": (start - timedelta(days=2)).date(),
+        "local_end": (end + timedelta(days=2)).date(),
+        "limit": limit,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import sqlalchemy as sa
+    from app.database import engine
+
+    rng = random.Random(args.seed)
+    results: Dict[str, Any] = {}
+    with engine.connect() as conn:
+        uids = [bench_uid(index) for index in range(args.users)]
+        owner_ids = [row[0] for row in conn.execute(
+            sa.text("SELECT id FROM users WHERE firebase_uid = ANY(:uids)"), {"uids": uids}
+        )]
+        if not owner_ids:
+            raise SystemExit("bench 사용자가 없습니다. 먼저 python -m benchmarks.seed 를 실행하세요.")
+        results["table"] = _table_info(conn)
+        print(f"  table: {results['table']}", file=sys.stderr)
+
+        for name, sql, days in SCENARIOS:
+            statement = sa.text(sql)
+            # 워밍업 (캐시/플랜 준비)
+            for _ in range(min(args.iterations, 50)):
+                conn.execute(statement, _params(rng, owner_ids, days, args.seeded_days, args.limit)).all()
+
+            latencies: List[float] = []
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                params = _params(rng, owner_ids, days, args.seeded_days, args.limit)
+                query_started = time.perf_counter()
+                conn.execute(statement, params).all()
+                latencies.append(time.perf_counter() - query_started)
+            summary = summarize_latencies(latencies, time.perf_counter() - started)
+
+            explain = conn.execute(
+                sa.text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"),
+                _params(rng, owner_ids, days, args.seeded_days, args.limit),
+            ).scalar()
+            plan = explain[0]
+            summary["relations_scanned"] = sorted(set(_scanned_relations(plan["Plan"])))
+            summary["sample_execution_ms"] = plan.get("Execution Time")
+            summary["sample_shared_buffers_hit"] = plan["Plan"].get("Shared Hit Blocks")
+            summary["sample_shared_buffers_read"] = plan["Plan"].get("Shared Read Blocks")
+            results[name] = summary
+            print(f"  {name}: {summary}", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="diaries 범위 조회 벤치마크 (파티션 전/후 비교)")
+    parser.add_argument("--db-url", default=os.getenv("DATABASE_URL"), help="PostgreSQL URL (기본: DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=1000, help="시드된 bench 사용자 수")
+    parser.add_argument("--seeded-days", type=int, default=365, help="시드 시 사용한 --diaries-per-user")
+    parser.add_argument("--iterations", type=int, default=1000, help="시나리오별 쿼리 수")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="리포트 경로 (기본: benchmarks/results/, '-'는 stdout)")
+    args = parser.parse_args()
+
+    if not args.db_url:
+        parser.error("--db-url 또는 DATABASE_URL 이 필요합니다.")
+    configure_env(args.db_url)
+
+    results = run_benchmark(args)
+    params = {key: value for key, value in vars(args).items() if key != "db_url"}
+    params["db_url"] = redact_db_url(args.db_url)
+    name = "partition" if results["table"]["partitioned"] else "partition-baseline"
+    write_report(build_report(name, params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
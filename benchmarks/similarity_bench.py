@@ -0,0 +1,113 @@
+"""
+비슷한 일기 검색(top-k 코사인) 지연 시간 벤치마크.
+
+일기 수가 다른 사용자 인덱스(app.utils.vector_index.UserIndex)를 합성 벡터로 만들고
+검색 지연 시간을 측정합니다. 비교 기준으로 순수 Python 전수 계산도 함께 잽니다.
+DB 에서 읽은 bytes 를 행렬로 올리는 적재 시간과 증분 추가/삭제 비용도 기록합니다.
+
+합성 벡터는 감정/주제 묶음을 흉내 내도록 몇 개의 중심 주변에 흩뿌립니다.
+앱 설정/DB 없이 실행됩니다.
+
+사용 예:
+    python -m benchmarks.similarity_bench --sizes 1000,3000,10000 --dimensions 256 --queries 2000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.utils.vector_index import DTYPE, UserIndex, normalize, to_bytes
+from benchmarks._stats import build_report, summarize_latencies, write_report
+
+
+def synthetic_vectors(rng: np.random.Generator, count: int, dimensions: int, clusters: int) -> np.ndarray:
+    centers = normalize(rng.standard_normal((clusters, dimensions)).astype(DTYPE))
+    labels = rng.integers(0, clusters, size=count)
+    noise = rng.standard_normal((count, dimensions)).astype(DTYPE) * 0.08
+    return normalize(centers[labels] + noise)
+
+
+def python_top_k(rows: List[List[float]], ids: List[int], query: List[float], k: int) -> List[int]:
+    scores = [(sum(a * b for a, b in zip(row, query)), diary_id) for row, diary_id in zip(rows, ids)]
+    scores.sort(reverse=True)
+    return [diary_id for _, diary_id in scores[:k]]
+
+
+def run_size(args: argparse.Namespace, size: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed + size)
+    vectors = synthetic_vectors(rng, size, args.dimensions, args.clusters)
+    ids = list(range(1, size + 1))
+
+    # DB 에서 읽어 온 bytes 목록 -> 인덱스 적재
+    blobs = [to_bytes(vector) for vector in vectors]
+    started = time.perf_counter()
+    matrix = np.frombuffer(b"".join(blobs), dtype=DTYPE).reshape(size, args.dimensions)
+    index = UserIndex(args.dimensions, ids, matrix)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    picker = random.Random(args.seed)
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(args.queries):
+        diary_id = picker.choice(ids)
+        query_started = time.perf_counter()
+        index.top_k(vectors[diary_id - 1], args.k, exclude_id=diary_id)
+        latencies.append(time.perf_counter() - query_started)
+    numpy_summary = summarize_latencies(latencies, time.perf_counter() - started)
+
+    rows = vectors.tolist()
+    baseline_latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(args.baseline_queries):
+        diary_id = picker.choice(ids)
+        query_started = time.perf_counter()
+        python_top_k(rows, ids, rows[diary_id - 1], args.k + 1)
+        baseline_latencies.append(time.perf_counter() - query_started)
+    baseline_summary = summarize_latencies(baseline_latencies, time.perf_counter() - started)
+
+    # 증분 갱신: 새 일기 추가 후 삭제
+    extra = synthetic_vectors(rng, args.updates, args.dimensions, args.clusters)
+    started = time.perf_counter()
+    for offset, vector in enumerate(extra):
+        index.upsert(size + 1 + offset, vector)
+    for offset in range(args.updates):
+        index.remove(size + 1 + offset)
+    update_us = (time.perf_counter() - started) / max(args.updates * 2, 1) * 1e6
+
+    result = {
+        "diaries": size,
+        "index_bytes": size * args.dimensions * DTYPE.itemsize,
+        "load_ms": round(load_ms, 3),
+        "numpy": numpy_summary,
+        "python_baseline": baseline_summary,
+        "speedup_p50": round(baseline_summary["p50_ms"] / max(numpy_summary["p50_ms"], 1e-6), 1),
+        "incremental_update_us": round(update_us, 2),
+    }
+    print(f"  {size}: p50={numpy_summary['p50_ms']}ms p95={numpy_summary['p95_ms']}ms "
+          f"(python p50={baseline_summary['p50_ms']}ms), load={result['load_ms']}ms", file=sys.stderr)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="비슷한 일기 top-k 검색 벤치마크")
+    parser.add_argument("--sizes", default="1000,3000,10000", help="사용자당 일기 수 (콤마 구분)")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=12)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--baseline-queries", type=int, default=20, help="순수 Python 기준 측정 횟수")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="리포트 경로 (기본: benchmarks/results/, '-'는 stdout)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {str(size): run_size(args, size) for size in sizes}
+    write_report(build_report("similarity", vars(args), results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+SSE 프레임 병합(coalescing) 벤치마크.
+
+OpenAI delta 스트림을 흉내 내는 생산자 스레드(몇 글자짜리 delta를 일정 속도로 추가)를 두고,
+병합 없이(window=0) / 병합해서 iter_sse_frames 로 프레임을 만들어 /dev/null 에 write 합니다.
+응답당 프레임 수, write 바이트, 소비 스레드 CPU 시간을 비교해 JSON으로 기록합니다.
+
+앱 의존성 없이 실행됩니다.
+
+사용 예:
+    python -m benchmarks.sse_coalesce_bench --responses 20 --deltas 2000 --token-rate 400
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.utils.sse import iter_sse_frames
+from benchmarks._stats import build_report, write_report
+
+SAMPLE_TEXT = "그 정도 하락에 멘탈 나가면 장 들어올 자격도 없어. 하지만 넌 다시 설 수 있어, My son. Listen, 분할 매수는 원칙이다.\n"
+
+
+class SyntheticStream:
+    """FeedbackGeneration 과 같은 wait_for_chunks 인터페이스를 가진 가짜 delta 스트림"""
+
+    def __init__(self, deltas: List[str], token_rate: float):
+        self._deltas = deltas
+        self._interval = 1.0 / token_rate if token_rate > 0 else 0.0
+        self.chunks: List[str] = []
+        self.finished = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+
+    def start(self) -> "SyntheticStream":
+        self._thread.start()
+        return self
+
+    def _produce(self) -> None:
+        next_at = time.monotonic()
+        for delta in self._deltas:
+            next_at += self._interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                self.chunks.append(delta)
+                self._cond.notify_all()
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def wait_for_chunks(self, position: int, timeout: Optional[float]) -> Tuple[List[str], bool, Optional[str]]:
+        with self._cond:
+            if position >= len(self.chunks) and not self.finished:
+                self._cond.wait(timeout)
+            return self.chunks[position:], self.finished, None
+
+
+def make_deltas(rng: random.Random, count: int) -> List[str]:
+    deltas = []
+    offset = 0
+    for _ in range(count):
+        size = rng.randint(1, 6)
+        piece = (SAMPLE_TEXT * 2)[offset:offset + size]
+        offset = (offset + size) % len(SAMPLE_TEXT)
+        deltas.append(piece)
+    return deltas
+
+
+def run_mode(args: argparse.Namespace, window_ms: float, deltas: List[str]) -> dict:
+    frames_total = 0
+    bytes_total = 0
+    cpu_total = 0.0
+    wall_total = 0.0
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        for _ in range(args.responses):
+            source = SyntheticStream(deltas, args.token_rate).start()
+            cpu_started = time.thread_time()
+            wall_started = time.perf_counter()
+            for frame in iter_sse_frames(
+                source,
+                0,
+                window_seconds=window_ms / 1000,
+                max_bytes=args.max_bytes,
+                heartbeat_seconds=args.heartbeat,
+            ):
+                data = frame.encode("utf-8")
+                os.write(fd, data)
+                frames_total += 1
+                bytes_total += len(data)
+            cpu_total += time.thread_time() - cpu_started
+            wall_total += time.perf_counter() - wall_started
+    finally:
+        os.close(fd)
+    return {
+        "window_ms": window_ms,
+        "frames_per_response": frames_total / args.responses,
+        "bytes_per_response": bytes_total / args.responses,
+        "cpu_ms_per_response": round(cpu_total / args.responses * 1000, 3),
+        "wall_ms_per_response": round(wall_total / args.responses * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE 프레임 병합 전/후 비교 벤치마크")
+    parser.add_argument("--responses", type=int, default=10)
+    parser.add_argument("--deltas", type=int, default=1500, help="응답당 delta 수")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="초당 delta 수 (0이면 지연 없이)")
+    parser.add_argument("--window-ms", type=float, default=50.0, help="병합 모드의 시간 창")
+    parser.add_argument("--max-bytes", type=int, default=1024)
+    parser.add_argument("--heartbeat", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="리포트 경로 (기본: benchmarks/results/, '-'는 stdout)")
+    args = parser.parse_args()
+
+    deltas = make_deltas(random.Random(args.seed), args.deltas)
+    results = {
+        "uncoalesced": run_mode(args, 0.0, deltas),
+        "coalesced": run_mode(args, args.window_ms, deltas),
+    }
+    base, merged = results["uncoalesced"], results["coalesced"]
+    results["frame_reduction"] = round(base["frames_per_response"] / max(merged["frames_per_response"], 1), 2)
+    results["cpu_reduction"] = round(base["cpu_ms_per_response"] / max(merged["cpu_ms_per_response"], 1e-6), 2)
+    write_report(build_report("sse-coalesce", vars(args), results), args.output)
+
+
+if __name__ == "__main__":
+    main()
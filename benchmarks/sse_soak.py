@@ -0,0 +1,457 @@
+"""
+AI 피드백 SSE 소크 테스트 (GET /api/v1/diaries/{id}/ai-feedback).
+
+OpenAI 대신 benchmarks/fake_openai_server.py 를 띄우고, Firebase 검증을 스텁한 앱을 별도 프로세스로 실행한 뒤
+수천 개의 SSE 클라이언트를 동시에 열어 다음을 JSON으로 기록합니다.
+
+- 첫 바이트까지 시간(TTFB), 첫 텍스트 프레임까지 시간, 스트림 전체 시간 (p50/p95/p99)
+- 처리량: 전체/스트림별 초당 글자 수, 프레임/하트비트 수, 결과(done/error/끊음/HTTP 상태)별 개수
+- 메모리: 앱 프로세스 RSS 기준선/최고치/종료 후, 동시 스트림당 RSS 증가량
+- 누수: 모든 클라이언트가 끝나고 --settle-seconds 뒤에도 남아 있는 SSE 스트림/생성/입장 슬롯/DB 커넥션,
+  가짜 서버 쪽 업스트림 연결, 스레드/파일 디스크립터/RSS 증가량
+
+앱을 별도 프로세스로 띄우므로 RSS/스레드/fd 는 서버만의 값입니다 (Linux /proc 필요, 없으면 null).
+게이지는 앱의 /metrics 에서 읽습니다.
+입장 제어 한도는 --max-concurrency 와 사용자별 한도를 클라이언트 수에 맞게 풀어서 띄웁니다.
+
+먼저 `python -m benchmarks.seed` 로 같은 DB에 시드 데이터를 적재하세요 (클라이언트마다 서로 다른 일기를 씀).
+생성이 끝난 일기에는 가짜 피드백이 llm_feedback 으로 저장됩니다.
+
+사용 예:
+    python -m benchmarks.sse_soak --clients 2000 --users 500 --ramp-seconds 20
+    python -m benchmarks.sse_soak --clients 500 --disconnect-rate 0.2 --error-rate 0.05 --error-mode midstream
+    python -m benchmarks.sse_soak --openai-base-url http://127.0.0.1:8766/v1 --output -   # 이미 띄운 가짜 서버 사용
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks._app import bench_headers
+from benchmarks._stats import build_report, percentile, redact_db_url, write_report
+from benchmarks.fake_openai_server import ERROR_MODES, FakeConfig
+
+API_PREFIX = "/api/v1/diaries"
+METRICS_TOKEN = "sse-soak"
+# 모든 클라이언트가 끝난 뒤 0 으로 돌아와야 하는 앱 게이지
+LEAK_GAUGES = (
+    "sse_active_streams",
+    "feedback_active_generations",
+    "feedback_admission_active",
+    "feedback_admission_queued",
+    "db_pool_checked_out",
+)
+
+
+@dataclass
+class StreamResult:
+    outcome: str = "pending"  # done | error | disconnected | http_<status> | transport_error | incomplete
+    ttfb: Optional[float] = None  # 첫 바이트(하트비트 포함)
+    first_data: Optional[float] = None  # 첫 텍스트 프레임
+    duration: Optional[float] = None
+    chars: int = 0
+    frames: int = 0
+    heartbeats: int = 0
+
+
+@dataclass
+class ProcessSample:
+    rss_bytes: Optional[int] = None
+    threads: Optional[int] = None
+    fds: Optional[int] = None
+    gauges: Dict[str, float] = field(default_factory=dict)
+
+
+def _read_proc(pid: int) -> ProcessSample:
+    sample = ProcessSample()
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    sample.rss_bytes = int(line.split()[1]) * 1024
+                elif line.startswith("Threads:"):
+                    sample.threads = int(line.split()[1])
+        sample.fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        pass
+    return sample
+
+
+def parse_gauges(text: str) -> Dict[str, float]:
+    """Prometheus 텍스트에서 라벨 없는 샘플만 읽습니다."""
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "{" in line:
+            continue
+        name, _, value = line.partition(" ")
+        try:
+            values[name] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+class AppProcess:
+    """앱 서버 프로세스와 상태 샘플링"""
+
+    def __init__(self, process: subprocess.Popen, base_url: str):
+        self.process = process
+        self.base_url = base_url
+        self._client = httpx.AsyncClient(base_url=base_url, timeout=10)
+
+    async def sample(self) -> ProcessSample:
+        sample = _read_proc(self.process.pid)
+        try:
+            response = await self._client.get("/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})
+            sample.gauges = parse_gauges(response.text)
+        except httpx.HTTPError:
+            pass
+        return sample
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def _spawn(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], env=env)
+
+
+def _stop(process: Optional[subprocess.Popen]) -> None:
+    if process is None or process.poll() is not None:
+        return
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def _wait_until_ready(url: str, process: Optional[subprocess.Popen], timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2) as client:
+        while True:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"{url} 프로세스가 종료되었습니다 (exit {process.returncode}).")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} 가 준비되지 않았습니다.")
+            await asyncio.sleep(0.2)
+
+
+async def _assign_diaries(client: httpx.AsyncClient, clients: int, users: int) -> List[tuple]:
+    """클라이언트마다 (user_index, diary_id). 같은 일기는 같은 생성에 붙으므로 가능한 한 다른 일기를 고릅니다."""
+    used_users = min(users, clients)
+    per_user = math.ceil(clients / used_users)
+    diary_ids: Dict[int, List[int]] = {}
+    for user_index in range(used_users):
+        response = await client.get(
+            f"{API_PREFIX}/", params={"limit": per_user, "fields": "id"}, headers=bench_headers(user_index)
+        )
+        response.raise_for_status()
+        ids = [row["id"] for row in response.json()]
+        if not ids:
+            raise RuntimeError(f"bench 사용자 {user_index} 의 일기가 없습니다. 먼저 benchmarks.seed 를 실행하세요.")
+        diary_ids[user_index] = ids
+    assignments = []
+    for index in range(clients):
+        user_index = index % used_users
+        ids = diary_ids[user_index]
+        assignments.append((user_index, ids[(index // used_users) % len(ids)]))
+    return assignments
+
+
+async def _run_stream(
+    client: httpx.AsyncClient, user_index: int, diary_id: int, start_at: float, disconnect_after: Optional[int]
+) -> StreamResult:
+    result = StreamResult()
+    await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+    started = time.perf_counter()
+    try:
+        async with client.stream(
+            "GET", f"{API_PREFIX}/{diary_id}/ai-feedback", headers=bench_headers(user_index)
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                result.outcome = f"http_{response.status_code}"
+                return result
+            buffer = ""
+            async for text in response.aiter_text():
+                now = time.perf_counter()
+                if result.ttfb is None:
+                    result.ttfb = now - started
+                buffer += text
+                while "\n\n" in buffer:
+                    frame, buffer = buffer.split("\n\n", 1)
+                    if frame.startswith(":"):
+                        result.heartbeats += 1
+                        continue
+                    event = "message"
+                    data = []
+                    for line in frame.split("\n"):
+                        if line.startswith("event: "):
+                            event = line[len("event: "):]
+                        elif line.startswith("data: "):
+                            data.append(line[len("data: "):])
+                    if event in ("done", "error"):
+                        result.outcome = event
+                        break
+                    result.frames += 1
+                    result.chars += len("\n".join(data))
+                    if result.first_data is None:
+                        result.first_data = now - started
+                if result.outcome in ("done", "error"):
+                    break
+                if disconnect_after is not None and result.chars >= disconnect_after:
+                    result.outcome = "disconnected"
+                    break
+            if result.outcome == "pending":
+                result.outcome = "incomplete"
+    except httpx.HTTPError:
+        result.outcome = "transport_error"
+    finally:
+        result.duration = time.perf_counter() - started
+    return result
+
+
+def _summary_ms(values: List[Optional[float]]) -> Dict[str, Any]:
+    values = sorted(value for value in values if value is not None)
+    count = len(values)
+    return {
+        "count": count,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / (1024 * 1024), 2) if value is not None else None
+
+
+def _delta(after: Optional[int], before: Optional[int]) -> Optional[int]:
+    return after - before if after is not None and before is not None else None
+
+
+async def run_soak(args: argparse.Namespace, app: AppProcess, fake_stats_url: Optional[str]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.clients + 8, max_keepalive_connections=args.clients + 8)
+    timeout = httpx.Timeout(args.stream_timeout, connect=30)
+    async with httpx.AsyncClient(base_url=app.base_url, limits=limits, timeout=timeout) as client:
+        assignments = await _assign_diaries(client, args.clients, args.users)
+        await asyncio.sleep(1.0)
+        baseline = await app.sample()
+
+        peak = ProcessSample(rss_bytes=baseline.rss_bytes, threads=baseline.threads, fds=baseline.fds)
+        peak_streams = 0.0
+        sampling = True
+
+        async def sampler() -> None:
+            nonlocal peak_streams
+            while sampling:
+                sample = await app.sample()
+                for name in ("rss_bytes", "threads", "fds"):
+                    value = getattr(sample, name)
+                    if value is not None and (getattr(peak, name) is None or value > getattr(peak, name)):
+                        setattr(peak, name, value)
+                peak_streams = max(peak_streams, sample.gauges.get("sse_active_streams", 0.0))
+                await asyncio.sleep(args.sample_interval)
+
+        sampler_task = asyncio.create_task(sampler())
+        started = time.perf_counter()
+        tasks = []
+        for index, (user_index, diary_id) in enumerate(assignments):
+            start_at = started + (args.ramp_seconds * index / args.clients if args.clients else 0.0)
+            disconnect_after = rng.randint(1, args.disconnect_after_chars) if rng.random() < args.disconnect_rate else None
+            tasks.append(_run_stream(client, user_index, diary_id, start_at, disconnect_after))
+        print(f"🚀 SSE 클라이언트 {args.clients}개 시작 (ramp {args.ramp_seconds}s)", file=sys.stderr, flush=True)
+        results: List[StreamResult] = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        print(f"  모든 스트림 종료 ({elapsed:.1f}s), {args.settle_seconds}s 대기 후 누수 확인", file=sys.stderr, flush=True)
+
+    await asyncio.sleep(args.settle_seconds)
+    sampling = False
+    await sampler_task
+    after = await app.sample()
+
+    upstream: Optional[Dict[str, Any]] = None
+    if fake_stats_url:
+        try:
+            async with httpx.AsyncClient(timeout=5) as stats_client:
+                upstream = (await stats_client.get(fake_stats_url)).json()
+        except httpx.HTTPError:
+            upstream = None
+
+    outcomes = Counter(result.outcome for result in results)
+    total_chars = sum(result.chars for result in results)
+    per_stream_rate = sorted(
+        result.chars / result.duration for result in results if result.outcome == "done" and result.duration
+    )
+    rss_growth = _delta(peak.rss_bytes, baseline.rss_bytes)
+
+    leaks: Dict[str, Any] = {name: after.gauges.get(name) for name in LEAK_GAUGES}
+    leaks["upstream_active"] = upstream.get("active") if upstream else None
+    leaked = [name for name, value in leaks.items() if value]
+    leaks.update({
+        "threads_delta": _delta(after.threads, baseline.threads),
+        "fds_delta": _delta(after.fds, baseline.fds),
+        "rss_delta_mb": _mb(_delta(after.rss_bytes, baseline.rss_bytes)),
+        "leaked": leaked,
+    })
+    if leaked:
+        print(f"⚠️ 종료 후에도 남은 자원: {', '.join(leaked)}", file=sys.stderr)
+
+    return {
+        "clients": args.clients,
+        "elapsed_s": round(elapsed, 3),
+        "outcomes": dict(outcomes),
+        "ttfb": _summary_ms([result.ttfb for result in results]),
+        "first_data": _summary_ms([result.first_data for result in results]),
+        "stream_duration": _summary_ms([result.duration for result in results if result.outcome == "done"]),
+        "throughput": {
+            "chars_total": total_chars,
+            "chars_per_s": round(total_chars / elapsed, 1) if elapsed > 0 else 0.0,
+            "frames_total": sum(result.frames for result in results),
+            "heartbeats_total": sum(result.heartbeats for result in results),
+            "per_stream_chars_per_s_p50": round(percentile(per_stream_rate, 50), 1),
+            "per_stream_chars_per_s_p5": round(percentile(per_stream_rate, 5), 1),
+        },
+        "memory": {
+            "baseline_rss_mb": _mb(baseline.rss_bytes),
+            "peak_rss_mb": _mb(peak.rss_bytes),
+            "after_rss_mb": _mb(after.rss_bytes),
+            "peak_active_streams": peak_streams,
+            "rss_per_stream_kb": (
+                round(rss_growth / peak_streams / 1024, 1) if rss_growth is not None and peak_streams else None
+            ),
+            "peak_threads": peak.threads,
+            "peak_fds": peak.fds,
+        },
+        "leaks": leaks,
+        "upstream": upstream,
+    }
+
+
+def _app_env(args: argparse.Namespace, openai_base_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.db_url,
+        "OPENAI_BASE_URL": openai_base_url,
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY") or "sse-soak",
+        "METRICS_TOKEN": METRICS_TOKEN,
+        # 입장 제어가 측정을 가리지 않도록 한도를 클라이언트 수에 맞춤
+        "FEEDBACK_MAX_CONCURRENCY": str(args.max_concurrency or args.clients),
+        "FEEDBACK_USER_BURST": str(args.clients),
+        "FEEDBACK_USER_RATE_PER_MINUTE": str(args.clients * 60),
+        "FEEDBACK_USER_QUEUE_LIMIT": str(args.clients),
+        "TRACING_EXPORTER": "none",
+    })
+    return env
+
+
+def serve(args: argparse.Namespace) -> None:
+    """run_soak 이 띄우는 앱 서버 프로세스 (SIGTERM 까지 실행)"""
+    from benchmarks._app import boot_app, shutdown_app
+
+    server, thread = boot_app(args.db_url, host=args.host, port=args.port)
+    signal.signal(signal.SIGTERM, lambda *_: setattr(server, "should_exit", True))
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_app(server, thread)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI 피드백 SSE 소크 테스트 (가짜 OpenAI 서버 사용)")
+    parser.add_argument("command", nargs="?", choices=("run", "serve"), default="run", help=argparse.SUPPRESS)
+    parser.add_argument("--db-url", default=os.getenv("DATABASE_URL"), help="PostgreSQL URL (기본: DATABASE_URL)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=500, help="시드된 bench 사용자 중 사용할 수")
+    parser.add_argument("--clients", type=int, default=1000, help="동시 SSE 클라이언트 수")
+    parser.add_argument("--ramp-seconds", type=float, default=10.0, help="클라이언트를 나눠 여는 시간(초)")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="중간에 연결을 끊을 클라이언트 비율 (0~1)")
+    parser.add_argument("--disconnect-after-chars", type=int, default=200, help="끊는 클라이언트가 받을 최대 글자 수")
+    parser.add_argument("--stream-timeout", type=float, default=300.0, help="스트림 읽기 타임아웃(초)")
+    parser.add_argument("--settle-seconds", type=float, default=10.0, help="모든 스트림 종료 후 누수 확인까지 대기(초)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="RSS/게이지 샘플링 간격(초)")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="FEEDBACK_MAX_CONCURRENCY (기본: 클라이언트 수)")
+    parser.add_argument("--openai-base-url", default=None, help="이미 띄운 가짜 서버 주소 (주지 않으면 직접 띄움)")
+    parser.add_argument("--fake-port", type=int, default=8766)
+    parser.add_argument("--first-token-delay", type=float, default=FakeConfig.first_token_delay)
+    parser.add_argument("--token-rate", type=float, default=FakeConfig.token_rate)
+    parser.add_argument("--tokens", type=int, default=FakeConfig.tokens)
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate)
+    parser.add_argument("--error-mode", choices=ERROR_MODES, default=FakeConfig.error_mode)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="리포트 경로 (기본: benchmarks/results/, '-'는 stdout)")
+    args = parser.parse_args()
+
+    if not args.db_url:
+        parser.error("--db-url 또는 DATABASE_URL 이 필요합니다.")
+    if args.command == "serve":
+        serve(args)
+        return
+
+    fake_process = None
+    app_process = None
+    openai_base_url = args.openai_base_url
+    if openai_base_url is None:
+        openai_base_url = f"http://{args.host}:{args.fake_port}/v1"
+        fake_process = _spawn([
+            "benchmarks.fake_openai_server",
+            "--host", args.host,
+            "--port", str(args.fake_port),
+            "--first-token-delay", str(args.first_token_delay),
+            "--token-rate", str(args.token_rate),
+            "--tokens", str(args.tokens),
+            "--error-rate", str(args.error_rate),
+            "--error-mode", args.error_mode,
+            "--seed", str(args.seed),
+        ], dict(os.environ))
+    fake_stats_url = openai_base_url.rstrip("/").rsplit("/v1", 1)[0] + "/stats"
+
+    async def run() -> Dict[str, Any]:
+        await _wait_until_ready(fake_stats_url, fake_process)
+        await _wait_until_ready(f"http://{args.host}:{args.port}/health", app_process)
+        app = AppProcess(app_process, f"http://{args.host}:{args.port}")
+        try:
+            return await run_soak(args, app, fake_stats_url)
+        finally:
+            await app.close()
+
+    try:
+        app_process = _spawn(
+            ["benchmarks.sse_soak", "serve", "--db-url", args.db_url, "--host", args.host, "--port", str(args.port)],
+            _app_env(args, openai_base_url),
+        )
+        results = asyncio.run(run())
+    finally:
+        _stop(app_process)
+        _stop(fake_process)
+
+    params = {key: value for key, value in vars(args).items() if key not in ("db_url", "command")}
+    params["db_url"] = redact_db_url(args.db_url)
+    write_report(build_report("sse_soak", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,10 @@ fi
 source venv/bin/activate
 pip install -r requirements.txt
 
+# DB 마이그레이션 적용 (앱은 시작 시 스키마를 만들지 않음)
+alembic -c app/alembic.ini upgrade head
+python -m app.utils.partitions ensure
+
 # 백엔드 서버를 백그라운드에서 실행
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 &
 BACKEND_PID=$!
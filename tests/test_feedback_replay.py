@@ -0,0 +1,45 @@
+from app.utils import feedback_streams
+from app.utils.feedback_streams import CompletedFeedback, FeedbackGeneration, replay_completed
+from app.utils.sse import iter_sse_frames
+
+DIARY_ID = 4242
+DONE = "event: done\ndata: [DONE]\n\n"
+
+
+def _frames(source, position):
+    return list(iter_sse_frames(source, position, window_seconds=0, max_bytes=1024, heartbeat_seconds=0))
+
+
+def _retain_finished_generation(chunks):
+    generation = FeedbackGeneration(diary_id=DIARY_ID, content="", mood="", photo_url=None, username="u")
+    for chunk in chunks:
+        generation._append(chunk)
+    generation._finish()
+    feedback_streams._generations[DIARY_ID] = generation
+    return generation
+
+
+def teardown_function():
+    feedback_streams._generations.pop(DIARY_ID, None)
+
+
+def test_completed_key_resumes_from_retained_generation():
+    _retain_finished_generation(["그 정도 ", "하락에 ", "멘탈 ", "나가면 ", "안 돼", "."])
+    source, position = replay_completed(DIARY_ID, "그 정도 하락에 멘탈 나가면 안 돼.", resume_from=5)
+    assert position == 5
+    assert _frames(source, position) == ["id: 6\ndata: .\n\n", DONE]
+
+
+def test_completed_key_without_retained_generation_replays_everything():
+    source, position = replay_completed(DIARY_ID, "전체 피드백", resume_from=5)
+    assert isinstance(source, CompletedFeedback)
+    assert position == 0
+    assert _frames(source, position) == ["id: 1\ndata: 전체 피드백\n\n", DONE]
+
+
+def test_completed_key_ignores_generation_with_other_text():
+    # 같은 일기의 다른(새) 생성이면 청크 순번이 원래 스트림과 다르므로 쓰지 않음
+    _retain_finished_generation(["다른 ", "피드백"])
+    source, position = replay_completed(DIARY_ID, "저장된 피드백", resume_from=1)
+    assert isinstance(source, CompletedFeedback)
+    assert _frames(source, position) == ["id: 1\ndata: 저장된 피드백\n\n", DONE]
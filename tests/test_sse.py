@@ -0,0 +1,52 @@
+import time
+
+from app.utils.sse import iter_sse_frames
+
+
+class FakeSource:
+    """청크를 시간에 맞춰 내보내는 ChunkSource (timeout 인자 기록)"""
+
+    def __init__(self, schedule):
+        self.schedule = schedule  # [(시작 후 초, 청크)]
+        self.started = time.monotonic()
+        self.timeouts = []
+
+    def wait_for_chunks(self, position, timeout):
+        self.timeouts.append(timeout)
+        elapsed = time.monotonic() - self.started
+        ready = [chunk for at, chunk in self.schedule if at <= elapsed]
+        if position >= len(ready):
+            upcoming = [at for at, _ in self.schedule if at > elapsed]
+            wait = upcoming[0] - elapsed if upcoming else 0.0
+            if timeout is not None:
+                wait = min(wait, timeout)
+            time.sleep(wait)
+            elapsed = time.monotonic() - self.started
+            ready = [chunk for at, chunk in self.schedule if at <= elapsed]
+        return ready[position:], len(ready) == len(self.schedule), None
+
+
+def _frames(source, heartbeat_seconds, window_seconds=0.0):
+    return list(iter_sse_frames(
+        source, 0, window_seconds=window_seconds, max_bytes=1024, heartbeat_seconds=heartbeat_seconds,
+    ))
+
+
+def test_heartbeat_sent_while_upstream_is_idle():
+    frames = _frames(FakeSource([(0.12, "안녕")]), heartbeat_seconds=0.05)
+    assert frames.count(": keep-alive\n\n") >= 1
+    assert frames[-2:] == ["id: 1\ndata: 안녕\n\n", "event: done\ndata: [DONE]\n\n"]
+
+
+def test_zero_heartbeat_disables_keep_alive():
+    source = FakeSource([(0.05, "a"), (0.1, "b")])
+    frames = _frames(source, heartbeat_seconds=0)
+    assert ": keep-alive\n\n" not in frames
+    assert frames == ["id: 1\ndata: a\n\n", "id: 2\ndata: b\n\n", "event: done\ndata: [DONE]\n\n"]
+    assert all(timeout is None for timeout in source.timeouts)
+
+
+def test_zero_heartbeat_still_waits_for_coalescing_window():
+    source = FakeSource([(0.0, "a"), (0.01, "b"), (0.2, "c")])
+    frames = _frames(source, heartbeat_seconds=0, window_seconds=0.05)
+    assert frames == ["id: 2\ndata: ab\n\n", "id: 3\ndata: c\n\n", "event: done\ndata: [DONE]\n\n"]
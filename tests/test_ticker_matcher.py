@@ -0,0 +1,58 @@
+from app.utils.ticker_matcher import TickerMatcher
+
+DICTIONARY = """symbol,market,name,aliases
+005930,KOSPI,삼성전자,Samsung Electronics|삼전
+005935,KOSPI,삼성전자우,
+003550,KOSPI,LG,
+066570,KOSPI,LG전자,LG Electronics
+011200,KOSPI,HMM,
+AAPL,NASDAQ,Apple,Apple Inc
+ARM,NASDAQ,Arm Holdings,
+"""
+
+
+def _matcher(tmp_path) -> TickerMatcher:
+    path = tmp_path / "tickers.csv"
+    path.write_text(DICTIONARY, encoding="utf-8")
+    return TickerMatcher.from_csv(str(path))
+
+
+def _found(matcher: TickerMatcher, text: str):
+    return [(mention.symbol, mention.text) for mention in matcher.find(text)]
+
+
+def test_ascii_patterns_need_word_boundaries(tmp_path):
+    matcher = _matcher(tmp_path)
+    assert _found(matcher, "FARM 이랑 ARMY 는 아니고 ARM 만 샀다") == [("ARM", "ARM")]
+    assert _found(matcher, "AAPL, ARM.") == [("AAPL", "AAPL"), ("ARM", "ARM")]
+
+
+def test_hangul_patterns_allow_trailing_particles(tmp_path):
+    matcher = _matcher(tmp_path)
+    assert _found(matcher, "삼성전자가 올랐다") == [("005930", "삼성전자")]
+    assert _found(matcher, "비삼성전자 계열") == []
+
+
+def test_leftmost_longest(tmp_path):
+    matcher = _matcher(tmp_path)
+    assert _found(matcher, "삼성전자우를 샀다") == [("005935", "삼성전자우")]
+    assert _found(matcher, "LG전자랑 LG 둘 다") == [("066570", "LG전자"), ("003550", "LG")]
+    assert _found(matcher, "Samsung Electronics 실적") == [("005930", "Samsung Electronics")]
+
+
+def test_ascii_names_are_case_sensitive(tmp_path):
+    matcher = _matcher(tmp_path)
+    assert _found(matcher, "hmm 오늘은 좀 쉬었다") == []
+    assert _found(matcher, "Hmm... 애매하다") == []
+    assert _found(matcher, "HMM 운임 상승") == [("011200", "HMM")]
+    assert _found(matcher, "apple 먹었다") == []
+    assert _found(matcher, "Apple 이랑 APPLE") == [("AAPL", "Apple"), ("AAPL", "APPLE")]
+    assert _found(matcher, "aapl 은 티커가 아님") == []
+    assert _found(matcher, "lg전자 샀다") == [("066570", "lg전자")]
+
+
+def test_mention_counts_and_resolve(tmp_path):
+    matcher = _matcher(tmp_path)
+    assert matcher.mention_counts("삼전 팔고 삼성전자 또 샀다") == {"005930": 2}
+    assert matcher.resolve("hmm").symbol == "011200"
+    assert matcher.resolve("없는종목") is None